@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import c104
+
+DEFAULT_WINDOW = 8
+
+# Outcome of a single pipelined command, reported in submission order
+CommandResult = namedtuple("CommandResult", "index op ioa ok value elapsed")
+
+
+class CommandPipeline:
+    """
+    Keep up to `window` read/write commands in flight at once.
+
+    c104 blocks each read()/transmit() until its confirmation arrives, so every
+    in-flight command occupies one worker thread. Confirmations are matched by
+    c104 on IOA and type, which is why at most one command per IOA is allowed
+    to be outstanding. Commands to the same IOA are chained and run in the
+    order they were submitted.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.window = window
+        self._executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="iec104-cmd")
+        # map IOA to the future of the last command submitted for it
+        self._last_per_ioa = {}
+        self._guard = threading.Lock()
+        self._next_index = 0
+
+
+    def _run(self, index, op, pt, value):
+        ioa = pt.io_address
+        start = time.perf_counter()
+        try:
+            if op == "read":
+                ok = pt.read()
+                value = pt.value if ok else None
+            else:
+                pt.value = value
+                ok = pt.transmit(cause=c104.Cot.ACTIVATION)
+        except ValueError as e:
+            print(f"[ERROR] {op} IOA {ioa}: {e}")
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        return CommandResult(index, op, ioa, ok, value, elapsed)
+
+
+    def submit(self, op, pt, value=None):
+        """Queue a read or write on a registered c104 point and return a Future."""
+        if op not in ("read", "write"):
+            raise ValueError(f"unknown operation: {op}")
+
+        ioa = pt.io_address
+        result = Future()
+
+        with self._guard:
+            index = self._next_index
+            self._next_index += 1
+            previous = self._last_per_ioa.get(ioa)
+            self._last_per_ioa[ioa] = result
+
+        def finish(inner):
+            with self._guard:
+                if self._last_per_ioa.get(ioa) is result:
+                    del self._last_per_ioa[ioa]
+            error = inner.exception()
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(inner.result())
+
+        def start(_previous=None):
+            inner = self._executor.submit(self._run, index, op, pt, value)
+            inner.add_done_callback(finish)
+
+        # Wait for the previous command on this IOA before putting this one in flight
+        if previous is None:
+            start()
+        else:
+            previous.add_done_callback(start)
+
+        return result
+
+
+    def run(self, commands, on_result=None):
+        """
+        Submit (op, point, value) tuples and wait for all of them.
+        `on_result` is called from the calling thread with each CommandResult
+        as it completes. Returns the results in submission order.
+        """
+        futures = [self.submit(op, pt, value) for op, pt, value in commands]
+
+        if on_result is not None:
+            for future in as_completed(futures):
+                on_result(future.result())
+
+        return [future.result() for future in futures]
+
+
+    def close(self):
+        self._executor.shutdown(wait=True)
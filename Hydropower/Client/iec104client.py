@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 import cmd
 import argparse
+import os
+import threading
 import time
 import c104
 
+from command_pipeline import CommandPipeline, DEFAULT_WINDOW
+from point_table import PointTable, compress_points, save_point_table, load_point_table
+from session import save_session, load_session
+
 CONNECTION_TIMEOUT = 5
 
+# Ranges up to this many IOAs are read point by point with C_RD
+READ_RANGE_LIMIT = 8
+# Seconds to wait for all points of a group interrogation to be reported
+GROUP_RESPONSE_TIMEOUT = 2
+MAX_GROUP = 16
+
 class IEC104Shell(cmd.Cmd):
     intro = "IEC-104 interactive shell.  Type help or ? to list commands.\n"
     prompt = "iec104> "
 
-    def __init__(self, host, port, ca=1, debug=False):
+    def __init__(self, host, port, ca=1, debug=False, session=None, session_file=None):
         super().__init__()
 
         self.host = host
@@ -18,19 +30,28 @@ class IEC104Shell(cmd.Cmd):
         self.casdu = ca
         self.debug = debug
 
+        # Session file written on exit, None to not save
+        self.session_file = session_file
+
+        # map IOA to c104.Type of points reported during a discover scan, None when not scanning
+        self.discovered = None
+
         # Set up initial client and connection
-        self.client = c104.Client()
-        self.conn   = self.client.add_connection(ip=host, port=port, init=c104.Init.NONE)
-        self.conn.on_unexpected_message(self._on_unexpected)
-        self.station = self.conn.add_station(common_address=ca)
+        self._create_client()
 
-        # map IOA to c104 point object
+        # map IOA to c104 point object, only for IOAs that have been used; points are also added
+        # from the c104 receive thread, so changes and loops over it hold the lock
         self.points = {}
-        # map IOA to c104 point for re-registration
-        self.point_definitions = {}
+        self._points_lock = threading.Lock()
+        # registered IOA ranges and their c104.Type
+        self.point_definitions = PointTable()
 
-        # Flag to check whether we need to rebuild connection
-        self.points_added_to_connection = False
+        # map interrogation group number to list of (start, end) IOA ranges
+        self.interrogation_groups = {}
+
+        # Register a saved session in one pass while the station is still offline
+        if session is not None:
+            self._restore_session(session)
 
         self.client.start()
 
@@ -45,6 +66,17 @@ class IEC104Shell(cmd.Cmd):
         print(f"Connected to {host}:{port}, CASDU={ca}, debug={debug_state}")
 
 
+    def _create_client(self):
+        """Create a new c104 client, connection and station with callbacks attached"""
+        self.client = c104.Client()
+        self.client.on_new_point(callable=self._on_new_point)
+        self.conn   = self.client.add_connection(
+            ip=self.host, port=self.port, init=c104.Init.NONE
+        )
+        self.conn.on_unexpected_message(self._on_unexpected)
+        self.station = self.conn.add_station(common_address=self.casdu)
+
+
     # handle unexpected incoming messages such as type ID mismatches
     def _on_unexpected(
         self,
@@ -52,9 +84,270 @@ class IEC104Shell(cmd.Cmd):
         message:    c104.IncomingMessage,
         cause:      c104.Umc
     ) -> None:
+        # During a discover scan, points registered with the wrong type are recorded with the reported type.
+        # Moving the element pointer here breaks c104's own processing, so only sequences (SQ=1, as sent
+        # in interrogation replies) are expanded to all their IOAs.
+        if self.discovered is not None and cause == c104.Umc.MISMATCHED_TYPE_ID:
+            count = message.number_of_objects if message.is_sequence else 1
+            for offset in range(count):
+                self.discovered[message.io_address + offset] = message.type
+            return
         print(f"Unexpected message from server: {cause}")
+
+
+    # handle monitoring messages for IOAs that are not registered
+    def _on_new_point(
+        self,
+        client:     c104.Client,
+        station:    c104.Station,
+        io_address: int,
+        point_type: c104.Type
+    ) -> None:
+        # c104 needs the point to exist to process the rest of the message
+        if self.discovered is not None:
+            self._define(io_address, io_address, point_type)
+            self._point(io_address)
+            self.discovered[io_address] = point_type
+        # Registered points are created on their first report
+        elif self.point_definitions.lookup(io_address) == point_type:
+            self._point(io_address)
+
+
+    def _point(self, ioa):
+        """Return the c104 point for a registered IOA, adding it to the station on first use"""
+        with self._points_lock:
+            pt = self.points.get(ioa)
+        if pt is None:
+            ptype = self.point_definitions.lookup(ioa)
+            if ptype is None:
+                return None
+            # The station is not changed under the lock, c104 may hold its own locks while calling back
+            pt = self.station.add_point(io_address=ioa, type=ptype)
+            # The receive thread may have added it first
+            if pt is None:
+                pt = self.station.get_point(io_address=ioa)
+            if pt is None:
+                print(f"[ERROR] could not add point {ioa} of type {ptype}")
+                return None
+            with self._points_lock:
+                pt = self.points.setdefault(ioa, pt)
+        return pt
+
+
+    def _point_items(self):
+        """Return a snapshot of the (IOA, point) pairs in use, safe to loop over while points are added"""
+        with self._points_lock:
+            return list(self.points.items())
+
+
+    def _define(self, start, end, ptype):
+        """Register start..end as ptype, dropping points already added with another type"""
+        self.point_definitions.add_range(start, end, ptype)
+        with self._points_lock:
+            stale = [ioa for ioa, pt in self.points.items() if start <= ioa <= end and pt.type != ptype]
+            for ioa in stale:
+                del self.points[ioa]
+        for ioa in stale:
+            self.station.remove_point(io_address=ioa)
+
+
+    def _restore_session(self, session):
+        """Register the point table, groups and last-known values of a loaded session"""
+        for start, end, ptype in session["points"]:
+            self.point_definitions.add_range(start, end, ptype)
+        for group, spans in session["groups"].items():
+            self.interrogation_groups[group] = list(spans)
+
+        # Points with a last-known value are added now so they show it until refreshed
+        restored = 0
+        for ioa, value in session["values"].items():
+            pt = self._point(ioa)
+            if pt is None or value is None:
+                continue
+            try:
+                pt.value = value
+                restored += 1
+            except (ValueError, TypeError):
+                if self.debug:
+                    print(f"[DEBUG] could not restore value {value!r} of IOA {ioa}")
+
+        print(f"Session restored: {self.point_definitions.size} points in "
+              f"{len(self.point_definitions)} ranges, {restored} values")
+
+
+    def _save_session(self, path):
+        """Write target, point table, groups and current values to path, returns True on success"""
+        values = {}
+        for ioa, pt in self._point_items():
+            value = pt.value
+            if isinstance(value, (bool, int, float)):
+                values[ioa] = value
+
+        try:
+            save_session(
+                path, self.host, self.port, self.casdu,
+                self.point_definitions.ranges(), values, self.interrogation_groups
+            )
+        except OSError as e:
+            print(f"Could not save session: {e}")
+            return False
+        return True
+
+
+    def _parse_value(self, ptype, type_name, input_value):
+        """Parse a write value for the command type, returns (value, error)"""
+        if ptype is c104.Type.C_SC_NA_1:
+            if input_value not in ("0", "1"):
+                return None, "Value for C_SC_NA_1 must be 0 or 1"
+            return bool(int(input_value)), None
+        if ptype is c104.Type.C_SE_NC_1:
+            try:
+                return float(input_value), None
+            except ValueError:
+                return None, "Value for C_SE_NC_1 must be a float"
+        return None, f"Writing to point type {type_name} not supported"
+
+
+    def _parse_command(self, line):
+        """
+        Parse a 'read <ioa> <TypeName>' or 'write <ioa> <TypeName> <value>' line.
+        Returns (op, ioa, ptype, value) or an error string.
+        """
+        parts = line.split()
+        if not parts or parts[0] not in ("read", "write"):
+            return "expected 'read' or 'write'"
+
+        op = parts[0]
+        if op == "read" and len(parts) != 3:
+            return "usage: read <ioa> <TypeName>"
+        if op == "write" and len(parts) != 4:
+            return "usage: write <ioa> <TypeName> <value>"
+
+        try:
+            ioa = int(parts[1])
+        except ValueError:
+            return "IOA must be an integer"
+
+        try:
+            ptype = getattr(c104.Type, parts[2])
+        except AttributeError:
+            return f"Unknown type: {parts[2]}"
+
+        value = None
+        if op == "write":
+            value, error = self._parse_value(ptype, parts[2], parts[3])
+            if error:
+                return error
+
+        return op, ioa, ptype, value
     
 
+    def _plan_interrogation(self, start, end):
+        """
+        Choose the cheapest way to refresh IOAs start..end.
+        Returns ("read", None), ("group", [group numbers]) or ("station", None).
+        """
+        if end - start + 1 <= READ_RANGE_LIMIT:
+            return "read", None
+
+        # Collect groups touching the range and check that they cover all of it
+        groups = []
+        covered = []
+        for group, ranges in sorted(self.interrogation_groups.items()):
+            clipped = [(max(s, start), min(e, end)) for s, e in ranges if s <= end and e >= start]
+            if clipped:
+                groups.append(group)
+                covered.extend(clipped)
+
+        next_uncovered = start
+        for s, e in sorted(covered):
+            if s > next_uncovered:
+                break
+            next_uncovered = max(next_uncovered, e + 1)
+
+        if groups and next_uncovered > end:
+            return "group", groups
+        return "station", None
+
+
+    def _read_range(self, ioas):
+        """Refresh points with pipelined C_RD reads, returns True if all succeeded"""
+        pipeline = CommandPipeline(DEFAULT_WINDOW)
+        try:
+            results = pipeline.run([("read", self._point(ioa), None) for ioa in ioas])
+        finally:
+            pipeline.close()
+        return all(r.ok for r in results)
+
+
+    def _interrogate_groups(self, groups, ioas):
+        """
+        Send group interrogations and wait until every point in ioas is reported.
+        Servers that answer groups outside their IEC stack may reply with a negative
+        confirmation and still send the data, so arrival of the points decides success.
+        """
+        # Points not added yet are added by _on_new_point when they are reported
+        before = {ioa: pt.processed_at for ioa, pt in self._point_items() if ioa in ioas}
+
+        for group in groups:
+            self.conn.interrogation(
+                common_address=self.station.common_address,
+                cause=c104.Cot.ACTIVATION,
+                qualifier=getattr(c104.Qoi, f"GROUP_{group}"),
+                wait_for_response=True
+            )
+
+        deadline = time.time() + GROUP_RESPONSE_TIMEOUT
+        pending = set(ioas)
+        while pending and time.time() < deadline:
+            pending = {
+                ioa for ioa in pending
+                if (pt := self.points.get(ioa)) is None or pt.processed_at == before.get(ioa)
+            }
+            if pending:
+                time.sleep(0.01)
+
+        if pending and self.debug:
+            print(f"[DEBUG] {len(pending)} IOAs not reported by group interrogation")
+        return not pending
+
+
+    def do_group(self, line):
+        """group <n> <start> <end>
+        declare that the server reports IOAs start..end in interrogation group n
+        usage: group 1 1100 1106"""
+        parts = line.split()
+        proceed = True
+
+        # Without arguments, list known groups
+        if not parts:
+            for group, ranges in sorted(self.interrogation_groups.items()):
+                spans = ", ".join(f"{s}-{e}" for s, e in ranges)
+                print(f"group {group}: {spans}")
+            proceed = False
+        elif len(parts) != 3:
+            print("usage: group <n> <start> <end>")
+            proceed = False
+        else:
+            try:
+                group, start, end = (int(p) for p in parts)
+            except ValueError:
+                print("Group, start and end must be integers")
+                proceed = False
+
+        if proceed and not 1 <= group <= MAX_GROUP:
+            print(f"Group must be between 1 and {MAX_GROUP}")
+            proceed = False
+
+        if proceed and start > end:
+            print("Start must not be greater than end")
+            proceed = False
+
+        if proceed:
+            self.interrogation_groups.setdefault(group, []).append((start, end))
+            print(f"IOA {start}-{end} assigned to interrogation group {group}")
+
+
     def do_interrogate(self, line):
         """interrogate <start> <end> <TypeName>
         usage: interrogate 1100 1106 M_SP_NA_1"""
@@ -84,80 +377,71 @@ class IEC104Shell(cmd.Cmd):
                 print(f"Unknown type: {type_name}")
                 proceed = False
 
-        # Check if there are new IOA points that need to be added
+        # Register the IOAs of the range that have no type yet
         if proceed:
-            new_ioas = []
-            for ioa in range(start, end + 1):
-                if ioa not in self.points:
-                    new_ioas.append(ioa)
-
-        rebuilt = False
-
-        # Rebuild link if needed to register new points
-        if proceed and new_ioas and self.points_added_to_connection:
-            if self.debug:
-                print("[DEBUG] rebuilding connection to register new IOAs…")
-            self.client.stop()
-            self.client = c104.Client()
-            self.conn   = self.client.add_connection(
-                ip=self.host, port=self.port, init=c104.Init.NONE
-            )
-            self.conn.on_unexpected_message(self._on_unexpected)
-            self.station = self.conn.add_station(common_address=self.casdu)
-
-            # Add new IOAs to definition
-            for ioa in new_ioas:
-                self.point_definitions[ioa] = ptype
-            
-            # Add all points from the definition
-            for existing_ioa, existing_type in self.point_definitions.items():
-                pt = self.station.add_point(io_address=existing_ioa, type=existing_type)
-                if pt is None:
-                    print(f"[ERROR] could not add point {existing_ioa} of type {existing_type}")
-                else:
-                    self.points[existing_ioa] = pt
-
-            self.client.start()
-            while self.conn.state != c104.ConnectionState.OPEN:
-                time.sleep(0.01)
+            for gap_start, gap_end in self.point_definitions.missing(start, end):
+                self._define(gap_start, gap_end, ptype)
+                if self.debug:
+                    print(f"[DEBUG] registered IOA {gap_start}-{gap_end} as {type_name}")
 
-            if self.debug:
-                print("[DEBUG] connection rebuilt and all points registered")
-
-            rebuilt = True
-
-        # Add new IOAs if we did not have to rebuild the connection
-        if proceed and not rebuilt and new_ioas:
-            for ioa in new_ioas:
-                pt = self.station.add_point(io_address=ioa, type=ptype)
-                if pt is None:
-                    print(f"[ERROR] could not add point {ioa} of type {ptype}")
-                else:
-                    self.points[ioa]     = pt
-                    self.point_definitions[ioa] = ptype
-                    if self.debug:
-                        print(f"[DEBUG] registered IOA {ioa} as {type_name}")
-                    self.points_added_to_connection = True
-
-        # Do interrogation
+        # Pick point reads, group interrogation or station interrogation
         if proceed:
-            ok = self.conn.interrogation(
-                common_address=self.station.common_address,
-                cause=c104.Cot.ACTIVATION,
-                qualifier=c104.Qoi.STATION,
-                wait_for_response=True
-            )
+            method, groups = self._plan_interrogation(start, end)
+            ioas = range(start, end + 1)
+            ok = False
+
+            # C_RD needs the points to exist before they are reported
+            if method == "read":
+                ioas = [ioa for ioa in ioas if self._point(ioa) is not None]
+
+            # A point not reported by the interrogation keeps the processed_at it had before
+            before = {ioa: pt.processed_at for ioa, pt in self._point_items() if start <= ioa <= end}
+
+            if method == "read":
+                if self.debug:
+                    print(f"[DEBUG] reading {len(ioas)} IOAs with C_RD")
+                ok = self._read_range(ioas)
+                if not ok:
+                    method = "station"
+
+            if method == "group":
+                if self.debug:
+                    print(f"[DEBUG] interrogating group(s) {', '.join(map(str, groups))}")
+                ok = self._interrogate_groups(groups, ioas)
+                if not ok:
+                    method = "station"
+
+            # Station interrogation is the fallback for everything else
+            if method == "station":
+                if self.debug:
+                    print("[DEBUG] interrogating station")
+                ok = self.conn.interrogation(
+                    common_address=self.station.common_address,
+                    cause=c104.Cot.ACTIVATION,
+                    qualifier=c104.Qoi.STATION,
+                    wait_for_response=True
+                )
+
             if not ok:
                 print("Interrogation failed")
                 proceed = False
 
-        # Print results from interrogation
+        # Print results from interrogation, summarising runs of IOAs that were never reported
         if proceed:
-            for ioa in range(start, end + 1):
-                pt = self.points.get(ioa)
-                if pt is None:
-                    print(f"[IOA {ioa}]: <not registered>")
-                else:
+            silent_start = None
+            for ioa in range(start, end + 2):
+                pt = self.points.get(ioa) if ioa <= end else None
+                if pt is not None and pt.processed_at == before.get(ioa):
+                    pt = None
+                if pt is None and ioa <= end:
+                    if silent_start is None:
+                        silent_start = ioa
+                    continue
+                if silent_start is not None:
+                    span = f"{silent_start}-{ioa - 1}" if ioa - 1 > silent_start else f"{silent_start}"
+                    print(f"[IOA {span}]: <no data>")
+                    silent_start = None
+                if pt is not None:
                     print(f"[IOA {ioa}]: {pt.value}")
 
 
@@ -166,7 +450,6 @@ class IEC104Shell(cmd.Cmd):
         usage: read 10010 M_ME_NC_1"""
         parts = line.split()
         proceed = True
-        rebuilt = False
 
         # Validate arguments
         if len(parts) != 2:
@@ -187,55 +470,16 @@ class IEC104Shell(cmd.Cmd):
                     print(f"Unknown type: {type_name}")
                     proceed = False
 
-        # If needed - Rebuild link to register new point
+        # Register the IOA with the given type and add its point on first use
         if proceed:
-            if ioa not in self.points and self.points_added_to_connection:
-                if self.debug:
-                    print("[DEBUG] rebuilding connection to register new IOA…")
-
-                self.client.stop()
-                self.client = c104.Client()
-                self.conn = self.client.add_connection(
-                    ip=self.host, port=self.port, init=c104.Init.NONE
-                )
-                self.conn.on_unexpected_message(self._on_unexpected)
-                self.station = self.conn.add_station(common_address=self.casdu)
-
-                # Add new IOA to definition
-                self.point_definitions[ioa] = ptype
-
-                # Add previous known points and the new point to rebuilt connection
-                for existing_ioa, existing_type in self.point_definitions.items():
-                    pt = self.station.add_point(io_address=existing_ioa, type=existing_type)
-                    if pt is None:
-                        print(f"[ERROR] could not add point {existing_ioa} of type {existing_type}")
-                    else:
-                        self.points[existing_ioa] = pt
-
-                self.client.start()
-                while self.conn.state != c104.ConnectionState.OPEN:
-                    time.sleep(0.01)
-
-                if self.debug:
-                    print("[DEBUG] connection rebuilt and all points registered")
-
-                self.points_added_to_connection = True
-                rebuilt = True
-
-            # If points are not already added, just add the point to be read
-            if not rebuilt and ioa not in self.points:
-                pt = self.station.add_point(io_address=ioa, type=ptype)
-                if pt is None:
-                    print(f"[ERROR] could not add point {ioa} of type {ptype}")
-                    proceed = False
-                else:
-                    self.points[ioa] = pt
-                    self.point_definitions[ioa] = ptype
-                    self.points_added_to_connection = True
+            if self.point_definitions.lookup(ioa) != ptype:
+                self._define(ioa, ioa, ptype)
+            pt = self._point(ioa)
+            if pt is None:
+                proceed = False
 
         # Read the point
         if proceed:
-            pt = self.points.get(ioa)
             ok = pt.read()
             if not ok:
                 print("Read failed")
@@ -251,7 +495,6 @@ class IEC104Shell(cmd.Cmd):
         usage: write 15100 C_SC_NA_1 1"""
         parts = line.split()
         proceed = True
-        rebuilt = False
 
         # Validate arguments
         if len(parts) != 3:
@@ -277,71 +520,21 @@ class IEC104Shell(cmd.Cmd):
 
             # Parse bool or float value for point type
             if proceed:
-                if ptype is c104.Type.C_SC_NA_1:
-                    if input_value not in ("0", "1"):
-                        print("Value for C_SC_NA_1 must be 0 or 1")
-                        proceed = False
-                    else:
-                        value = bool(int(input_value))
-                elif ptype is c104.Type.C_SE_NC_1:
-                    try:
-                        value = float(input_value)
-                    except ValueError:
-                        print("Value for C_SE_NC_1 must be a float")
-                        proceed = False
-                else:
-                    print(f"Writing to point type {type_name} not supported")
+                value, error = self._parse_value(ptype, type_name, input_value)
+                if error:
+                    print(error)
                     proceed = False
 
-        # If needed - Rebuild link to register new point
+        # Register the IOA with the given type and add its point on first use
         if proceed:
-            if ioa not in self.points and self.points_added_to_connection:
-                if self.debug:
-                    print("[DEBUG] rebuilding connection to register new IOA…")
-
-                self.client.stop()
-                self.client = c104.Client()
-                self.conn = self.client.add_connection(
-                    ip=self.host, port=self.port, init=c104.Init.NONE
-                )
-                self.conn.on_unexpected_message(self._on_unexpected)
-                self.station = self.conn.add_station(common_address=self.casdu)
-
-                # Add new IOA to definition
-                self.point_definitions[ioa] = ptype
-
-                # Add previous known points and the new point to rebuilt connection
-                for existing_ioa, existing_type in self.point_definitions.items():
-                    self.station.add_point(io_address=existing_ioa, type=existing_type)
-
-                self.client.start()
-                while self.conn.state != c104.ConnectionState.OPEN:
-                    time.sleep(0.01)
-                
-                if self.debug:
-                    print("[DEBUG] connection rebuilt and all points registered")
-                
-                self.points_added_to_connection = True
-                rebuilt = True
-
-                # Re-populate actual point objects
-                for existing_ioa in self.point_definitions:
-                    self.points[existing_ioa] = self.station.get_point(existing_ioa)
-
-            # If no points are previously added, just add the one for this write
-            if not rebuilt and ioa not in self.points:
-                pt = self.station.add_point(io_address=ioa, type=ptype)
-                if pt is None:
-                    print(f"[ERROR] could not add point {ioa} of type {ptype}")
-                    proceed = False
-                else:
-                    self.points[ioa] = pt
-                    self.point_definitions[ioa] = ptype
-                    self.points_added_to_connection = True
+            if self.point_definitions.lookup(ioa) != ptype:
+                self._define(ioa, ioa, ptype)
+            pt = self._point(ioa)
+            if pt is None:
+                proceed = False
 
         # Perform the write
         if proceed:
-            pt = self.points.get(ioa)
             pt.value = value
             ok = pt.transmit(cause=c104.Cot.ACTIVATION)
             if ok:
@@ -350,6 +543,92 @@ class IEC104Shell(cmd.Cmd):
                 print("Write failed")
 
 
+    def do_pipeline(self, line):
+        """pipeline <script> [window]
+        run read/write lines from a script with up to <window> commands in flight
+        usage: pipeline setpoints.txt 16"""
+        parts = line.split()
+        proceed = True
+
+        # Validate arguments
+        if len(parts) not in (1, 2):
+            print("usage: pipeline <script> [window]")
+            proceed = False
+        else:
+            script = parts[0]
+            window = DEFAULT_WINDOW
+            if len(parts) == 2:
+                try:
+                    window = int(parts[1])
+                except ValueError:
+                    print("Window must be an integer")
+                    proceed = False
+                if proceed and window < 1:
+                    print("Window must be at least 1")
+                    proceed = False
+
+        # Parse the script, skipping blank lines and comments
+        if proceed:
+            commands = []
+            # Type each IOA is first used with, a point has a single type
+            types = {}
+            try:
+                with open(script) as f:
+                    for line_no, raw in enumerate(f, start=1):
+                        raw = raw.split("#", 1)[0].strip()
+                        if not raw:
+                            continue
+                        parsed = self._parse_command(raw)
+                        if not isinstance(parsed, str):
+                            _, ioa, ptype, _ = parsed
+                            first = types.setdefault(ioa, ptype)
+                            if first != ptype:
+                                parsed = f"IOA {ioa} is used as {ptype.name}, earlier as {first.name}"
+                        if isinstance(parsed, str):
+                            print(f"{script}:{line_no}: {parsed}")
+                            proceed = False
+                        else:
+                            commands.append(parsed)
+            except OSError as e:
+                print(f"Could not read script: {e}")
+                proceed = False
+
+        # Register the IOAs the script uses with their given types, then add their points
+        if proceed:
+            definitions = {
+                ioa: ptype for _, ioa, ptype, _ in commands
+                if self.point_definitions.lookup(ioa) != ptype
+            }
+            for start, end, ptype in compress_points(definitions):
+                self._define(start, end, ptype)
+            if any(self._point(ioa) is None for _, ioa, _, _ in commands):
+                print("[ERROR] not all points in script could be registered")
+                proceed = False
+
+        # Run the commands with a bounded number in flight
+        if proceed:
+            def report(result):
+                status = "ok" if result.ok else "FAILED"
+                print(f"[{result.index}] {result.op} IOA {result.ioa}: {result.value} "
+                      f"{status} ({result.elapsed * 1000:.1f} ms)")
+
+            pipeline = CommandPipeline(window)
+            start_time = time.perf_counter()
+            try:
+                results = pipeline.run(
+                    [(op, self.points[ioa], value) for op, ioa, _, value in commands],
+                    on_result=report
+                )
+            finally:
+                pipeline.close()
+            elapsed = time.perf_counter() - start_time
+
+            failed = [r for r in results if not r.ok]
+            rate = len(results) / elapsed if elapsed > 0 else 0
+            print(f"{len(results)} commands, {len(failed)} failed, "
+                  f"{elapsed:.2f} s ({rate:.1f} cmd/s, window={window})")
+
+
     def do_register(self, line):
         """
         register <start> <end> <TypeName>
@@ -357,7 +636,6 @@ class IEC104Shell(cmd.Cmd):
         """
         parts = line.split()
         proceed = True
-        rebuilt = False
 
         # Validate arguments
         if len(parts) != 3:
@@ -379,57 +657,130 @@ class IEC104Shell(cmd.Cmd):
                     print(f"Unknown type: {type_name}")
                     proceed = False
 
-        # Rebuild link if needed to register new points
-        if proceed and self.points_added_to_connection:
-            if self.debug:
-                print("[DEBUG] rebuilding connection to register new IOAs…")
-            self.client.stop()
-            self.client = c104.Client()
-            self.conn   = self.client.add_connection(
-                ip=self.host, port=self.port, init=c104.Init.NONE
-            )
-            self.conn.on_unexpected_message(self._on_unexpected)
-            self.station = self.conn.add_station(common_address=self.casdu)
-
-            # Overwrite with new definitions and add points
-            for ioa in range(start, end + 1):
-                self.point_definitions[ioa] = ptype
-            for ioa, point_type in self.point_definitions.items():
-                self.station.add_point(io_address=ioa, type=point_type)
-                print(f"Registered IOA {ioa} as {point_type}")
-
-            self.client.start()
-            while self.conn.state != c104.ConnectionState.OPEN:
-                time.sleep(0.01)
-            
-            if self.debug:
-                print("[DEBUG] connection rebuilt and all points registered")
+        if proceed and start > end:
+            print("Error: start must not be greater than end")
+            proceed = False
+
+        # Store the range, points are added to the station when first used
+        if proceed:
+            self._define(start, end, ptype)
+            print(f"Registered IOA {start}-{end} as {type_name} ({end - start + 1} points)")
 
-            # Repopulate points list with new points
-            for ioa in self.point_definitions:
-                self.points[ioa] = self.station.get_point(ioa)
 
-            rebuilt = True
+    def do_points(self, arg):
+        """points — show registered IOA ranges"""
+        for start, end, ptype in self.point_definitions.ranges():
+            print(f"  {start}-{end} {ptype.name}")
+        print(f"{self.point_definitions.size} points in {len(self.point_definitions)} ranges, "
+              f"{len(self.points)} in use")
 
-        # Add new IOAs if we did not have to rebuild the connection
-        if proceed and not rebuilt:
-            for ioa in range(start, end + 1):
-                if ioa in self.points:
-                    print(f"[DEBUG] IOA {ioa} already registered, skipping")
-                    continue
-                pt = self.station.add_point(io_address=ioa, type=ptype)
-                if pt is None:
-                    print(f"[ERROR] could not add point {ioa} of type {type_name}")
-                else:
-                    self.points[ioa] = pt
-                    self.point_definitions[ioa] = ptype
-                    print(f"Registered IOA {ioa} as {type_name}")
-
-        # Set flag that we now have registered points to connection
+    
+    def do_discover(self, line):
+        """discover [file]
+        learn the station's point table from one station interrogation, optionally saving it
+        usage: discover points.txt"""
+        parts = line.split()
+        proceed = True
+
+        # Validate arguments
+        if len(parts) > 1:
+            print("usage: discover [file]")
+            proceed = False
+
+        # Collect every (IOA, type) reported by one station interrogation
+        if proceed:
+            before = {ioa: pt.processed_at for ioa, pt in self._point_items()}
+            self.discovered = {}
+            try:
+                ok = self.conn.interrogation(
+                    common_address=self.station.common_address,
+                    cause=c104.Cot.ACTIVATION,
+                    qualifier=c104.Qoi.STATION,
+                    wait_for_response=True
+                )
+                discovered = self.discovered
+            finally:
+                self.discovered = None
+
+            # Keep what arrived even if the interrogation was never confirmed
+            if not ok and not discovered:
+                print("Interrogation failed")
+                proceed = False
+            elif not ok:
+                print("Interrogation not confirmed, point table may be incomplete")
+
+        # Registered points only show up as updated values
         if proceed:
-            self.points_added_to_connection = True
+            for ioa, pt in self._point_items():
+                if ioa not in discovered and pt.processed_at != before.get(ioa):
+                    discovered[ioa] = pt.type
+
+            ranges = compress_points(discovered)
+            print(f"Discovered {len(discovered)} points in {len(ranges)} ranges")
+            for start, end, ptype in ranges:
+                print(f"  {start}-{end} {ptype.name}")
+
+        # Register the reported types, replacing points registered with the wrong type
+        if proceed:
+            for start, end, ptype in ranges:
+                self._define(start, end, ptype)
+
+        # Save the compact table for use with the load command
+        if proceed and parts:
+            try:
+                save_point_table(parts[0], ranges)
+                print(f"Point table saved to {parts[0]}")
+            except OSError as e:
+                print(f"Could not save point table: {e}")
+
+
+    def do_load(self, line):
+        """load <file>
+        register every range of a point table saved by discover
+        usage: load points.txt"""
+        parts = line.split()
+        proceed = True
+
+        if len(parts) != 1:
+            print("usage: load <file>")
+            proceed = False
+
+        if proceed:
+            try:
+                ranges = load_point_table(parts[0])
+            except (OSError, ValueError) as e:
+                print(f"Could not load point table: {e}")
+                proceed = False
+
+        if proceed:
+            for start, end, ptype in ranges:
+                self._define(start, end, ptype)
+            count = sum(end - start + 1 for start, end, _ in ranges)
+            print(f"Loaded {count} points in {len(ranges)} ranges")
+
+
+    def do_session(self, line):
+        """session [file]
+        save target, point table, groups and last-known values, by default to the --session file
+        usage: session station1.json"""
+        parts = line.split()
+        proceed = True
+
+        if len(parts) > 1:
+            print("usage: session [file]")
+            proceed = False
+        elif parts:
+            path = parts[0]
+        elif self.session_file:
+            path = self.session_file
+        else:
+            print("No session file given, usage: session <file>")
+            proceed = False
+
+        if proceed and self._save_session(path):
+            print(f"Session saved to {path}")
+
 
-    
     def do_list(self, arg):
         """list — show supported IEC-104 TypeNames"""
         rows = [
@@ -463,14 +814,32 @@ class IEC104Shell(cmd.Cmd):
 
     def postloop(self):
         self.client.stop()
+        if self.session_file and self._save_session(self.session_file):
+            print(f"Session saved to {self.session_file}")
         print("disconnected.")
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser(prog="iec104_shell")
-    p.add_argument("--host",  default="127.0.0.1")
-    p.add_argument("--port",  default=2404, type=int, help="IEC-104 TCP port (default: 2404)")
-    p.add_argument("--ca",    default=1,    type=int, help="CASDU common address (default: 1)")
+    p.add_argument("--host",  default=None, help="server address (default: 127.0.0.1)")
+    p.add_argument("--port",  default=None, type=int, help="IEC-104 TCP port (default: 2404)")
+    p.add_argument("--ca",    default=None, type=int, help="CASDU common address (default: 1)")
+    p.add_argument("-s", "--session", default=None,
+                   help="session file to restore on startup and save on exit")
     p.add_argument("-d", "--debug", action="store_true", help="enable debug output")
     args = p.parse_args()
 
-    IEC104Shell(args.host, args.port, ca=args.ca, debug=args.debug).cmdloop()
+    # Target from the command line, then the session, then the defaults
+    session = None
+    if args.session and os.path.exists(args.session):
+        try:
+            session = load_session(args.session)
+        except (OSError, ValueError) as e:
+            print(f"Could not load session: {e}")
+            exit(1)
+
+    saved = session or {"host": "127.0.0.1", "port": 2404, "casdu": 1}
+    host = args.host if args.host is not None else saved["host"]
+    port = args.port if args.port is not None else saved["port"]
+    ca   = args.ca   if args.ca   is not None else saved["casdu"]
+
+    IEC104Shell(host, port, ca=ca, debug=args.debug, session=session, session_file=args.session).cmdloop()
@@ -0,0 +1,155 @@
+from bisect import bisect_left, bisect_right
+
+import c104
+
+
+class PointTable:
+    """
+    Interval map from IOA to c104.Type.
+
+    Contiguous IOAs of the same type are stored as one (start, end, type)
+    interval, so memory and iteration scale with the number of ranges rather
+    than the number of addresses. Lookups are a binary search over the
+    interval starts.
+    """
+
+    def __init__(self):
+        # Parallel sorted lists of non-overlapping intervals
+        self._starts = []
+        self._ends = []
+        self._types = []
+
+
+    def __len__(self):
+        """Number of ranges"""
+        return len(self._starts)
+
+
+    def __contains__(self, ioa):
+        return self.lookup(ioa) is not None
+
+
+    @property
+    def size(self):
+        """Number of IOAs covered by all ranges"""
+        return sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+
+
+    def lookup(self, ioa):
+        """Return the type registered for ioa, or None"""
+        i = bisect_right(self._starts, ioa) - 1
+        if i >= 0 and ioa <= self._ends[i]:
+            return self._types[i]
+        return None
+
+
+    def ranges(self):
+        """Return all ranges as sorted (start, end, type) tuples"""
+        return list(zip(self._starts, self._ends, self._types))
+
+
+    def overlapping(self, start, end):
+        """Return the ranges overlapping start..end, clipped to it"""
+        i = max(bisect_right(self._starts, start) - 1, 0)
+        result = []
+        while i < len(self._starts) and self._starts[i] <= end:
+            if self._ends[i] >= start:
+                result.append((max(self._starts[i], start), min(self._ends[i], end), self._types[i]))
+            i += 1
+        return result
+
+
+    def missing(self, start, end):
+        """Return the (start, end) gaps of start..end that have no type registered"""
+        gaps = []
+        next_start = start
+        for s, e, _ in self.overlapping(start, end):
+            if s > next_start:
+                gaps.append((next_start, s - 1))
+            next_start = e + 1
+        if next_start <= end:
+            gaps.append((next_start, end))
+        return gaps
+
+
+    def add_range(self, start, end, ptype):
+        """Register start..end as ptype, replacing any overlapping registrations"""
+        if start > end:
+            raise ValueError("start is greater than end")
+
+        # Find intervals overlapping or directly adjacent to the new one
+        lo = max(bisect_left(self._ends, start - 1), 0)
+        hi = bisect_right(self._starts, end + 1)
+
+        replacement = []
+        new_start, new_end = start, end
+        for i in range(lo, hi):
+            s, e, t = self._starts[i], self._ends[i], self._types[i]
+            if t == ptype:
+                # Same type, absorb it into the new interval
+                new_start, new_end = min(new_start, s), max(new_end, e)
+            else:
+                # Other type, keep the parts outside start..end
+                if s < start:
+                    replacement.append((s, start - 1, t))
+                if e > end:
+                    replacement.append((end + 1, e, t))
+        replacement.append((new_start, new_end, ptype))
+        replacement.sort()
+
+        self._starts[lo:hi] = [s for s, _, _ in replacement]
+        self._ends[lo:hi] = [e for _, e, _ in replacement]
+        self._types[lo:hi] = [t for _, _, t in replacement]
+
+
+def compress_points(points):
+    """
+    Turn a dict of IOA to c104.Type into a sorted list of (start, end, type)
+    ranges, merging contiguous IOAs of the same type.
+    """
+    ranges = []
+    for ioa in sorted(points):
+        ptype = points[ioa]
+        if ranges and ranges[-1][1] == ioa - 1 and ranges[-1][2] == ptype:
+            start, _, _ = ranges[-1]
+            ranges[-1] = (start, ioa, ptype)
+        else:
+            ranges.append((ioa, ioa, ptype))
+    return ranges
+
+
+def save_point_table(path, ranges):
+    """Write ranges as '<start> <end> <TypeName>' lines, the syntax of the register command"""
+    with open(path, "w") as f:
+        for start, end, ptype in ranges:
+            f.write(f"{start} {end} {ptype.name}\n")
+
+
+def load_point_table(path):
+    """
+    Read a point table written by save_point_table.
+    Raises ValueError with the offending line number on malformed input.
+    """
+    ranges = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            parts = line.split()
+            if len(parts) != 3:
+                raise ValueError(f"{path}:{line_no}: expected '<start> <end> <TypeName>'")
+            try:
+                start, end = int(parts[0]), int(parts[1])
+            except ValueError:
+                raise ValueError(f"{path}:{line_no}: start and end must be integers")
+            try:
+                ptype = getattr(c104.Type, parts[2])
+            except AttributeError:
+                raise ValueError(f"{path}:{line_no}: unknown type {parts[2]}")
+            if start > end:
+                raise ValueError(f"{path}:{line_no}: start is greater than end")
+
+            ranges.append((start, end, ptype))
+    return ranges
@@ -0,0 +1,70 @@
+import json
+import os
+
+import c104
+
+SESSION_VERSION = 1
+
+
+def save_session(path, host, port, casdu, ranges, values, groups):
+    """
+    Write a session as compact JSON: target, CASDU, point table ranges,
+    last-known values by IOA and interrogation groups.
+    The file is replaced atomically so an interrupted save keeps the old session.
+    """
+    session = {
+        "version": SESSION_VERSION,
+        "host": host,
+        "port": port,
+        "casdu": casdu,
+        "points": [[start, end, ptype.name] for start, end, ptype in ranges],
+        "values": {str(ioa): value for ioa, value in sorted(values.items())},
+        "groups": {str(group): spans for group, spans in sorted(groups.items())},
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(session, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_session(path):
+    """
+    Read a session written by save_session.
+    Returns a dict with host, port, casdu, points as (start, end, c104.Type)
+    ranges, values by IOA and groups as lists of (start, end).
+    Raises ValueError on malformed input.
+    """
+    with open(path) as f:
+        try:
+            session = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+
+    if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+        raise ValueError(f"{path}: not a version {SESSION_VERSION} session file")
+
+    try:
+        points = []
+        for start, end, type_name in session["points"]:
+            try:
+                ptype = getattr(c104.Type, type_name)
+            except AttributeError:
+                raise ValueError(f"{path}: unknown type {type_name}")
+            if start > end:
+                raise ValueError(f"{path}: start is greater than end in range {start}-{end}")
+            points.append((int(start), int(end), ptype))
+
+        return {
+            "host": str(session["host"]),
+            "port": int(session["port"]),
+            "casdu": int(session["casdu"]),
+            "points": points,
+            "values": {int(ioa): value for ioa, value in session.get("values", {}).items()},
+            "groups": {
+                int(group): [(int(s), int(e)) for s, e in spans]
+                for group, spans in session.get("groups", {}).items()
+            },
+        }
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"{path}: malformed session ({e})")
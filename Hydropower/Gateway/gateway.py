@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+IEC 104 data gateway.
+
+Holds one connection to an outstation, caches the latest point values and
+publishes the changes to any number of viewers, as JSON lines over TCP and as
+WebSocket text messages for browsers. Commands from viewers are forwarded to the
+outstation one at a time. The outstation sees one client, however many viewers
+are connected.
+
+    python3 gateway.py --host 192.168.1.100
+    python3 ../HMI/main.py --gateway 127.0.0.1:8104
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+
+import c104
+
+from websocket import MAX_REQUEST_BYTES, OPCODE_TEXT, handshake_response, encode_frame, read_message
+
+DEFAULT_HOST_IP = '127.0.0.1'
+DEFAULT_PORT = 2404
+DEFAULT_TIMEOUT = 5
+CASDU = 1
+
+# Viewers connect here, JSON lines over TCP and WebSocket, on the loopback interface by default
+DEFAULT_LISTEN_IP = '127.0.0.1'
+DEFAULT_VIEWER_PORT = 8104
+DEFAULT_WEBSOCKET_PORT = 8105
+
+# Interval for publishing the changed values to the viewers
+PUBLISH_INTERVAL_S = 0.1
+
+# Interval between integrity interrogations, the only interrogations besides the one at connect
+INTEGRITY_INTERVAL_S = 60
+
+# A viewer with more unsent bytes than this is skipped and sent a snapshot once it catches up
+MAX_BUFFERED_BYTES = 256 * 1024
+
+# Longest command line accepted from a viewer
+MAX_LINE_BYTES = 4096
+
+# Points of the hydropower station, as registered by the HMI
+SP_IOAS = (1100, 1101, 1102, 1103, 1104, 1105, 1106)
+ANALOG_IOAS = (10010, 10011, 10012, 10013)
+COMMAND_IOAS = (15100, 15101, 15102, 15103, 15104, 15105, 15106)
+
+
+class Subscriber:
+    """A connected viewer and how messages are framed for it."""
+
+    def __init__(self, writer, websocket=False):
+        self.writer = writer
+        self.websocket = websocket
+        # A new viewer, or one that fell behind, starts from the full cache
+        self.needs_snapshot = True
+
+
+    def send(self, text):
+        if self.websocket:
+            self.writer.write(encode_frame(text, OPCODE_TEXT))
+        else:
+            self.writer.write(text.encode('utf-8') + b'\n')
+
+
+    def is_behind(self):
+        return self.writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES
+
+
+class Gateway:
+    """
+    The c104 callbacks store received values under a lock, keeping the latest per IOA.
+    Everything else runs on one asyncio loop: every PUBLISH_INTERVAL_S the values that
+    differ from the cache are merged into it and sent to all viewers as one delta
+    message. Viewers that do not read fast enough are not queued for; they are skipped
+    and get a snapshot of the cache when they catch up, so memory stays bounded.
+    Interrogations and commands block until the outstation answers and run on one
+    worker thread, in order.
+    """
+
+    def __init__(self, host, port, common_address, timeout):
+        self.common_address = common_address
+
+        self.cache = {}
+        self.connected = False
+        self.subscribers = set()
+
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        # Outstation requests are sent one at a time from this thread
+        self.outstation = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="Gateway-Outstation")
+
+        self.client = c104.Client(command_timeout_ms=timeout * 1000)
+        # The connection interrogates the station whenever it opens or reopens
+        self.conn = self.client.add_connection(ip=host, port=port, init=c104.Init.INTERROGATION)
+        station = self.conn.add_station(common_address=common_address)
+        for ioa in SP_IOAS:
+            station.add_point(io_address=ioa, type=c104.Type.M_SP_NA_1).on_receive(callable=self.on_point_receive)
+        for ioa in ANALOG_IOAS:
+            station.add_point(io_address=ioa, type=c104.Type.M_ME_NC_1).on_receive(callable=self.on_point_receive)
+        self.command_points = {ioa: station.add_point(io_address=ioa, type=c104.Type.C_SC_NA_1)
+                               for ioa in COMMAND_IOAS}
+
+
+    def on_point_receive(
+        self,
+        point:         c104.Point,
+        previous_info: c104.Information,
+        message:       c104.IncomingMessage
+    ) -> c104.ResponseState:
+        with self._lock:
+            self._pending[point.io_address] = point.value
+        return c104.ResponseState.SUCCESS
+
+
+    async def run(self, listen_ip, viewer_port, websocket_port):
+        self.client.start()
+        viewers = await asyncio.start_server(self.handle_viewer, listen_ip, viewer_port, limit=MAX_LINE_BYTES)
+        browsers = await asyncio.start_server(self.handle_websocket, listen_ip, websocket_port)
+        print(f"Gateway for {self.conn.ip}:{self.conn.port} listening on {listen_ip}:{viewer_port} "
+              f"and WebSocket {listen_ip}:{websocket_port}")
+
+        async with viewers, browsers:
+            await asyncio.gather(self.publish_periodically(), self.integrity_check_periodically())
+
+
+    def stop(self):
+        self.outstation.shutdown(wait=False, cancel_futures=True)
+        self.client.stop()
+
+
+    async def publish_periodically(self):
+        while True:
+            self.publish()
+            await asyncio.sleep(PUBLISH_INTERVAL_S)
+
+
+    def publish(self):
+        with self._lock:
+            received, self._pending = self._pending, {}
+
+        delta = {ioa: value for ioa, value in received.items() if self.cache.get(ioa) != value}
+        self.cache.update(delta)
+
+        connected = self.is_connected()
+        state_changed = connected != self.connected
+        self.connected = connected
+
+        now = time.time()
+        update = None
+        if delta or state_changed:
+            message = {'t': now, 'points': delta}
+            if state_changed:
+                message['connected'] = connected
+            update = json.dumps(message)
+        snapshot = None
+
+        for subscriber in list(self.subscribers):
+            if subscriber.writer.is_closing():
+                self.subscribers.discard(subscriber)
+            elif subscriber.is_behind():
+                subscriber.needs_snapshot = True
+            elif subscriber.needs_snapshot:
+                if snapshot is None:
+                    snapshot = json.dumps({'t': now, 'snapshot': True, 'connected': connected, 'points': self.cache})
+                subscriber.send(snapshot)
+                subscriber.needs_snapshot = False
+            elif update is not None:
+                subscriber.send(update)
+
+
+    def is_connected(self):
+        """Return True if the outstation connection is open and transfers data."""
+        state = self.conn.state
+        if state == c104.ConnectionState.OPEN_MUTED:
+            # c104 can leave an open connection muted, sending STARTDT activates its data transfer
+            self.conn.unmute()
+        return state == c104.ConnectionState.OPEN
+
+
+    async def integrity_check_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(INTEGRITY_INTERVAL_S)
+            if self.is_connected():
+                await loop.run_in_executor(self.outstation, self.interrogate)
+
+
+    def interrogate(self):
+        if not self.conn.interrogation(common_address=self.common_address):
+            print("Integrity interrogation failed or timed out")
+
+
+    def write_bool(self, ioa, value):
+        point = self.command_points[ioa]
+        point.value = bool(value)
+        return point.transmit(cause=c104.Cot.ACTIVATION)
+
+
+    async def handle_command(self, subscriber, text):
+        """Forward a command {"id": n, "command": IOA, "value": bool} and answer {"ack": n, "ok": bool}."""
+        try:
+            request = json.loads(text)
+            command_id, ioa, value = request['id'], int(request['command']), bool(request['value'])
+        except (ValueError, KeyError, TypeError):
+            print(f"Ignoring malformed viewer message: {text[:80]!r}")
+            return
+
+        if ioa not in self.command_points:
+            ok = False
+        else:
+            ok = await asyncio.get_running_loop().run_in_executor(self.outstation, self.write_bool, ioa, value)
+        subscriber.send(json.dumps({'ack': command_id, 'ok': ok}))
+
+
+    async def handle_viewer(self, reader, writer):
+        subscriber = Subscriber(writer)
+        self.subscribers.add(subscriber)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await self.handle_command(subscriber, line.decode('utf-8', 'replace'))
+        except (ConnectionError, ValueError) as e:
+            print(f"Viewer disconnected: {e}")
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+
+    async def handle_websocket(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            response = handshake_response(request) if len(request) <= MAX_REQUEST_BYTES else None
+            if response is None:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                return
+            writer.write(response)
+
+            subscriber = Subscriber(writer, websocket=True)
+            self.subscribers.add(subscriber)
+            try:
+                while True:
+                    message = await read_message(reader, writer)
+                    if message is None:
+                        break
+                    opcode, payload = message
+                    if opcode == OPCODE_TEXT:
+                        await self.handle_command(subscriber, payload.decode('utf-8', 'replace'))
+            finally:
+                self.subscribers.discard(subscriber)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError) as e:
+            print(f"Browser disconnected: {e}")
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IEC 104 data gateway - Hydropower Plant")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST_IP, help='Outstation IP address')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='Outstation port number')
+    parser.add_argument('--ca', type=int, default=CASDU, help=f'CASDU common address (default: {CASDU})')
+    parser.add_argument('-t', '--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help=f'Command and interrogation timeout in seconds (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--listen', type=str, default=DEFAULT_LISTEN_IP,
+                        help=f'Address viewers connect to (default: {DEFAULT_LISTEN_IP})')
+    parser.add_argument('--viewer-port', type=int, default=DEFAULT_VIEWER_PORT,
+                        help=f'Port for JSON lines viewers such as the HMI (default: {DEFAULT_VIEWER_PORT})')
+    parser.add_argument('--websocket-port', type=int, default=DEFAULT_WEBSOCKET_PORT,
+                        help=f'Port for WebSocket viewers (default: {DEFAULT_WEBSOCKET_PORT})')
+    args = parser.parse_args()
+
+    gateway = Gateway(args.host, args.port, args.ca, args.timeout)
+    try:
+        asyncio.run(gateway.run(args.listen, args.viewer_port, args.websocket_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import base64
+import hashlib
+import struct
+
+# Appended to the client key for the Sec-WebSocket-Accept header, from RFC 6455
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# Largest message accepted from a browser, commands are a few dozen bytes
+MAX_MESSAGE_BYTES = 65536
+
+# Longest HTTP upgrade request accepted
+MAX_REQUEST_BYTES = 8192
+
+
+def handshake_response(request):
+    """
+    Return the HTTP response to a WebSocket upgrade request, given as bytes up to the
+    blank line, or None if it is not a valid upgrade request.
+    """
+    lines = request.decode('latin-1').split('\r\n')
+    if not lines[0].startswith('GET '):
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        name, separator, value = line.partition(':')
+        if separator:
+            headers[name.strip().lower()] = value.strip()
+
+    key = headers.get('sec-websocket-key')
+    if key is None or headers.get('upgrade', '').lower() != 'websocket':
+        return None
+
+    accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+    return ("HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('ascii')
+
+
+def encode_frame(payload, opcode=OPCODE_TEXT):
+    """Return one unmasked, unfragmented frame, as sent from a server."""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def unmask(payload, mask):
+    """XOR the payload with the 4 byte mask of a client frame, as one big integer operation."""
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+async def read_frame(reader):
+    """Read one frame from an asyncio stream, returning (fin, opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    fin = bool(first & 0x80)
+    opcode = first & 0x0F
+
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"WebSocket frame of {length} bytes is too long")
+
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = unmask(payload, mask)
+    return fin, opcode, payload
+
+
+async def read_message(reader, writer):
+    """
+    Read the next text or binary message, answering pings on the way. Returns
+    (opcode, payload), or None when the client closes the connection.
+    """
+    message_opcode, parts, size = None, [], 0
+    while True:
+        fin, opcode, payload = await read_frame(reader)
+
+        # Control frames may arrive between the fragments of a message
+        if opcode == OPCODE_CLOSE:
+            writer.write(encode_frame(payload[:2], OPCODE_CLOSE))
+            return None
+        if opcode == OPCODE_PING:
+            writer.write(encode_frame(payload, OPCODE_PONG))
+            continue
+        if opcode == OPCODE_PONG:
+            continue
+
+        if opcode != OPCODE_CONTINUATION:
+            message_opcode, parts, size = opcode, [], 0
+        parts.append(payload)
+        size += len(payload)
+        if size > MAX_MESSAGE_BYTES:
+            raise ValueError(f"WebSocket message of more than {MAX_MESSAGE_BYTES} bytes")
+        if fin:
+            return message_opcode, b''.join(parts)
@@ -0,0 +1,143 @@
+import collections
+import queue
+import threading
+import time
+
+import c104
+
+# Interrogations waiting to be sent, requests beyond this are refused
+REQUEST_QUEUE_SIZE = 1
+
+# How often the worker checks for stop while idle
+IDLE_POLL_S = 0.5
+
+# Round trip times kept of the latest confirmed interrogations
+ROUND_TRIP_HISTORY = 100
+
+
+class UpdateQueue:
+    """
+    Thread-safe queue of point updates that keeps only the latest value per IOA.
+    Producers never block, and a slow consumer gets one value per point instead
+    of a backlog of stale ones. A source time can be given along with a value, for
+    measuring how old the displayed values are.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._times = {}
+
+
+    def put(self, ioa, value, source_time=None):
+        with self._lock:
+            self._values[ioa] = value
+            if source_time is not None:
+                self._times[ioa] = source_time
+
+
+    def latest(self, ioa, default=None):
+        """Return the pending value of an IOA without taking it, or default."""
+        with self._lock:
+            return self._values.get(ioa, default)
+
+
+    def take(self, times=None):
+        """
+        Return and remove all pending updates as a dict of IOA to value. The source times
+        of the updates are added to the dict times, if given.
+        """
+        with self._lock:
+            values, self._values = self._values, {}
+            pending_times, self._times = self._times, {}
+        if times is not None:
+            times.update(pending_times)
+        return values
+
+
+class AcquisitionWorker:
+    """
+    One persistent thread sending interrogations for the HMI.
+
+    request() queues an interrogation without blocking. Requests are refused while
+    REQUEST_QUEUE_SIZE are already queued or in flight, so a slow server cannot
+    pile up overlapping interrogations. The answers arrive through the point
+    callbacks, the worker only sends the command and waits for its confirmation
+    or the client command timeout.
+    """
+
+    def __init__(self, connection, common_address):
+        self.connection = connection
+        self.common_address = common_address
+
+        self.requests = queue.Queue(maxsize=REQUEST_QUEUE_SIZE)
+
+        # Requests queued or in flight, and the start time of the one in flight
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.in_flight_since = None
+
+        # Counters for refused requests and failed or timed out interrogations
+        self.refused = 0
+        self.failed = 0
+
+        # Seconds from sending an interrogation to its confirmation, newest last
+        self.round_trips = collections.deque(maxlen=ROUND_TRIP_HISTORY)
+
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HMI-Acquisition")
+        self.thread.start()
+
+
+    def request(self, qualifier=c104.Qoi.STATION):
+        """Queue an interrogation, returning False if one is already pending."""
+        with self._lock:
+            if self.pending >= REQUEST_QUEUE_SIZE:
+                self.refused += 1
+                return False
+            self.pending += 1
+        self.requests.put_nowait(qualifier)
+        return True
+
+
+    def busy(self):
+        """Return True while an interrogation is queued or in flight."""
+        with self._lock:
+            return self.pending > 0
+
+
+    def stop(self):
+        self._stop.set()
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                qualifier = self.requests.get(timeout=IDLE_POLL_S)
+            except queue.Empty:
+                continue
+
+            self.in_flight_since = time.monotonic()
+
+            try:
+                # Blocks until the server confirms or the client command timeout expires
+                ok = self.connection.interrogation(
+                    common_address=self.common_address,
+                    cause=c104.Cot.ACTIVATION,
+                    qualifier=qualifier,
+                    wait_for_response=True
+                )
+            except Exception as e:
+                print(f"Error during interrogation: {e}")
+                ok = False
+
+            duration = time.monotonic() - self.in_flight_since
+            with self._lock:
+                self.in_flight_since = None
+                self.pending -= 1
+
+            if ok:
+                self.round_trips.append(duration)
+            else:
+                self.failed += 1
+                print(f"Interrogation failed after {duration:.1f}s")
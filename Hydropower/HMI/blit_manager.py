@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+
+from matplotlib.transforms import Bbox
+
+# Pixels added around artist extents to cover edges and antialiasing
+BLIT_PADDING = 3
+
+
+class BlitManager:
+    """
+    Partial redraw of a few changing artists on an otherwise static figure.
+
+    The managed artists are marked animated, so full draws leave them out. After
+    every full draw (startup, resize, expose) the figure is cached as background.
+    update() restores the cached background, draws only the managed artists and
+    blits the region they cover now or covered on the previous update.
+    """
+
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.figure = canvas.figure
+        self.artists = list(artists)
+        self._background = None
+        # Region covered by the artists on the last update
+        self._last_extent = None
+
+        for artist in self.artists:
+            artist.set_animated(True)
+
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+
+    def _on_draw(self, event):
+        """Cache the static background after a full draw and put the artists back on top."""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.figure.draw_artist(artist)
+
+
+    def _extent(self):
+        """Return the padded display area covered by the visible artists, or None."""
+        boxes = [artist.get_window_extent() for artist in self.artists if artist.get_visible()]
+        if not boxes:
+            return None
+        return Bbox.union(boxes).padded(BLIT_PADDING)
+
+
+    def update(self):
+        """Redraw the managed artists, falling back to a full draw until a background is cached."""
+        if self._background is None:
+            self.canvas.draw()
+            self._last_extent = self._extent()
+            return
+
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+
+        # Blit where the artists are now and where they were, so moved or hidden artists are cleared
+        extent = self._extent()
+        boxes = [box for box in (extent, self._last_extent) if box is not None]
+        if boxes:
+            self.canvas.blit(Bbox.union(boxes))
+        self._last_extent = extent
+
+
+    @contextmanager
+    def including_artists(self):
+        """Include the managed artists in full draws, for saving the figure in a vector format."""
+        self.canvas.mpl_disconnect(self._cid)
+        for artist in self.artists:
+            artist.set_animated(False)
+        try:
+            yield
+        finally:
+            for artist in self.artists:
+                artist.set_animated(True)
+            self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
@@ -0,0 +1,217 @@
+import collections
+import queue
+import threading
+import time
+
+import c104
+
+# Commands waiting to be sent, further commands are refused until the outstation catches up
+COMMAND_QUEUE_SIZE = 16
+
+# How often the worker checks for stop while idle
+IDLE_POLL_S = 0.5
+
+# How long a confirmed command waits for an activation termination, outstations need not send one
+TERMINATION_TIMEOUT_S = 30
+
+# Command states, a command ends in one of the final states
+QUEUED = 'queued'
+SENT = 'sent'
+CONFIRMED = 'confirmed'    # ACT_CON positive, the outstation accepted the command
+TERMINATED = 'terminated'  # ACT_TERM, the outstation finished executing it
+REFUSED = 'refused'        # ACT_CON negative
+TIMED_OUT = 'timed out'    # no ACT_CON within the command timeout
+FAILED = 'failed'          # not sent, no connection or the queue was full
+EXPIRED = 'expired'        # waited longer than the command timeout in the queue, not sent
+FAILED_STATES = {REFUSED, TIMED_OUT, FAILED, EXPIRED}
+
+# Incoming APDU fields, the ASDU follows the 6 byte APCI
+TYPE_ID_POSITION = 6
+COT_POSITION = 8
+IOA_POSITION = 12
+IOA_LENGTH = 3
+COT_CAUSE_MASK = 0x3F
+COT_NEGATIVE = 0x40
+COT_ACTIVATION_CON = 7
+COT_ACTIVATION_TERMINATION = 10
+
+# Type identifications of the commands sent, C_SC_NA_1 and C_SE_NC_1
+COMMAND_TYPE_IDS = {45, 50}
+
+
+class Command:
+    """A command and its state, updated by the CommandService."""
+
+    def __init__(self, ioa, value, setpoint, on_update):
+        self.ioa = ioa
+        self.value = value
+        self.setpoint = setpoint
+        self.on_update = on_update
+        self.state = QUEUED
+        self.submitted_at = time.monotonic()
+        self.confirmed_at = None
+
+
+    @property
+    def pending(self):
+        """True until the command was confirmed or failed."""
+        return self.state in (QUEUED, SENT)
+
+
+    def __repr__(self):
+        kind = 'setpoint' if self.setpoint else 'command'
+        return f"<{kind} IOA {self.ioa} = {self.value} {self.state}>"
+
+
+class CommandService:
+    """
+    One persistent thread sending commands for the HMI, so the Tk thread never waits
+    for an outstation.
+
+    submit() queues a command and returns at once. The worker sends the commands one
+    at a time with transmit(command), which blocks until the activation confirmation
+    or the command timeout. Commands that waited in the queue for longer than the
+    timeout are dropped instead of sent late. on_receive_raw() follows the incoming
+    APDUs of the connection to tell a negative confirmation from a timeout and to see
+    activation terminations.
+
+    State changes are collected on the worker and c104 threads, and dispatch() calls
+    the on_update callbacks of the commands on the Tk thread.
+    """
+
+    def __init__(self, transmit, timeout):
+        self.transmit = transmit
+        self.timeout = timeout
+
+        self.commands = queue.Queue(maxsize=COMMAND_QUEUE_SIZE)
+
+        self._lock = threading.Lock()
+        # Commands queued or in flight, oldest first
+        self._pending = []
+        # IOAs with a negative confirmation for the command in flight
+        self._negative = set()
+        # Confirmed commands waiting for their activation termination, by IOA
+        self._confirmed = {}
+
+        # Commands whose state changed since the last dispatch
+        self._changed = collections.deque()
+
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HMI-Commands")
+        self.thread.start()
+
+
+    def submit(self, ioa, value, setpoint=False, on_update=None):
+        """Queue a single command, or a float setpoint, and return it."""
+        command = Command(ioa, value, setpoint, on_update)
+        with self._lock:
+            try:
+                self.commands.put_nowait(command)
+            except queue.Full:
+                print(f"Command for IOA {ioa} refused, {COMMAND_QUEUE_SIZE} commands are waiting")
+                self._set_state(command, FAILED)
+                return command
+            self._pending.append(command)
+        return command
+
+
+    def pending_value(self, ioa):
+        """Return the value of the newest queued or in flight command for an IOA, or None."""
+        with self._lock:
+            for command in reversed(self._pending):
+                if command.ioa == ioa:
+                    return command.value
+        return None
+
+
+    def stop(self):
+        self._stop.set()
+
+
+    def dispatch(self):
+        """Call the on_update callbacks of the commands that changed state, on the calling thread."""
+        now = time.monotonic()
+        with self._lock:
+            # Most outstations do not terminate single commands, stop waiting for it
+            for ioa, command in list(self._confirmed.items()):
+                if now - command.confirmed_at > TERMINATION_TIMEOUT_S:
+                    del self._confirmed[ioa]
+
+        # Each callback sees the latest state once, states passed between two dispatches are skipped
+        updated = set()
+        while self._changed:
+            command = self._changed.popleft()
+            if command.on_update is not None and id(command) not in updated:
+                updated.add(id(command))
+                try:
+                    command.on_update(command)
+                except Exception as e:
+                    print(f"Error in command callback: {e}")
+
+
+    def on_receive_raw(self, connection: c104.Connection, data: bytes) -> None:
+        # Called on the c104 thread for every incoming APDU, only command responses are of interest
+        if len(data) < IOA_POSITION + IOA_LENGTH or data[TYPE_ID_POSITION] not in COMMAND_TYPE_IDS:
+            return
+
+        cause = data[COT_POSITION] & COT_CAUSE_MASK
+        ioa = int.from_bytes(data[IOA_POSITION:IOA_POSITION + IOA_LENGTH], 'little')
+        with self._lock:
+            if cause == COT_ACTIVATION_CON and data[COT_POSITION] & COT_NEGATIVE:
+                self._negative.add(ioa)
+            elif cause == COT_ACTIVATION_TERMINATION:
+                command = self._confirmed.pop(ioa, None)
+                if command is not None:
+                    self._set_state(command, TERMINATED)
+
+
+    def _set_state(self, command, state):
+        command.state = state
+        self._changed.append(command)
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                command = self.commands.get(timeout=IDLE_POLL_S)
+            except queue.Empty:
+                continue
+
+            if time.monotonic() - command.submitted_at > self.timeout:
+                print(f"Command for IOA {command.ioa} dropped after waiting {self.timeout}s to be sent")
+                self._finish(command, EXPIRED)
+                continue
+
+            with self._lock:
+                self._negative.discard(command.ioa)
+                self._set_state(command, SENT)
+            start = time.monotonic()
+
+            try:
+                # Blocks until the outstation confirms or the client command timeout expires
+                ok = self.transmit(command)
+            except Exception as e:
+                print(f"Error sending command for IOA {command.ioa}: {e}")
+                ok = None
+
+            if ok:
+                state = CONFIRMED
+            elif ok is None:
+                state = FAILED
+            elif command.ioa in self._negative:
+                state = REFUSED
+            elif time.monotonic() - start >= self.timeout:
+                state = TIMED_OUT
+            else:
+                # Refused without a confirmation from the outstation seen here, by the client or the gateway
+                state = FAILED
+            self._finish(command, state)
+
+
+    def _finish(self, command, state):
+        with self._lock:
+            self._pending.remove(command)
+            if state == CONFIRMED:
+                command.confirmed_at = time.monotonic()
+                self._confirmed[command.ioa] = command
+            self._set_state(command, state)
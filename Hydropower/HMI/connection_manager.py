@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+
+import c104
+
+# Wait before the first reconnect attempt, doubled after every failed attempt up to the maximum
+INITIAL_BACKOFF_S = 1
+MAX_BACKOFF_S = 30
+
+# Waits are varied by up to this fraction, so HMIs that lost the same outstation do not retry in step
+BACKOFF_JITTER = 0.2
+
+# How often the connection state is checked
+POLL_S = 0.1
+
+# Connection states shown by the HMI
+CONNECTING = 'connecting'
+CONNECTED = 'connected'
+WAITING = 'waiting'
+
+
+class ConnectionManager:
+    """
+    Connects the c104 client from a background thread and reconnects it when the
+    connection is lost, so the HMI never waits for the outstation.
+
+    An attempt starts the client and waits up to the timeout for the connection to
+    open. A failed attempt, or a lost connection, stops the client again and the next
+    attempt follows after a backoff that doubles up to MAX_BACKOFF_S. The client is
+    stopped between attempts because c104 otherwise retries every second on its own.
+    on_connected is called on the manager thread each time the connection opens.
+    """
+
+    def __init__(self, client, connection, timeout, on_connected):
+        self.client = client
+        self.connection = connection
+        self.timeout = timeout
+        self.on_connected = on_connected
+
+        self.state = CONNECTING
+        # Failed attempts since the connection was last open, and when the next one starts
+        self.attempts = 0
+        self.retry_at = None
+
+        # Starting and stopping the client is not interleaved with stop()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HMI-Connection")
+        self.thread.start()
+
+
+    def is_connected(self):
+        return self.connection.state == c104.ConnectionState.OPEN
+
+
+    def retry_in(self):
+        """Seconds until the next attempt while waiting, else None."""
+        retry_at = self.retry_at
+        if self.state != WAITING or retry_at is None:
+            return None
+        return max(0, retry_at - time.monotonic())
+
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            self.client.stop()
+
+
+    def _run(self):
+        backoff = INITIAL_BACKOFF_S
+        while not self._stop.is_set():
+            self.state = CONNECTING
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self.client.start()
+
+            if self._wait_until_open():
+                self.state = CONNECTED
+                self.attempts = 0
+                backoff = INITIAL_BACKOFF_S
+                try:
+                    self.on_connected()
+                except Exception as e:
+                    print(f"Error after connecting: {e}")
+
+                while not self._stop.is_set() and self.connection.is_connected:
+                    self._stop.wait(POLL_S)
+                if self._stop.is_set():
+                    return
+                print(f"Connection to {self.connection.ip}:{self.connection.port} lost")
+            else:
+                self.attempts += 1
+                print(f"Cannot connect to {self.connection.ip}:{self.connection.port}, "
+                      f"attempt {self.attempts}, retrying in {backoff}s")
+
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self.client.stop()
+
+            wait = backoff * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+            self.retry_at = time.monotonic() + wait
+            self.state = WAITING
+            self._stop.wait(wait)
+            backoff = min(backoff * 2, MAX_BACKOFF_S)
+
+
+    def _wait_until_open(self):
+        deadline = time.monotonic() + self.timeout
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            state = self.connection.state
+            if state == c104.ConnectionState.OPEN:
+                return True
+            if state == c104.ConnectionState.OPEN_MUTED:
+                # The client does not always activate the data transfer of a connection opened without init
+                self.connection.unmute()
+            self._stop.wait(POLL_S)
+        return False
@@ -0,0 +1,307 @@
+import functools
+import tkinter as tk
+
+from colors import HPHMI
+from commands import FAILED_STATES
+
+# Dialog dimensions and position
+DIALOG_X_POSITION = 935
+DIALOG_Y_POSITION = 514
+DIALOG_WIDTH = 362
+DIALOG_HEIGHT = 106
+
+# Dialog position on Raspberry Pi OS
+PIOS_DIALOG_X_POSITION = 775
+PIOS_DIALOG_Y_POSITION = 505
+
+INPUT_LOW_LIMIT = 0
+INPUT_HIGH_LIMIT = 1024
+
+POPUP_WIDTH = 1280
+POPUP_HEIGHT = 720
+
+SCHEMATIC_IMAGE = "assets/Hydropower_overview_updated.PNG"
+
+
+@functools.lru_cache(maxsize=None)
+def load_schematic():
+    """Decode the schematic image once, Pillow is only imported when the popup is first opened."""
+    from PIL import Image
+    with Image.open(SCHEMATIC_IMAGE) as image:
+        image.load()
+        return image
+
+class ControlDialogs:
+    """
+    Tk dialogs and the schematic popup of the button view, shared by the matplotlib
+    and Tk canvas renderers. Expects `controller` and `canvas_widget` attributes.
+    """
+
+    def _setup_dialogs(self, os):
+        # Update location of popup dialog for PIOS
+        if os == "PIOS":
+            self.dialog_x, self.dialog_y = PIOS_DIALOG_X_POSITION, PIOS_DIALOG_Y_POSITION
+        else:
+            self.dialog_x, self.dialog_y = DIALOG_X_POSITION, DIALOG_Y_POSITION
+
+        # Last values passed to update_labels, shown as soon as the popup opens
+        self.label_values = None
+
+        # The schematic popup is built on its first opening and hidden instead of destroyed when closed
+        self.popup = None
+
+
+    def _on_button_click_set_value(self, event, title, prompt, addr):
+        # Display the custom input dialog and get the user input
+        self.input_dialog(title, prompt)
+        self.canvas_widget.master.wait_window(self.dialog_window)  # Wait until the dialog is closed
+        user_input = self.result
+
+        if user_input is not None:
+            try:
+                user_input = int(user_input)
+                if INPUT_LOW_LIMIT <= user_input <= INPUT_HIGH_LIMIT:
+                    # The result of the write is reported when the outstation answers
+                    self.controller.write_float(addr, user_input, on_update=self._on_command_update)
+                else:
+                    self.error_dialog("Input out of range.")
+
+            except ValueError:
+                self.error_dialog("Invalid input.")
+
+
+    def _on_toggle_button_click(self, event, title, prompt, addr):
+        # Display the toggle dialog
+        self.toggle_dialog(title, prompt)
+        self.canvas_widget.master.wait_window(self.dialog_window)  # Wait until the dialog is closed
+        confirmed = self.result
+
+        if confirmed:
+            # Toggled from the latest value when the command is queued, the dialog closes without waiting
+            self.controller.toggle_bool(addr, on_update=self._on_command_update)
+
+
+    def _on_command_update(self, command):
+        # Called on the Tk thread when the state of a command changes, only failures are shown
+        if command.state in FAILED_STATES:
+            self.error_dialog(f"Register write {command.state}.")
+
+
+    def input_dialog(self, title, prompt):
+        self.dialog_window = tk.Toplevel(self.canvas_widget.master)
+        self.dialog_window.geometry(f"{DIALOG_WIDTH}x{DIALOG_HEIGHT}+{self.dialog_x}+{self.dialog_y}")
+        self.dialog_window.title(title)
+
+        # Set the column weights. The center columns (1 and 2) have higher weights.
+        self.dialog_window.grid_columnconfigure(0, weight=1)
+        self.dialog_window.grid_columnconfigure(1, weight=2)
+        self.dialog_window.grid_columnconfigure(2, weight=2)
+        self.dialog_window.grid_columnconfigure(3, weight=1)
+
+        label = tk.Label(self.dialog_window, text=prompt)
+        label.grid(row=0, column=1, columnspan=2, pady=5)
+
+        self.entry = tk.Entry(self.dialog_window, width=15)
+        self.entry.grid(row=1, column=1, columnspan=2, pady=0)
+
+        submit_button = tk.Button(self.dialog_window, text="Apply", command=self.submit_input)
+        submit_button.grid(row=2, column=1, padx=5, pady=10, sticky=tk.E)
+
+        cancel_button = tk.Button(self.dialog_window, text="Cancel", command=self.cancel_window)
+        cancel_button.grid(row=2, column=2, padx=5, pady=10, sticky=tk.W)
+
+        # Bind the close window action (clicking the 'X' button) to the close_window method
+        self.dialog_window.protocol("WM_DELETE_WINDOW", self.close_window)
+
+
+    def toggle_dialog(self, title, prompt):
+        self.dialog_window = tk.Toplevel(self.canvas_widget.master)
+        self.dialog_window.geometry(f"{DIALOG_WIDTH}x{DIALOG_HEIGHT}+{self.dialog_x}+{self.dialog_y}")
+        self.dialog_window.title(title)
+
+        # Set the column weights. The center columns (1 and 2) have higher weights.
+        self.dialog_window.grid_columnconfigure(0, weight=1)
+        self.dialog_window.grid_columnconfigure(1, weight=2)
+        self.dialog_window.grid_columnconfigure(2, weight=2)
+        self.dialog_window.grid_columnconfigure(3, weight=1)
+
+        label = tk.Label(self.dialog_window, text=prompt)
+        label.grid(row=0, column=1, columnspan=2, pady=15)
+
+        confirm_button = tk.Button(self.dialog_window, text="Confirm", command=self.confirm_toggle)
+        confirm_button.grid(row=1, column=1, padx=5, pady=10, sticky=tk.E)
+
+        cancel_button = tk.Button(self.dialog_window, text="Cancel", command=self.cancel_window)
+        cancel_button.grid(row=1, column=2, padx=5, pady=10, sticky=tk.W)
+
+        # Bind the close window action (clicking the 'X' button) to the close_window method
+        self.dialog_window.protocol("WM_DELETE_WINDOW", self.close_window)
+
+
+    def submit_input(self):
+        self.result = self.entry.get()
+        self.dialog_window.destroy()
+
+
+    def cancel_window(self):
+        self.result = None
+        self.dialog_window.destroy()
+
+
+    def confirm_toggle(self):
+        self.result = True
+        self.dialog_window.destroy()
+
+
+    def error_dialog(self, message):
+        error_window = tk.Toplevel(self.canvas_widget.master)
+        error_window.geometry(f"{DIALOG_WIDTH}x{DIALOG_HEIGHT}+{self.dialog_x}+{self.dialog_y}")
+        error_window.title("ERROR")
+
+        label = tk.Label(error_window, text=message)
+        label.pack(pady=15)
+
+        ok_button = tk.Button(error_window, text="OK", command=error_window.destroy, width=12)
+        ok_button.pack(pady=10)
+
+
+    def close_window(self):
+        self.result = None
+        self.dialog_window.destroy()
+
+
+    def show_image_popup(self, event):
+        if self.popup is not None and self.popup.winfo_exists():
+            self.popup.deiconify()
+            self.popup.lift()
+            return
+        self._build_image_popup()
+
+
+    def _build_image_popup(self):
+        from PIL import ImageTk
+
+        # Create a top-level window
+        self.popup = tk.Toplevel()
+        self.popup.title("Hydropower Generation Plant Schematic")
+        self.popup.geometry(f"{POPUP_WIDTH}x{POPUP_HEIGHT}")
+        self.popup.protocol("WM_DELETE_WINDOW", self.popup.withdraw)
+
+        # Display the image
+        photo = ImageTk.PhotoImage(load_schematic())
+        label = tk.Label(self.popup, image=photo)
+        label.image = photo  # Keep a reference to avoid garbage collection
+        label.pack()
+
+        # Create labels for displaying numbers on the image
+        self.value_labels = {
+            "intake_gate": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "main_inlet_valve": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "excite_breaker": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "transformer_breaker_upper": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "transformer_breaker_lower": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "grid_breaker": tk.Label(self.popup, text="Load", bg=HPHMI.gray, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "turbine_speed": tk.Label(self.popup, text="Load", bg=HPHMI.white, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "generator_voltage": tk.Label(self.popup, text="Load", bg=HPHMI.white, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "grid_power": tk.Label(self.popup, text="Load", bg=HPHMI.white, fg=HPHMI.dark_blue,
+                                font=("Arial", 14, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+            "bearing_temperature": tk.Label(self.popup, text="Load", bg=HPHMI.white, fg=HPHMI.dark_blue,
+                                font=("Arial", 12, "bold"), highlightbackground=HPHMI.dark_gray,
+                                highlightcolor=HPHMI.dark_gray, highlightthickness=2, padx=6, pady=4),
+        }
+        
+        # Position the labels on the image
+        self.value_labels["intake_gate"].place(relx=0.26, rely=0.24, anchor="center")
+        self.value_labels["main_inlet_valve"].place(relx=0.53, rely=0.89, anchor="center")
+        self.value_labels["excite_breaker"].place(relx=0.695, rely=0.74, anchor="center")
+        self.value_labels["transformer_breaker_upper"].place(relx=0.54, rely=0.285, anchor="center")
+        self.value_labels["transformer_breaker_lower"].place(relx=0.54, rely=0.575, anchor="center")
+        self.value_labels["grid_breaker"].place(relx=0.54, rely=0.195, anchor="center")
+        
+        self.value_labels["turbine_speed"].place(relx=0.67, rely=0.84, anchor="center")
+        self.value_labels["generator_voltage"].place(relx=0.645, rely=0.465, anchor="center")
+        self.value_labels["grid_power"].place(relx=0.625, rely=0.07, anchor="center")
+        self.value_labels["bearing_temperature"].place(relx=0.635, rely=0.79, anchor="center")
+
+        # Add a close button
+        close_button = tk.Button(self.popup, text="Close Window", command=self.popup.withdraw, 
+                                 font=("Arial", 12), padx=25, pady=5)
+        close_button.place(relx=0.5, rely=0.95, anchor="center")
+
+        # Labels are only updated when values change, so show the latest ones whenever the popup is mapped
+        self.popup.bind("<Map>", self._on_popup_map)
+
+
+    def _on_popup_map(self, event):
+        # Child widgets report their own Map events through the toplevel binding
+        if event.widget is self.popup and self.label_values is not None:
+            self._set_labels(*self.label_values)
+
+
+    def update_labels(self, water_in, exc_sw, tr_sw, grid_sw, turb_speed, bear_temp, gen_vol, grid_pwr):
+        self.label_values = (water_in, exc_sw, tr_sw, grid_sw, turb_speed, bear_temp, gen_vol, grid_pwr)
+
+        # Ensure that the update occurs only if the popup window is open and visible
+        if self.popup is not None and self.popup.winfo_exists() and self.popup.winfo_viewable():
+            self._set_labels(*self.label_values)
+
+
+    def _set_labels(self, water_in, exc_sw, tr_sw, grid_sw, turb_speed, bear_temp, gen_vol, grid_pwr):
+        if water_in:
+            self.value_labels['intake_gate']['text'] = "OPEN"
+            self.value_labels['intake_gate']['bg'] = HPHMI.white
+            self.value_labels['main_inlet_valve']['text'] = "OPEN"
+            self.value_labels['main_inlet_valve']['bg'] = HPHMI.white
+        else:
+            self.value_labels['intake_gate']['text'] = "CLOSED"
+            self.value_labels['intake_gate']['bg'] = HPHMI.dark_gray
+            self.value_labels['main_inlet_valve']['text'] = "CLOSED"
+            self.value_labels['main_inlet_valve']['bg'] = HPHMI.dark_gray
+
+        if exc_sw:
+            self.value_labels['excite_breaker']['text'] = "CLOSED"
+            self.value_labels['excite_breaker']['bg'] = HPHMI.white
+        else:
+            self.value_labels['excite_breaker']['text'] = "OPEN"
+            self.value_labels['excite_breaker']['bg'] = HPHMI.dark_gray
+
+        if tr_sw:
+            self.value_labels['transformer_breaker_upper']['text'] = "CLOSED"
+            self.value_labels['transformer_breaker_upper']['bg'] = HPHMI.white
+            self.value_labels['transformer_breaker_lower']['text'] = "CLOSED"
+            self.value_labels['transformer_breaker_lower']['bg'] = HPHMI.white
+        else:
+            self.value_labels['transformer_breaker_upper']['text'] = "OPEN"
+            self.value_labels['transformer_breaker_upper']['bg'] = HPHMI.dark_gray
+            self.value_labels['transformer_breaker_lower']['text'] = "OPEN"
+            self.value_labels['transformer_breaker_lower']['bg'] = HPHMI.dark_gray
+
+        if grid_sw:
+            self.value_labels['grid_breaker']['text'] = "CLOSED"
+            self.value_labels['grid_breaker']['bg'] = HPHMI.white
+        else:
+            self.value_labels['grid_breaker']['text'] = "OPEN"
+            self.value_labels['grid_breaker']['bg'] = HPHMI.dark_gray
+
+        self.value_labels['turbine_speed']['text'] = str(turb_speed) + " RPM"
+        self.value_labels['generator_voltage']['text'] = gen_vol
+        self.value_labels["grid_power"]['text'] = grid_pwr
+        self.value_labels["bearing_temperature"]['text'] = str(bear_temp) + "°C"
+        
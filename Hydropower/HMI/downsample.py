@@ -0,0 +1,76 @@
+import numpy as np
+
+# Ways of reducing a trend to the pixel width of the plot
+METHODS = ('minmax', 'lttb')
+DEFAULT_METHOD = 'minmax'
+
+
+def minmax_envelope(times, low, high, start, end, columns):
+    """
+    Reduce samples to at most two points per pixel column: the lowest and the highest
+    value in the column. Every excursion stays visible as a vertical stroke.
+    low and high are the same array for raw samples, or bucket minimums and maximums.
+    Returns (times, values) of the line to draw.
+    """
+    if len(times) <= 2 * columns:
+        # Few enough samples to draw as they are
+        if low is high:
+            return times, low
+        return _interleave(times, times, low, high)
+
+    column_width = (end - start) / columns
+    column = np.floor((times - start) / column_width).astype(int)
+
+    # Index of the first sample in every non-empty column
+    first = np.flatnonzero(np.diff(column, prepend=column[0] - 1))
+    lows = np.minimum.reduceat(low, first)
+    highs = np.maximum.reduceat(high, first)
+
+    left = start + column[first] * column_width
+    return _interleave(left, left + column_width / 2, lows, highs)
+
+
+def _interleave(first_times, second_times, first_values, second_values):
+    times = np.empty(2 * len(first_times))
+    values = np.empty(2 * len(first_values))
+    times[0::2], times[1::2] = first_times, second_times
+    values[0::2], values[1::2] = first_values, second_values
+    return times, values
+
+
+def lttb(times, values, points):
+    """
+    Largest-Triangle-Three-Buckets: pick the sample of every bucket that forms the largest
+    triangle with the previously picked sample and the mean of the next bucket. Keeps the
+    visual shape of a smooth line with few points, but may drop short spikes.
+    Returns (times, values) with at most `points` samples.
+    """
+    count = len(times)
+    if count <= points or points < 3:
+        return times, values
+
+    # The first and last sample are always kept, the rest is split in points - 2 buckets
+    edges = np.linspace(1, count - 1, points - 1).astype(int)
+    picked = np.empty(points, dtype=int)
+    picked[0] = 0
+    picked[-1] = count - 1
+
+    previous = 0
+    for i in range(points - 2):
+        bucket_start, bucket_end = edges[i], edges[i + 1]
+
+        # Mean of the next bucket, or the last sample for the final bucket
+        next_start, next_end = bucket_end, edges[i + 2] if i + 2 < len(edges) else count
+        mean_time = times[next_start:next_end].mean()
+        mean_value = values[next_start:next_end].mean()
+
+        # Twice the triangle area for every candidate in the bucket
+        bucket_times = times[bucket_start:bucket_end]
+        bucket_values = values[bucket_start:bucket_end]
+        areas = np.abs((times[previous] - mean_time) * (bucket_values - values[previous]) -
+                       (times[previous] - bucket_times) * (mean_value - values[previous]))
+
+        previous = bucket_start + int(np.argmax(areas))
+        picked[i + 1] = previous
+
+    return times[picked], values[picked]
@@ -1,52 +1,40 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
 from matplotlib.patches import Polygon
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from colors import HPHMI
+from blit_manager import BlitManager
+from layout import (DYNAMIC_BAR_SIZE, Y_AXIS_OFFSET, BAR_WIDTH, BAR_HEIGHT, Y_AXIS_CENTER, SQUARE_SIZE,
+                    BAR1_X_AXIS_OFFSET, BAR2_X_AXIS_OFFSET, BAR3_X_AXIS_OFFSET, BAR4_X_AXIS_OFFSET,
+                    BAR1_START, BAR1_END, BAR1_MIN, BAR1_MAX, BAR2_START, BAR2_END, BAR2_MIN, BAR2_MAX,
+                    BAR3_START, BAR3_END, BAR3_MIN, BAR3_MAX, BAR4_START, BAR4_END, BAR4_MIN, BAR4_MAX,
+                    dynamic_bar_geometry, is_out_of_bounds)
 
-# Used for all bars
-Y_AXIS_OFFSET = 0.121
-BAR_HEIGHT = 0.60
-BAR_WIDTH = 0.024
-Y_AXIS_CENTER = 0.398
-
-# Individual per bar
-BAR1_X_AXIS_OFFSET = 0.08
-BAR2_X_AXIS_OFFSET = 0.29
-BAR3_X_AXIS_OFFSET = 0.48
-BAR4_X_AXIS_OFFSET = 0.68
-
-# Total bar start and end, min and max for dynamic inner bar
-BAR1_START = 0
-BAR1_END = 80
-BAR1_MIN = 15
-BAR1_MAX = 70
-
-BAR2_START = 0
-BAR2_END = 275
-BAR2_MIN = 0
-BAR2_MAX = 250
-
-BAR3_START = 2500
-BAR3_END = 3800
-BAR3_MIN = 3150
-BAR3_MAX = 3450
-
-BAR4_START = 500
-BAR4_END = 2250
-BAR4_MIN = 700
-BAR4_MAX = 2000
 
 class DynamicBar:
     def __init__(self, master):
-        self.fig, self.ax = plt.subplots(figsize=(7, 3.2))
+        self.fig = Figure(figsize=DYNAMIC_BAR_SIZE)
+        self.ax = self.fig.add_subplot()
         
         # Initial setup
         self._setup_view()
 
-        # Embed the widget
-        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
-        self.canvas_widget = self.canvas.get_tk_widget()
+        # Embed the widget, or draw off-screen with Agg without a master
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.fig)
+            self.canvas_widget = None
+        else:
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+            self.canvas_widget = self.canvas.get_tk_widget()
+
+        # Only the bars, indicators, warnings and numbers change between updates
+        self.blit_manager = BlitManager(self.canvas, [
+            self.dynamic_bar1, self.dynamic_bar2, self.dynamic_bar3, self.dynamic_bar4,
+            self.square_indicator1, self.square_indicator2, self.square_indicator3, self.square_indicator4,
+            self.warning_triangle_bar1, self.warning_triangle_bar3,
+            self.dynamic_number1, self.dynamic_number2, self.dynamic_number3, self.dynamic_number4
+        ])
 
     def _setup_view(self):
         self.ax.axis('off')
@@ -106,7 +94,7 @@ class DynamicBar:
         self.fig.patches.extend([self.dynamic_bar4])
 
         # Create square indicator bar 1
-        self.square_size = 0.017
+        self.square_size = SQUARE_SIZE
         self.square_indicator1 = Rectangle((BAR1_X_AXIS_OFFSET + 0.0136, Y_AXIS_CENTER), 
                                           self.square_size, self.square_size, angle=45, transform=self.fig.transFigure, 
                                           facecolor=HPHMI.darker_gray, edgecolor='none', clip_on=False)
@@ -187,35 +175,19 @@ class DynamicBar:
         self._display_warning(BAR1_MIN, BAR1_MAX, bearing_temp, self.warning_triangle_bar1)
         self._display_warning(BAR3_MIN, BAR3_MAX, gen_voltage, self.warning_triangle_bar3)
 
-        # Redraw canvas with changes
-        self.canvas.draw()
+        # Redraw only the changed artists over the cached background
+        self.blit_manager.update()
 
 
     def _set_value(self, min_set_point, max_set_point, set_point, bar, square, number, start, end):
-        # Calculate the start and end of the bar based on the set points
-        bar_start = start
-        bar_end = end
-        bar_range = bar_end - bar_start
-
-        # Normalize values based on the dynamic starting point and range
-        normalized_min = (min_set_point - bar_start) / bar_range
-        normalized_max = (max_set_point - bar_start) / bar_range
-        normalized_set_point = (set_point - bar_start) / bar_range
-
-        # Calculate the position and height of the dynamic bar
-        dynamic_bar_start = Y_AXIS_OFFSET + normalized_min * BAR_HEIGHT
-        dynamic_bar_height = (normalized_max - normalized_min) * BAR_HEIGHT
+        bar_y, bar_height, square_y = dynamic_bar_geometry(min_set_point, max_set_point, set_point, start, end)
 
         # Set the position and height of the dynamic bar
-        bar.set_y(dynamic_bar_start)
-        bar.set_height(dynamic_bar_height)
+        bar.set_y(bar_y)
+        bar.set_height(bar_height)
 
         # Update the y position of the square indicator
-        square_y_position = Y_AXIS_OFFSET + normalized_set_point * BAR_HEIGHT - (self.square_size / 2) - 0.007
-        
-        # Make sure the indicator is not set outside area of bar
-        square_y_position = max(0.11, min(0.705, square_y_position))
-        square.set_y(square_y_position)
+        square.set_y(square_y)
 
         # Update dynamic number
         number.set_text(str(set_point))
@@ -223,9 +195,6 @@ class DynamicBar:
 
     def _display_warning(self, min_set_point, max_set_point, set_point, triangle):
         # Check if set_point is out of bounds and display warning triangle
-        if set_point < min_set_point or set_point > max_set_point:
-            # Value needs to be different from 0 to show warning
-            if set_point > 1.0:
-                triangle.set_visible(True)
-        else:
-            triangle.set_visible(False)
+        warning = is_out_of_bounds(min_set_point, max_set_point, set_point)
+        if warning is not None:
+            triangle.set_visible(warning)
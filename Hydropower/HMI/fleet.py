@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Fleet overview HMI.
+
+Shows many hydropower plants in one sortable table with fleet KPIs. All plants are
+connected through one c104 client, and double-clicking a plant opens the detailed
+HMI panels for it in their own window.
+
+    python3 fleet.py --plants plants.csv
+    python3 fleet.py --host 127.0.0.1 -p 2404 --count 200
+"""
+
+import argparse
+import csv
+import tkinter as tk
+from tkinter import ttk
+
+import c104
+import numpy as np
+
+from colors import HPHMI
+from fleet_state import (FleetState, ANALOG_IOAS, SWITCH_IOAS, STATUS_NAMES, STATUS_WARNING, STATUS_ERROR,
+                         STATUS_NO_DATA, STATUS_OFFLINE)
+from hmi_controller import (HMIController, RENDERERS, DEFAULT_RENDERER, CASDU, INTEGRITY_INTERVAL_MS,
+                            ANA_TURBINE_SPEED, ANA_GENERATOR_VOLTAGE, ANA_GRID_POWER, ANA_BEARING_TEMP, SP_GRID_SWITCH)
+from hmi_view import HMIView
+from main import (WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, DEFAULT_HOST_IP, DEFAULT_PORT, DEFAULT_TIMEOUT,
+                  MAX_UINT16, check_ipv4_or_hostname, check_port_number, check_timeout)
+
+FLEET_WINDOW_WIDTH = 960
+FLEET_WINDOW_HEIGHT = 720
+FLEET_WINDOW_TITLE = "Fleet - IEC104 Hydropower Plants"
+
+# Interval for applying received point updates to the table and KPIs
+FLEET_REFRESH_MS = 1000
+
+# Table columns: heading, width and sort key, the name, the status or a point IOA
+COLUMNS = (
+    ('Plant', 160, 'name'),
+    ('Status', 80, 'status'),
+    ('Grid power (kW)', 120, ANA_GRID_POWER),
+    ('Generator (V)', 110, ANA_GENERATOR_VOLTAGE),
+    ('Turbine (RPM)', 110, ANA_TURBINE_SPEED),
+    ('Bearing (°C)', 100, ANA_BEARING_TEMP),
+    ('Grid switch', 90, SP_GRID_SWITCH),
+)
+
+# Decimals of the analog columns as displayed, as in the plant HMI
+ANALOG_DECIMALS = {ANA_GRID_POWER: 1, ANA_GENERATOR_VOLTAGE: 1, ANA_TURBINE_SPEED: 0, ANA_BEARING_TEMP: 1}
+
+
+def read_plants(path):
+    """
+    Read the plant list, a CSV file with one plant per line: name,host,port[,common_address].
+    Blank lines and lines starting with # are skipped. Returns (name, host, port, common_address) tuples.
+    """
+    plants = []
+    with open(path, newline='', encoding='utf-8') as file:
+        for line_number, row in enumerate(csv.reader(file), start=1):
+            if not row or not ''.join(row).strip() or row[0].lstrip().startswith('#'):
+                continue
+            try:
+                if len(row) not in (3, 4):
+                    raise ValueError("expected name,host,port[,common_address]")
+                name, host, port = (field.strip() for field in row[:3])
+                common_address = int(row[3]) if len(row) == 4 else CASDU
+                if not 1 <= common_address < MAX_UINT16:
+                    raise ValueError("common address must be between 1 and 65534")
+                plants.append((name, check_ipv4_or_hostname(host), check_port_number(port), common_address))
+            except (ValueError, argparse.ArgumentTypeError) as e:
+                raise ValueError(f"{path} line {line_number}: {e}")
+
+    if len({(host, port, common_address) for name, host, port, common_address in plants}) < len(plants):
+        raise ValueError(f"{path}: a station is listed more than once")
+    return plants
+
+
+class FleetClient:
+    """
+    One c104 client with a connection per server, shared by the plants at that server
+    as stations with their own common address. Every connection interrogates its
+    stations when it opens or reopens, later values arrive as spontaneous updates.
+    """
+
+    def __init__(self, plants, state, timeout):
+        self.state = state
+        self.client = c104.Client(command_timeout_ms=timeout * 1000)
+
+        connections = {}
+        self.stations = []
+        self._plant_index = {}
+        for plant, (name, host, port, common_address) in enumerate(plants):
+            connection = connections.get((host, port))
+            if connection is None:
+                connection = self.client.add_connection(ip=host, port=port, init=c104.Init.INTERROGATION)
+                connections[(host, port)] = connection
+
+            station = connection.add_station(common_address=common_address)
+            for ioa in SWITCH_IOAS:
+                station.add_point(io_address=ioa, type=c104.Type.M_SP_NA_1).on_receive(callable=self.on_point_receive)
+            for ioa in ANALOG_IOAS:
+                station.add_point(io_address=ioa, type=c104.Type.M_ME_NC_1).on_receive(callable=self.on_point_receive)
+
+            self.stations.append((connection, common_address))
+            self._plant_index[(connection.ip, connection.port, common_address)] = plant
+        self.connections = list(connections.values())
+
+
+    def start(self):
+        self.client.start()
+
+
+    def stop(self):
+        self.client.stop()
+
+
+    def on_point_receive(
+        self,
+        point:         c104.Point,
+        previous_info: c104.Information,
+        message:       c104.IncomingMessage
+    ) -> c104.ResponseState:
+        # Called on the c104 threads, the values are applied on the Tk thread
+        station = point.station
+        connection = station.connection
+        plant = self._plant_index[(connection.ip, connection.port, station.common_address)]
+        self.state.put(plant, point.io_address, point.value)
+        return c104.ResponseState.SUCCESS
+
+
+    def connected(self):
+        """
+        Return whether the connection of each plant is open. A muted connection is not,
+        no data flows on it, and it is unmuted.
+        """
+        for connection in self.connections:
+            if connection.state == c104.ConnectionState.OPEN_MUTED:
+                # The client does not always activate the data transfer of a connection it opened
+                connection.unmute()
+        return np.fromiter((connection.state == c104.ConnectionState.OPEN
+                            for connection, common_address in self.stations),
+                           dtype=bool, count=len(self.stations))
+
+
+    def interrogate(self):
+        """Send a station interrogation to every connected plant without waiting for the answers."""
+        for connection, common_address in self.stations:
+            if connection.state == c104.ConnectionState.OPEN:
+                connection.interrogation(common_address=common_address, wait_for_response=False)
+
+
+class FleetView(tk.Frame):
+    """KPI line above a table with one row per plant."""
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.master = master
+        self.master.configure(bg=HPHMI.gray)
+        self.configure(bg=HPHMI.gray)
+        self.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        self.kpi_label = tk.Label(self, anchor='w', justify=tk.LEFT, bg=HPHMI.gray, fg=HPHMI.black,
+                                  font=('Arial', 11))
+        self.kpi_label.pack(fill=tk.X, pady=(0, 10))
+
+        style = ttk.Style(self)
+        style.configure('Fleet.Treeview', background=HPHMI.light_gray, fieldbackground=HPHMI.light_gray,
+                        foreground=HPHMI.black)
+
+        self.tree = ttk.Treeview(self, columns=[str(i) for i in range(len(COLUMNS))], show='headings',
+                                 selectmode='browse', style='Fleet.Treeview')
+        for i, (heading, width, key) in enumerate(COLUMNS):
+            self.tree.column(str(i), width=width, anchor='w' if i == 0 else 'e')
+        self.tree.tag_configure('warning', background=HPHMI.yellow)
+        self.tree.tag_configure('error', background=HPHMI.red, foreground=HPHMI.white)
+        self.tree.tag_configure('offline', foreground=HPHMI.dark_gray)
+
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+
+class FleetController:
+    """
+    Keeps the fleet table and KPIs up to date and opens the plant HMI on demand.
+
+    Every refresh applies the received values to the FleetState matrices, finds the
+    rows whose displayed values changed with array comparisons and only updates those
+    rows. Rows are only moved when their position in the sort order changed.
+    """
+
+    def __init__(self, view, plants, timeout, os, renderer=DEFAULT_RENDERER):
+        self.view = view
+        self.plants = plants
+        self.timeout = timeout
+        self.os = os
+        self.renderer = renderer
+
+        self.state = FleetState([name for name, host, port, common_address in plants])
+        self.client = FleetClient(plants, self.state, timeout)
+
+        # Rounded values and status as last displayed, NaN for rows never displayed
+        self.shown_analog = np.full(self.state.analog.shape, np.nan)
+        self.shown_switches = np.zeros(self.state.switches.shape, dtype=bool)
+        self.shown_status = np.full(len(plants), -1)
+        self.row_order = np.arange(len(plants))
+        self.sort_key, self.sort_descending = 'status', True
+        self.kpi_text = None
+
+        # Plant HMI windows open, by plant index
+        self.details = {}
+
+        tree = self.view.tree
+        for i, (heading, width, key) in enumerate(COLUMNS):
+            tree.heading(str(i), command=lambda key=key: self.sort_by(key))
+        for plant in range(len(plants)):
+            tree.insert('', tk.END, iid=str(plant))
+        tree.bind('<Double-1>', self.open_details)
+        self.show_sort_order()
+
+        self.client.start()
+        self._refresh_after_id = self.view.after(FLEET_REFRESH_MS, self.refresh_periodically)
+        self._integrity_after_id = self.view.after(INTEGRITY_INTERVAL_MS, self.integrity_check_periodically)
+
+        self.view.master.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+
+    def refresh_periodically(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error during data processing: {e}")
+        self._refresh_after_id = self.view.after(FLEET_REFRESH_MS, self.refresh_periodically)
+
+
+    def integrity_check_periodically(self):
+        self.client.interrogate()
+        self._integrity_after_id = self.view.after(INTEGRITY_INTERVAL_MS, self.integrity_check_periodically)
+
+
+    def refresh(self):
+        self.state.apply()
+        self.state.connected[:] = self.client.connected()
+        status = self.state.status()
+
+        analog = np.column_stack([np.round(self.state.column(ioa), ANALOG_DECIMALS[ioa]) for ioa in ANALOG_IOAS])
+        both_unknown = np.isnan(analog) & np.isnan(self.shown_analog)
+        changed = (np.any((analog != self.shown_analog) & ~both_unknown, axis=1)
+                   | np.any(self.state.switches != self.shown_switches, axis=1)
+                   | (status != self.shown_status))
+
+        for plant in np.flatnonzero(changed):
+            self.view.tree.item(str(plant), values=self.row_values(plant, analog[plant], status[plant]),
+                                tags=self.row_tags(status[plant]))
+        self.shown_analog = analog
+        self.shown_switches = self.state.switches.copy()
+        self.shown_status = status
+
+        if changed.any():
+            self.reorder(status)
+
+        kpis = self.state.kpis(status)
+        hottest = ', '.join(f"{name} {temperature:.1f} °C" for name, temperature in kpis['hottest']) or '-'
+        kpi_text = (f"Online {kpis['online']}/{kpis['plants']}    Generating {kpis['generating']}    "
+                    f"Total grid power {kpis['total_grid_power']:.0f} kW    "
+                    f"In error {kpis['errors']}    Warnings {kpis['warnings']}\n"
+                    f"Hottest bearings: {hottest}")
+        if kpi_text != self.kpi_text:
+            self.view.kpi_label.configure(text=kpi_text)
+            self.kpi_text = kpi_text
+
+
+    def row_values(self, plant, analog, status):
+        """Return the table values of a plant from its rounded analogs, in the order of COLUMNS."""
+        values = []
+        for heading, width, key in COLUMNS:
+            if key == 'name':
+                values.append(self.state.names[plant])
+            elif key == 'status':
+                values.append(STATUS_NAMES[status])
+            elif key == SP_GRID_SWITCH:
+                values.append('Closed' if self.state.column(SP_GRID_SWITCH)[plant] else 'Open')
+            else:
+                value = analog[ANALOG_IOAS.index(key)]
+                values.append('' if np.isnan(value) else f"{value:.{ANALOG_DECIMALS[key]}f}")
+        return values
+
+
+    @staticmethod
+    def row_tags(status):
+        if status in (STATUS_OFFLINE, STATUS_NO_DATA):
+            return ('offline',)
+        if status == STATUS_ERROR:
+            return ('error',)
+        if status == STATUS_WARNING:
+            return ('warning',)
+        return ()
+
+
+    def sort_by(self, key):
+        """Sort the table by a column, clicking the sorted column again reverses the order."""
+        if key == self.sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            # Names sort alphabetically, everything else highest first
+            self.sort_key, self.sort_descending = key, key != 'name'
+        self.show_sort_order()
+        self.reorder(self.shown_status)
+
+
+    def show_sort_order(self):
+        arrow = ' ▼' if self.sort_descending else ' ▲'
+        for i, (heading, width, key) in enumerate(COLUMNS):
+            self.view.tree.heading(str(i), text=heading + (arrow if key == self.sort_key else ''))
+
+
+    def reorder(self, status):
+        """Move the rows that changed position in the sort order."""
+        order = self.state.order(self.sort_key, status, self.sort_descending)
+        for position in np.flatnonzero(order != self.row_order):
+            self.view.tree.move(str(order[position]), '', position)
+        self.row_order = order
+
+
+    def open_details(self, event):
+        """Open the plant HMI for the double-clicked row, or raise it if already open."""
+        row = self.view.tree.identify_row(event.y)
+        if not row:
+            return
+        plant = int(row)
+        if plant in self.details:
+            self.details[plant].view.master.lift()
+            return
+
+        name, host, port, common_address = self.plants[plant]
+        if not self.state.connected[plant]:
+            print(f"{name} is offline, its HMI opens once it is connected")
+            return
+
+        window = tk.Toplevel(self.view.master)
+        window.title(f"{WINDOW_TITLE} - {name}")
+        window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
+        # The plant HMI connects on its own, so commands go to the plant as from the single plant HMI
+        controller = HMIController(view=HMIView(master=window), host=host, port=port, timeout=self.timeout,
+                                   os=self.os, renderer=self.renderer, common_address=common_address)
+        self.details[plant] = controller
+        window.bind('<Destroy>', lambda event: self.details.pop(plant, None) if event.widget is window else None)
+
+
+    def on_closing(self):
+        """Called when the fleet window is closing, closes the plant windows as well."""
+        for after_id in (self._refresh_after_id, self._integrity_after_id):
+            self.view.after_cancel(after_id)
+        for controller in list(self.details.values()):
+            controller.on_closing()
+        self.client.stop()
+        self.view.master.quit()
+        self.view.master.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet overview - IEC104 Hydropower Plants")
+
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--plants', metavar='file',
+                        help='CSV file with one plant per line: name,host,port[,common_address]')
+    source.add_argument('--host', type=check_ipv4_or_hostname, default=DEFAULT_HOST_IP,
+                        help=f'Host IP address or hostname of the plants given by --count (default: {DEFAULT_HOST_IP})')
+    parser.add_argument('-p', '--port', metavar='port_number', type=check_port_number, default=DEFAULT_PORT,
+                        help=f'TCP port of the first plant given by --count (default: {DEFAULT_PORT})')
+    parser.add_argument('--count', type=int, default=1,
+                        help='number of plants on consecutive ports from --port, without --plants (default: 1)')
+    parser.add_argument('-t', '--timeout', metavar='timeout', type=check_timeout, default=DEFAULT_TIMEOUT,
+                        help=f'set timeout in seconds (default: {DEFAULT_TIMEOUT}s)')
+    parser.add_argument('--os', default='', help='Specify the operating system (e.g., "PIOS" for Raspberry Pi OS)')
+    parser.add_argument('--renderer', choices=RENDERERS, default=DEFAULT_RENDERER,
+                        help=f'renderer of the plant HMI windows (default: {DEFAULT_RENDERER})')
+    args = parser.parse_args()
+
+    if args.plants:
+        try:
+            plants = read_plants(args.plants)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if not plants:
+            parser.error(f"no plants listed in {args.plants}")
+    else:
+        if not 1 <= args.count <= MAX_UINT16 - args.port + 1:
+            parser.error(f"--count must be between 1 and {MAX_UINT16 - args.port + 1} from port {args.port}")
+        plants = [(f"Plant {n + 1}", args.host, args.port + n, CASDU) for n in range(args.count)]
+
+    root = tk.Tk()
+    root.title(FLEET_WINDOW_TITLE)
+    root.geometry(f"{FLEET_WINDOW_WIDTH}x{FLEET_WINDOW_HEIGHT}")
+
+    view = FleetView(master=root)
+    FleetController(view=view, plants=plants, timeout=args.timeout, os=args.os, renderer=args.renderer)
+
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
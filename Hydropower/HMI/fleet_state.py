@@ -0,0 +1,156 @@
+import re
+import threading
+
+import numpy as np
+
+from hmi_controller import (SP_WATER_INLET, SP_EXCITE_SWITCH, SP_TRANSFORMER_SWITCH, SP_GRID_SWITCH,
+                            SP_COOLING_SWITCH, SP_START_PROCESS, SP_SHUTDOWN_PROCESS,
+                            ANA_TURBINE_SPEED, ANA_GENERATOR_VOLTAGE, ANA_GRID_POWER, ANA_BEARING_TEMP)
+from layout import BAR1_MIN, BAR1_MAX, BAR2_MIN, BAR2_MAX, BAR3_MIN, BAR3_MAX, BAR4_MIN, BAR4_MAX
+
+# Columns of the analog and switch state matrices
+ANALOG_IOAS = (ANA_GRID_POWER, ANA_GENERATOR_VOLTAGE, ANA_TURBINE_SPEED, ANA_BEARING_TEMP)
+SWITCH_IOAS = (SP_WATER_INLET, SP_EXCITE_SWITCH, SP_TRANSFORMER_SWITCH, SP_GRID_SWITCH,
+               SP_COOLING_SWITCH, SP_START_PROCESS, SP_SHUTDOWN_PROCESS)
+
+# Value a plant reports for all its analogs after a trip
+ERROR_FLOAT = 9999
+
+# Normal range of each analog column, the limits of the dynamic bars
+ANALOG_LOW = np.array([BAR4_MIN, BAR3_MIN, BAR2_MIN, BAR1_MIN])
+ANALOG_HIGH = np.array([BAR4_MAX, BAR3_MAX, BAR2_MAX, BAR1_MAX])
+
+# Plant status, in order of severity
+STATUS_OK = 0
+STATUS_WARNING = 1
+STATUS_ERROR = 2
+STATUS_NO_DATA = 3  # connected, but no values received yet
+STATUS_OFFLINE = 4
+STATUS_NAMES = ('OK', 'Warning', 'Error', 'No data', 'Offline')
+
+# Number of plants listed in the hottest bearings KPI
+HOTTEST_COUNT = 5
+
+
+class FleetState:
+    """
+    Point values of a fleet of plants as NumPy matrices, one row per plant.
+
+    put() is called from the c104 callback threads and keeps only the latest value
+    per plant and IOA, like the UpdateQueue of the single plant HMI. apply() moves
+    them into the matrices on the Tk thread, one vectorized assignment per IOA, and
+    the KPIs are computed over all plants at once, so a refresh costs the same few
+    array operations for 10 plants or 500.
+    """
+
+    def __init__(self, names):
+        self.names = np.array(names, dtype=object)
+        count = len(names)
+
+        # Unknown values are NaN until the first interrogation answers
+        self.analog = np.full((count, len(ANALOG_IOAS)), np.nan)
+        self.switches = np.zeros((count, len(SWITCH_IOAS)), dtype=bool)
+        self.connected = np.zeros(count, dtype=bool)
+
+        self._analog_columns = {ioa: column for column, ioa in enumerate(ANALOG_IOAS)}
+        self._switch_columns = {ioa: column for column, ioa in enumerate(SWITCH_IOAS)}
+
+        # Plant names sort with their numbers in numeric order, Plant 2 before Plant 10
+        self._name_order = np.array(sorted(range(count), key=lambda plant: [
+            int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', names[plant])]), dtype=int)
+
+        self._lock = threading.Lock()
+        self._pending = {}
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def put(self, plant, ioa, value):
+        with self._lock:
+            self._pending[(plant, ioa)] = value
+
+
+    def apply(self):
+        """Move the pending values into the matrices, returning the indices of the plants updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return np.empty(0, dtype=int)
+
+        plants = np.fromiter((plant for plant, ioa in pending), dtype=int, count=len(pending))
+        ioas = np.fromiter((ioa for plant, ioa in pending), dtype=int, count=len(pending))
+        values = np.fromiter(pending.values(), dtype=float, count=len(pending))
+
+        for ioa in np.unique(ioas):
+            selected = ioas == ioa
+            if ioa in self._analog_columns:
+                self.analog[plants[selected], self._analog_columns[ioa]] = values[selected]
+            elif ioa in self._switch_columns:
+                self.switches[plants[selected], self._switch_columns[ioa]] = values[selected] != 0
+        return np.unique(plants)
+
+
+    def column(self, ioa):
+        """Return the values of an analog or switch IOA for all plants."""
+        if ioa in self._analog_columns:
+            return self.analog[:, self._analog_columns[ioa]]
+        return self.switches[:, self._switch_columns[ioa]]
+
+
+    def status(self):
+        """Return the status of every plant, one of the STATUS_ values."""
+        error = np.any(self.analog == ERROR_FLOAT, axis=1)
+        # Like the dynamic bars, a value near zero is a stopped plant and not out of range
+        running = self.analog > 1.0
+        warning = np.any(running & ((self.analog < ANALOG_LOW) | (self.analog > ANALOG_HIGH)), axis=1)
+
+        status = np.full(len(self), STATUS_OK)
+        status[warning] = STATUS_WARNING
+        status[error] = STATUS_ERROR
+        status[np.all(np.isnan(self.analog), axis=1)] = STATUS_NO_DATA
+        status[~self.connected] = STATUS_OFFLINE
+        return status
+
+
+    def kpis(self, status=None):
+        """Return the fleet KPIs as a dict, from the status of every plant if already computed."""
+        if status is None:
+            status = self.status()
+        valid = (status == STATUS_OK) | (status == STATUS_WARNING)
+
+        grid_power = self.column(ANA_GRID_POWER)
+        bearing_temperature = self.column(ANA_BEARING_TEMP)
+
+        # Hottest bearings of the plants with valid values, unknown temperatures sort last
+        temperatures = np.where(valid & ~np.isnan(bearing_temperature), bearing_temperature, -np.inf)
+        count = min(HOTTEST_COUNT, len(self))
+        hottest = np.argpartition(-temperatures, count - 1)[:count] if count else np.empty(0, dtype=int)
+        hottest = hottest[np.argsort(-temperatures[hottest])]
+        hottest = hottest[np.isfinite(temperatures[hottest])]
+
+        return {
+            'plants': len(self),
+            'online': int(np.count_nonzero(self.connected)),
+            'generating': int(np.count_nonzero(valid & self.column(SP_GRID_SWITCH))),
+            'total_grid_power': float(np.nansum(np.where(valid, grid_power, np.nan))),
+            'errors': int(np.count_nonzero(status == STATUS_ERROR)),
+            'warnings': int(np.count_nonzero(status == STATUS_WARNING)),
+            'hottest': [(self.names[i], float(temperatures[i])) for i in hottest],
+        }
+
+
+    def order(self, key, status, descending=False):
+        """
+        Return the plant indices sorted by key: 'name', 'status' or the IOA of a column.
+        Unknown values sort last in both directions.
+        """
+        if key == 'name':
+            return self._name_order[::-1] if descending else self._name_order
+
+        values = (status if key == 'status' else self.column(key)).astype(float)
+        if descending:
+            values = -values
+        # NaN sorts after every number
+        return np.argsort(values, kind='stable')
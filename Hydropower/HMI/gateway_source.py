@@ -0,0 +1,134 @@
+import itertools
+import json
+import socket
+import threading
+
+# Port of the gateway for JSON lines viewers, see ../Gateway/gateway.py
+DEFAULT_GATEWAY_PORT = 8104
+
+# Wait before reconnecting to the gateway after the connection is lost
+RECONNECT_S = 1
+
+# Extra wait for a command acknowledgement, the gateway answers at the latest after its own command timeout
+ACK_MARGIN_S = 1
+
+# Longest wait of the receive thread, so stop is handled promptly
+MAX_WAIT_S = 0.1
+
+
+class GatewaySource:
+    """
+    Feeds the point values published by a gateway into an UpdateQueue from a
+    background thread, in place of a c104 connection of the HMI's own.
+
+    The gateway sends a snapshot of all cached values on connect and then the
+    changed values as they arrive. The source reconnects when the gateway goes away,
+    and counts as connected only while both the gateway and its outstation
+    connection are up. Commands are forwarded by the gateway and answered with an
+    acknowledgement, write_bool() waits for it like a c104 transmit does.
+    """
+
+    def __init__(self, host, port, updates, timeout):
+        self.host = host
+        self.port = port
+        self.updates = updates
+        self.timeout = timeout
+
+        self.sock = None
+        self.outstation_connected = False
+
+        # Commands waiting for their acknowledgement, by id
+        self._send_lock = threading.Lock()
+        self._command_ids = itertools.count(1)
+        self._acks = {}
+
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HMI-Gateway")
+        self.thread.start()
+
+
+    def is_connected(self):
+        return self.sock is not None and self.outstation_connected
+
+
+    def write_bool(self, ioa, value):
+        """Send a single command through the gateway, returning True once the outstation confirmed it."""
+        command_id = next(self._command_ids)
+        answered = threading.Event()
+        self._acks[command_id] = [answered, False]
+        try:
+            with self._send_lock:
+                if self.sock is None:
+                    print("Not connected to the gateway")
+                    return False
+                message = {'id': command_id, 'command': ioa, 'value': bool(value)}
+                self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+            if not answered.wait(self.timeout + ACK_MARGIN_S):
+                print(f"No answer from the gateway to the command for IOA {ioa}")
+            return self._acks[command_id][1]
+        except OSError as e:
+            print(f"Failed to send the command to the gateway: {e}")
+            return False
+        finally:
+            self._acks.pop(command_id, None)
+
+
+    def stop(self):
+        self._stop.set()
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            except OSError as e:
+                print(f"Cannot connect to the gateway at {self.host}:{self.port}: {e}")
+                self._stop.wait(RECONNECT_S)
+                continue
+
+            sock.settimeout(MAX_WAIT_S)
+            self.sock = sock
+            try:
+                self._receive(sock)
+            except (OSError, ValueError) as e:
+                print(f"Gateway connection lost: {e}")
+            finally:
+                with self._send_lock:
+                    self.sock = None
+                self.outstation_connected = False
+                sock.close()
+
+            if not self._stop.is_set():
+                self._stop.wait(RECONNECT_S)
+
+
+    def _receive(self, sock):
+        buffer = b''
+        while not self._stop.is_set():
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+
+            *lines, buffer = (buffer + data).split(b'\n')
+            for line in lines:
+                self._handle(json.loads(line))
+
+
+    def _handle(self, message):
+        if 'ack' in message:
+            waiting = self._acks.get(message['ack'])
+            if waiting is not None:
+                waiting[1] = bool(message['ok'])
+                waiting[0].set()
+            return
+
+        if 'connected' in message:
+            self.outstation_connected = message['connected']
+        # Values are aged from when the gateway published them
+        published = message.get('t')
+        for ioa, value in message.get('points', {}).items():
+            self.updates.put(int(ioa), value, published)
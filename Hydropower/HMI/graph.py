@@ -1,46 +1,63 @@
-import matplotlib.pyplot as plt
+import time
+
+import numpy as np
+from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
+from matplotlib.collections import PolyCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from colors import HPHMI
-
-BAR_OUTLINES = {
-    'gen_voltage': {
-        'x': 0.9439,
-        'y': 0.121,
-        'width': 0.015,
-        'height': 0.832
-    },
-    'grid_power': {
-        'x': 0.96,
-        'y': 0.121,
-        'width': 0.015,
-        'height': 0.832
-    }
-}
-
-# Constants for dynamic bars
-BASE_Y = 0.121
-BAR_SCALE = 0.832
-UPPER_BOUNDARY = 0.953
-NUMBER_OF_READINGS = 300
-
-Y_MAX = 6000
-Y_MIN = 0
-
-Y_LABEL_OFFSET = -8
-Y_LABEL_MIN = 50
-Y_LABEL_MAX = 5850
-
-class GraphView:
-    def __init__(self, master):
-        """Initialize the Matplotlib figure and axis."""
-        self.fig, self.ax = plt.subplots(figsize=(5, 3.2))
+from ring_buffer import TimedRingBuffer
+from downsample import DEFAULT_METHOD
+from trend_paging import TrendPaging, find_gaps, history_tick_labels, time_to_position
+from layout import (GRAPH_SIZE, BAR_OUTLINES, BASE_Y, MAX_TREND_SAMPLES, Y_MAX, Y_MIN,
+                    Y_LABEL_OFFSET, Y_LABEL_MIN, Y_LABEL_MAX, GRID_POWER_LABEL_X, GRID_POWER_LABEL_Y,
+                    X_TICKS, X_TICK_LABELS, range_bar_bounds, gen_voltage_text, grid_power_text)
+
+
+class RangeBar:
+    """
+    Outline and fill rectangles next to the trend showing the min to max range of a series.
+    Both are added to the figure once, updates only move the fill with set_bounds.
+    """
+    def __init__(self, fig, outline, color):
+        self.x = outline['x']
+        self.width = outline['width']
+
+        self.outline = Rectangle((outline['x'], outline['y']), outline['width'], outline['height'], 
+                                 transform=fig.transFigure, facecolor=HPHMI.gray, 
+                                 edgecolor=HPHMI.dark_gray, linewidth=1, clip_on=False)
+
+        # Empty until the first update
+        self.bar = Rectangle((self.x, BASE_Y), self.width, 0, transform=fig.transFigure, 
+                             facecolor=color, edgecolor='none', linewidth=0.5, clip_on=False)
+
+        fig.patches.extend([self.outline, self.bar])
+
+
+    def update(self, low, high):
+        """Move the fill to span low to high."""
+        rect_y, rect_height = range_bar_bounds(low, high)
+        self.bar.set_bounds(self.x, rect_y, self.width, rect_height)
+
+
+class GraphView(TrendPaging):
+    def __init__(self, master=None, trend_store=None, downsample=DEFAULT_METHOD):
+        """
+        Initialize the Matplotlib figure and axis.
+        Without a master the figure is drawn off-screen with Agg, for tests and benchmarks.
+        With a trend store, the mouse wheel pages back through the stored history.
+        """
+        self.fig = Figure(figsize=GRAPH_SIZE)
+        self.ax = self.fig.add_subplot()
         self.view_type = 'default'
         self.master = master
-        self.setup_view(master)
 
-        self.grid_power = []
-        self.gen_voltage = []
+        self.grid_power = TimedRingBuffer(MAX_TREND_SAMPLES)
+        self.gen_voltage = TimedRingBuffer(MAX_TREND_SAMPLES)
+
+        self.setup_view(master)
+        self._setup_paging(trend_store, downsample)
 
 
     def create_rectangle(self, x, y, width, height, facecolor, edgecolor, linewidth, transform=None, clip_on=False):
@@ -50,7 +67,11 @@ class GraphView:
 
 
     def setup_view(self, master):
-        """Setup the Matplotlib figure and axis."""
+        """
+        Build the figure once. The trend lines, gap markers, value labels and range bars
+        are kept as artists and only updated through set_data, set_verts, set_text and
+        set_bounds.
+        """
         # Set the figure background color
         self.fig.patch.set_facecolor(HPHMI.gray)
 
@@ -58,14 +79,19 @@ class GraphView:
         self.ax.set_facecolor(HPHMI.gray)
         
         # Set consistent intervals for the X and Y axes
-        self.ax.set_xlim(0, 300)  # Fixed at readings
+        self.ax.set_xlim(0, 300)  # Reading positions, timestamps are mapped onto them
         self.ax.set_ylim(Y_MIN, Y_MAX)
 
-        self.ax.set_xticks([0, 60, 120, 180, 240, 300])
-        self.ax.set_xticklabels(['-10','-8','-6', '-4', '-2', '10m'])
-        xticks = self.ax.get_xticklabels()
-        xticks[-1].set_color(HPHMI.dark_green)
-        xticks[-1].set_weight('bold')
+        self.ax.set_xticks(X_TICKS)
+        self._set_x_tick_labels(X_TICK_LABELS, live=True)
+
+        # Trend lines, empty until the first reading
+        self.gen_voltage_line, = self.ax.plot([], [], "-o", color=HPHMI.dark_blue, markersize=1)
+        self.grid_power_line, = self.ax.plot([], [], "-o", color=HPHMI.brown, markersize=1)
+
+        # Light bands behind the grid where readings are missing, empty until a gap
+        self.gap_markers = PolyCollection([], facecolors=HPHMI.light_gray, edgecolors='none', zorder=0.5)
+        self.ax.add_collection(self.gap_markers, autolim=False)
         
         # Generator voltage label
         self.ax.set_ylabel("0\nGen\nVoltage\n(V)", rotation=0, labelpad=20, va='center', 
@@ -73,10 +99,8 @@ class GraphView:
         
         # Grid power label
         grid_power_label_text = f"0\n Power \nProd\n(kW)"
-        x_position = -29
-        y_position = 1200
         
-        self.ax.text(x_position, y_position, grid_power_label_text, 
+        self.grid_power_label = self.ax.text(GRID_POWER_LABEL_X, GRID_POWER_LABEL_Y, grid_power_label_text, 
             rotation=0, ha='center', va='center',
             bbox=dict(facecolor='none', edgecolor=HPHMI.brown, boxstyle='square', linewidth=2))
 
@@ -93,175 +117,124 @@ class GraphView:
         y_label_max.set_color(HPHMI.dark_green)
         y_label_max.set_weight('bold')
 
-        # Outline bar for gen_voltage
-        voltage_gen_outline = self.create_rectangle(BAR_OUTLINES['gen_voltage']['x'], 
-                                                    BAR_OUTLINES['gen_voltage']['y'], 
-                                                    BAR_OUTLINES['gen_voltage']['width'], 
-                                                    BAR_OUTLINES['gen_voltage']['height'], 
-                                                    HPHMI.gray, HPHMI.dark_gray, 1)
-
-        
-        # Outline bar for grid_power
-        grid_power_outline = self.create_rectangle(BAR_OUTLINES['grid_power']['x'], 
-                                                   BAR_OUTLINES['grid_power']['y'], 
-                                                   BAR_OUTLINES['grid_power']['width'], 
-                                                   BAR_OUTLINES['grid_power']['height'], 
-                                                   HPHMI.gray, HPHMI.dark_gray, 1)
-
-        self.fig.patches.extend([voltage_gen_outline, grid_power_outline])
+        # Bars showing the min to max range of each trend
+        self.voltage_gen_bar = RangeBar(self.fig, BAR_OUTLINES['gen_voltage'], HPHMI.dark_blue)
+        self.grid_power_bar = RangeBar(self.fig, BAR_OUTLINES['grid_power'], HPHMI.brown)
 
-        plt.setp(self.ax.spines.values(), color=HPHMI.dark_gray)
+        for spine in self.ax.spines.values():
+            spine.set_color(HPHMI.dark_gray)
 
         # Use faint grid lines
         self.ax.grid(color=HPHMI.dark_gray, linestyle='--', linewidth=0.5, alpha=1)
 
-        # Embed the Matplotlib figure into the Tkinter window
-        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
-        self.canvas_widget = self.canvas.get_tk_widget()
-        self.canvas_widget.grid(row=0, column=0, columnspan=4, rowspan=8, pady=20, padx=20)
+        # Embed the Matplotlib figure into the Tkinter window, or draw off-screen without one
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.fig)
+            self.canvas_widget = None
+        else:
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+            self.canvas_widget = self.canvas.get_tk_widget()
+            self.canvas_widget.grid(row=0, column=0, columnspan=4, rowspan=8, pady=20, padx=20)
 
         # Add an outline box around the entire figure
         outline_box = Rectangle((0, 0), 1, 1, transform=self.fig.transFigure, 
                                 facecolor='none', edgecolor=HPHMI.dark_gray, linewidth=2, clip_on=False)
         self.fig.patches.extend([outline_box])
 
+        # Layout is computed once, the labels keep the same number of lines when updated
         self.fig.tight_layout()
 
 
-    def update_graph(self, gen_voltage_data, grid_power_data):
-        """Updates the graph with the provided readings."""
-        
-        self.gen_voltage.append(gen_voltage_data)
-        self.grid_power.append(grid_power_data)
+    def _set_x_tick_labels(self, labels, live):
+        self.ax.set_xticklabels(labels)
+        xticks = self.ax.get_xticklabels()
+        # The last tick is now in the live trend, or the end time of a history window
+        xticks[-1].set_color(HPHMI.dark_green if live else HPHMI.darker_gray)
+        xticks[-1].set_weight('bold')
 
-        # Ensure only the last 300 readings are kept
-        if len(self.grid_power) > NUMBER_OF_READINGS:
-            self.grid_power.pop(0)
-        if len(self.gen_voltage) > NUMBER_OF_READINGS:
-            self.gen_voltage.pop(0)
 
-        # Find the minimum and maximum values
-        gen_voltage_min = min(self.gen_voltage)
-        gen_voltage_max = max(self.gen_voltage)
-        grid_power_min = min(self.grid_power)
-        grid_power_max = max(self.grid_power)
+    def plot_columns(self):
+        """Return the width of the plot area in pixels."""
+        return round(self.ax.get_window_extent().width)
 
-        self.ax.set_ylim(Y_MIN, Y_MAX)
-        y_range = Y_MAX - Y_MIN
 
-        normalized_min_in = (gen_voltage_min - Y_MIN) / y_range
-        normalized_max_in = (gen_voltage_max - Y_MIN) / y_range
+    def _redraw(self):
+        # Off-screen canvases draw immediately on draw_idle, so they are drawn by the caller instead
+        if self.canvas_widget is not None:
+            self.canvas.draw_idle()
 
-        normalized_min_out = (grid_power_min - Y_MIN) / y_range
-        normalized_max_out = (grid_power_max - Y_MIN) / y_range
 
-        # Clamp normalized values between 0 and 1
-        normalized_min_in = min(max(normalized_min_in, 0), 1)
-        normalized_max_in = min(max(normalized_max_in, 0), 1)
+    def update_graph(self, gen_voltage_data, grid_power_data, t=None):
+        """Updates the graph with the readings taken at time t, now by default."""
+        
+        # The buffers keep the readings of the last TREND_WINDOW_S seconds
+        trend_changed = self._append_readings(gen_voltage_data, grid_power_data, time.time() if t is None else t)
 
-        normalized_min_out = min(max(normalized_min_out, 0), 1)
-        normalized_max_out = min(max(normalized_max_out, 0), 1)
+        # Readings are collected while history is shown or drawing is paused, and drawn when returning
+        if not self.is_live() or self.paused:
+            return
 
-        # Use the normalized values to set the height and starting point of the colored rectangle
-        rect_height_in = normalized_max_in - normalized_min_in
-        rect_y_in = BASE_Y + normalized_min_in * BAR_SCALE
+        # Skip the redraw when neither the trends nor the value labels would look different
+        if (not trend_changed and gen_voltage_text(gen_voltage_data) == self.ax.yaxis.label.get_text() 
+                and grid_power_text(grid_power_data) == self.grid_power_label.get_text()):
+            return
 
-        rect_height_out = normalized_max_out - normalized_min_out
-        rect_y_out = BASE_Y + normalized_min_out * BAR_SCALE
+        self._draw_live()
 
-        # For the in_voltage dynamic bar, check bar is not below the lower boundary
-        rect_y_in = max(BASE_Y, rect_y_in)
 
-        # If the top of the dynamic bar exceeds the upper boundary, adjust the height and base
-        if rect_y_in + rect_height_in * BAR_SCALE > UPPER_BOUNDARY:
-            overflow = (rect_y_in + rect_height_in * BAR_SCALE) - UPPER_BOUNDARY
-            rect_height_in -= overflow / BAR_SCALE
-            rect_y_in += overflow
+    def _draw_live(self):
+        """Draw the trend from the ring buffers."""
+        self._draw_live_lines()
 
-        # For the out_voltage dynamic bar, check bar is not below the lower boundary
-        rect_y_out = max(BASE_Y, rect_y_out)
+        # Update the value labels
+        self.ax.yaxis.label.set_text(gen_voltage_text(self.gen_voltage.last() or 0))
+        self.grid_power_label.set_text(grid_power_text(self.grid_power.last() or 0))
 
-        # If the top of the dynamic bar exceeds the upper boundary, adjust the height and base
-        if rect_y_out + rect_height_out * BAR_SCALE > UPPER_BOUNDARY:
-            overflow = (rect_y_out + rect_height_out * BAR_SCALE) - UPPER_BOUNDARY
-            rect_height_out -= overflow / BAR_SCALE
-            rect_y_out += overflow
+        # Update the bars showing the min to max range of each trend
+        if len(self.gen_voltage):
+            self.voltage_gen_bar.update(self.gen_voltage.min(), self.gen_voltage.max())
+            self.grid_power_bar.update(self.grid_power.min(), self.grid_power.max())
 
-        # Update the Matplotlib plot
-        self.ax.cla()
-        
-        # Plot the data
-        self.ax.plot(self.gen_voltage, "-o", color=HPHMI.dark_blue, markersize=1)
-        self.ax.plot(self.grid_power, "-o", color=HPHMI.brown, markersize=1)
+        # Restore the tick labels after history was shown
+        if self.ax.get_xticklabels()[-1].get_text() != X_TICK_LABELS[-1]:
+            self._set_x_tick_labels(X_TICK_LABELS, live=True)
+        self._redraw()
 
-        # Generator voltage label
-        voltage_gen_label_text = f"{round(gen_voltage_data, 1)}\nGen\nVoltage\n(V)"
-        self.ax.set_ylabel(voltage_gen_label_text, rotation=0, labelpad=20, va='center', 
-                    bbox=dict(facecolor='none', edgecolor=HPHMI.dark_blue, boxstyle='square', linewidth=2))
 
-        # Grid power label
-        grid_power_label_text = f"{round(grid_power_data, 1)}\n Power \nProd\n(kW)"
-        x_position = -29
-        y_position = 1200
-        self.ax.text(x_position, y_position, grid_power_label_text, 
-            rotation=0, ha='center', va='center',
-            bbox=dict(facecolor='none', edgecolor=HPHMI.brown, boxstyle='square', linewidth=2))
+    @staticmethod
+    def _set_line(line, positions, values, gaps):
+        # NaN breaks the line at each gap
+        line.set_data(np.insert(positions, gaps + 1, np.nan), np.insert(values, gaps + 1, np.nan))
 
-        # Hide y-axis tick lables
-        self.ax.set_yticklabels([])
 
-        # Manually add the y-labels at desired positions
-        y_label_min = self.ax.text(Y_LABEL_OFFSET, Y_LABEL_MIN, str(Y_MIN), ha='right', va='center')
-        y_label_max = self.ax.text(Y_LABEL_OFFSET, Y_LABEL_MAX, str(Y_MAX), ha='right', va='center')
+    def _draw_lines(self, start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap):
+        """Draw trend lines between start and end, broken and marked where readings are missing."""
+        gen_voltage_positions = time_to_position(gen_voltage_times, start, end)
+        gaps = find_gaps(gen_voltage_times, max_gap)
+        self._set_line(self.gen_voltage_line, gen_voltage_positions, gen_voltage, gaps)
+        self._set_line(self.grid_power_line, time_to_position(grid_power_times, start, end), grid_power,
+                       find_gaps(grid_power_times, max_gap))
 
-        # Format the y-labels
-        y_label_min.set_color(HPHMI.dark_green)
-        y_label_min.set_weight('bold')
-        y_label_max.set_color(HPHMI.dark_green)
-        y_label_max.set_weight('bold')
+        # Both signals are sampled together, the markers follow the generator voltage
+        self.gap_markers.set_verts([[(x0, Y_MIN), (x0, Y_MAX), (x1, Y_MAX), (x1, Y_MIN)]
+                                    for x0, x1 in zip(gen_voltage_positions[gaps], gen_voltage_positions[gaps + 1])])
 
-        # Set x-ticks to represent elapsed time
-        self.ax.set_xticks([0, 60, 120, 180, 240, 300])
-        self.ax.set_xticklabels(['-10','-8','-6', '-4', '-2', '10m'])
 
-        # Set rightmost x-tick to describe the x-axis
-        xticks = self.ax.get_xticklabels()
-        xticks[-1].set_color(HPHMI.dark_green)
-        xticks[-1].set_weight('bold')
+    def _draw_history(self, start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap):
+        """Draw stored trend lines between start and end."""
+        self._draw_lines(start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap)
 
-        # Outline bar for gen_voltage
-        voltage_gen_outline = self.create_rectangle(BAR_OUTLINES['gen_voltage']['x'], 
-                                                    BAR_OUTLINES['gen_voltage']['y'], 
-                                                    BAR_OUTLINES['gen_voltage']['width'], 
-                                                    BAR_OUTLINES['gen_voltage']['height'], 
-                                                    HPHMI.gray, HPHMI.dark_gray, 1)
-
-        # Inner bar representing the input voltage data range
-        voltage_gen_bar = self.create_rectangle(BAR_OUTLINES['gen_voltage']['x'], 
-                                               rect_y_in, 
-                                               BAR_OUTLINES['gen_voltage']['width'], 
-                                               rect_height_in * BAR_OUTLINES['gen_voltage']['height'], 
-                                               HPHMI.dark_blue, 'none', 0.5)
-
-        # Outline bar for grid_power
-        grid_power_outline = self.create_rectangle(BAR_OUTLINES['grid_power']['x'], 
-                                                   BAR_OUTLINES['grid_power']['y'], 
-                                                   BAR_OUTLINES['grid_power']['width'], 
-                                                   BAR_OUTLINES['grid_power']['height'], 
-                                                   HPHMI.gray, HPHMI.dark_gray, 1)
-
-        # Inner bar representing the output voltage data range
-        grid_power_bar = self.create_rectangle(BAR_OUTLINES['grid_power']['x'], 
-                                                rect_y_out, 
-                                                BAR_OUTLINES['grid_power']['width'], 
-                                                rect_height_out * BAR_OUTLINES['grid_power']['height'], 
-                                                HPHMI.brown, 'none', 0.5)
-        
-        self.fig.patches.extend([voltage_gen_outline, voltage_gen_bar, grid_power_outline, grid_power_bar])
+        # Labels and bars show the last value and the range of the window, empty without samples
+        if len(gen_voltage):
+            self.ax.yaxis.label.set_text(gen_voltage_text(gen_voltage[-1]))
+            self.grid_power_label.set_text(grid_power_text(grid_power[-1]))
+            self.voltage_gen_bar.update(gen_voltage.min(), gen_voltage.max())
+            self.grid_power_bar.update(grid_power.min(), grid_power.max())
+        else:
+            self.ax.yaxis.label.set_text(gen_voltage_text(0))
+            self.grid_power_label.set_text(grid_power_text(0))
+            self.voltage_gen_bar.update(Y_MIN, Y_MIN)
+            self.grid_power_bar.update(Y_MIN, Y_MIN)
 
-        # Set the axes labels and grid
-        self.ax.set_xlim(0, 300)  # Fixed at 300 readings
-        self.ax.set_ylim(Y_MIN, Y_MAX)
-        self.ax.grid(color=HPHMI.dark_gray, linestyle='--', linewidth=0.5, alpha=1)
-        self.fig.tight_layout()
-        self.canvas.draw()
+        self._set_x_tick_labels(history_tick_labels(start, end), live=False)
+        self._redraw()
@@ -1,15 +1,39 @@
+import math
 import tkinter as tk
-import threading
 import time
 import c104
 
-from dynamic_bar import DynamicBar
-from graph import GraphView
-from indicator import Indicator
-from button import ButtonView
-
+import startup
+from acquisition import AcquisitionWorker, UpdateQueue
+from commands import CommandService
+from connection_manager import ConnectionManager, CONNECTED, WAITING
+from gateway_source import GatewaySource
+from poll_scheduler import PollScheduler, FAST_INTERVAL_MS
+from latency import LatencyMonitor, LatencyOverlay, DATA_AGE, LOOP_LAG, OVERLAY_INTERVAL_MS
+from trend_store import TrendStore
+from downsample import DEFAULT_METHOD
+from replay import Recorder, ReplaySource, REPLAY_SPEEDS, MAX_FRAME_GAP_S
+
+# Interval between trend graph samples of a replay, in recorded time, live samples are scheduled adaptively
 READ_INTERVAL_MS = 2000
 
+# Interval for applying received point updates to the display
+UPDATE_INTERVAL_MS = 100
+
+# Interval between integrity interrogations, catching up on any missed spontaneous update
+INTEGRITY_INTERVAL_MS = 60000
+
+# Seek steps of the arrow keys in a replay, without and with Shift
+REPLAY_SEEK_S = 60
+REPLAY_LONG_SEEK_S = 600
+
+# Renderers for the HMI panels, matplotlib figures or native Tk canvas items
+RENDERERS = ('matplotlib', 'tk')
+DEFAULT_RENDERER = 'matplotlib'
+
+# Draws the matplotlib panels off-screen without a Tk master, for snapshots
+HEADLESS_RENDERER = 'agg'
+
 CASDU = 1
 SET_POINT_OFFSET = 14000
 
@@ -53,14 +77,161 @@ ANA_GENERATOR_VOLTAGE = 10011  # IOA 15011 - Voltage produced by generator
 ANA_GRID_POWER        = 10012  # IOA 15012 - Estimated kW produced
 ANA_BEARING_TEMP      = 10013  # IOA 15013 - Bearing temperature
 
+# Displayed values each widget depends on, widgets are only updated when one of them changes
+DYNAMIC_BAR_INPUTS = {ANA_BEARING_TEMP, ANA_TURBINE_SPEED, ANA_GENERATOR_VOLTAGE, ANA_GRID_POWER}
+INDICATOR_INPUTS = {
+    SP_WATER_INLET, SP_EXCITE_SWITCH, SP_COOLING_SWITCH, SP_TRANSFORMER_SWITCH,
+    SP_START_PROCESS, SP_GRID_SWITCH, SP_SHUTDOWN_PROCESS
+}
+POPUP_INPUTS = {SP_WATER_INLET, SP_EXCITE_SWITCH, SP_TRANSFORMER_SWITCH, SP_GRID_SWITCH} | DYNAMIC_BAR_INPUTS
+
+def load_widgets(renderer):
+    """
+    Import the panel classes of a renderer, returned as (GraphView, DynamicBar, Indicator, ButtonView).
+    Only the chosen renderer is imported, so the Tk renderer starts without loading matplotlib.
+    The headless renderer uses the matplotlib panels.
+    """
+    if renderer == 'tk':
+        from tk_graph import TkGraphView
+        from tk_dynamic_bar import TkDynamicBar
+        from tk_indicator import TkIndicator
+        from tk_button import TkButtonView
+        return TkGraphView, TkDynamicBar, TkIndicator, TkButtonView
+
+    from graph import GraphView
+    from dynamic_bar import DynamicBar
+    from indicator import Indicator
+    from button import ButtonView
+    return GraphView, DynamicBar, Indicator, ButtonView
+
+
 class HMIController:
-    def __init__(self, view, host, port, timeout, os):
+    def __init__(self, view, host, port, timeout, os, renderer=DEFAULT_RENDERER, history=None,
+                 downsample=DEFAULT_METHOD, record=None, replay=None, speed=REPLAY_SPEEDS[0], common_address=CASDU,
+                 gateway=None, latency=False):
+        """
+        Connect to the station common_address of the server at host and port, or take
+        the values from a gateway at `gateway` (host, port), or replay the recording file
+        `replay` instead. Received values are recorded to the file `record`, if given.
+        With `latency`, the age of the displayed values and the render times are measured
+        and shown in an overlay.
+        """
         self.view = view
         self.host = host
         self.port = port
+        self.common_address = common_address
         self.timeout = timeout
         self.os = os
+        self.renderer = renderer
+        self.downsample = downsample
+
+        # Trend samples are also written to the history database, if one is given
+        self.trend_store = TrendStore(history) if history else None
+        self.recorder = Recorder(record) if record else None
+
+        # Latest received value per IOA, put by c104 callbacks, the gateway or the replay and taken on the Tk thread
+        self.updates = UpdateQueue()
+
+        self.replay = None
+        self.gateway = None
+        self.conn = None
+        self.acquisition = None
+        self.connection_manager = None
+        self.commands = None
+        if replay:
+            self.replay = ReplaySource(replay, self.updates, speed)
+        else:
+            # Commands are sent from a worker thread, the Tk thread never waits for the outstation
+            self.commands = CommandService(self._transmit, self.timeout)
+            if gateway:
+                # The gateway interrogates the outstation, the HMI only follows its updates
+                self.gateway = GatewaySource(*gateway, self.updates, self.timeout)
+            else:
+                self._connect()
+        startup.mark('data source')
+
+        # Store state of read values
+        self.data = {}
+
+        # Source time of the latest value per IOA, only kept while measuring latency
+        self.data_times = {}
+        self.latency = None
+        if latency:
+            self.latency = LatencyMonitor(self.acquisition.round_trips if self.acquisition is not None else None)
+
+        # Values as last displayed, to skip widgets whose inputs did not change
+        self.displayed = {}
+
+        GraphView, DynamicBar, Indicator, ButtonView = load_widgets(self.renderer)
+        startup.mark(f'{self.renderer} import')
 
+        # Headless panels are drawn off-screen and not placed in a window
+        master = None if self.renderer == HEADLESS_RENDERER else self.view
+
+        # Initialize the Graph
+        self.graph = GraphView(master, self.trend_store, self.downsample)
+        if master is not None:
+            self.graph.canvas_widget.grid(row=0, column=0, columnspan=2, pady=20, padx=20)
+        startup.mark('trend graph')
+
+        # Live trend samples follow the plant, faster during transients and slower while steady
+        self.scheduler = PollScheduler() if self.replay is None else None
+        self.sampled = None
+
+        # Panels are not drawn while the window is iconified
+        self.hidden = False
+
+        # Initialization for periodic updates
+        self._update_due = time.monotonic() + UPDATE_INTERVAL_MS / 1000
+        self._update_after_id = self.view.after(UPDATE_INTERVAL_MS, self.apply_updates_periodically)
+        self._trend_after_id = self.view.after(self.trend_interval_ms(), self.sample_trend_periodically)
+
+        # Connection states are shown after the window title
+        self.title = self.view.master.title()
+
+        self._integrity_after_id = None
+        if self.acquisition is not None:
+            # Current values come from the interrogation on every connect, then from spontaneous updates
+            self._integrity_after_id = self.view.after(INTEGRITY_INTERVAL_MS, self.integrity_check_periodically)
+        elif self.replay is not None:
+            self._setup_replay_keys()
+
+        self.dynamic_bar = DynamicBar(master)
+        startup.mark('dynamic bars')
+        self.indicator = Indicator(master)
+        startup.mark('indicators')
+        self.button_view = ButtonView(master, self, self.os)
+        startup.mark('buttons')
+
+        if master is not None:
+            self.dynamic_bar.canvas_widget.grid(row=DYNAMIC_BAR_ROW, 
+                                                column=DYNAMIC_BAR_COLUMN, 
+                                                columnspan=DYNAMIC_BAR_COLUMN_SPAN, 
+                                                rowspan=DYNAMIC_BAR_ROW_SPAN, 
+                                                pady=DYNAMIC_BAR_PAD_Y, 
+                                                padx=DYNAMIC_BAR_PAD_X)
+            self.button_view.canvas_widget.grid(row=BUTTON_VIEW_ROW, 
+                                                column=BUTTON_VIEW_COLUMN, 
+                                                columnspan=BUTTON_VIEW_COLUMN_SPAN, 
+                                                rowspan=BUTTON_VIEW_ROW_SPAN, 
+                                                pady=BUTTON_VIEW_PAD_Y, 
+                                                padx=BUTTON_VIEW_PAD_X)
+
+        self.overlay = None
+        self._overlay_after_id = None
+        if self.latency is not None and master is not None:
+            self.overlay = LatencyOverlay(master, self.latency)
+            self._overlay_after_id = self.view.after(OVERLAY_INTERVAL_MS, self.refresh_overlay_periodically)
+
+        self.view.master.bind("<Unmap>", self._on_unmap)
+        self.view.master.bind("<Map>", self._on_map)
+
+        # Bind the window's close event
+        self.view.master.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+
+    def _connect(self):
+        """Set up the c104 client with the station points and connect to the server."""
         # # Debug modes
         # c104.set_debug_mode(
         #     c104.Debug.Client    |
@@ -69,14 +240,16 @@ class HMIController:
         # )
 
         # Set up c104 client
-        self.client = c104.Client()
+        self.client = c104.Client(command_timeout_ms=self.timeout * 1000)
         self.conn   = self.client.add_connection(
             ip=self.host, port=self.port, init=c104.Init.NONE
         )
         # Handle unexpected messages
         self.conn.on_unexpected_message(callable=self.on_unexpected)
+        # Command confirmations and terminations are followed by the command service
+        self.conn.on_receive_raw(callable=self.commands.on_receive_raw)
 
-        station = self.conn.add_station(common_address=CASDU)
+        station = self.conn.add_station(common_address=self.common_address)
 
         # Register single point measurement points
         sp_ioas = (
@@ -87,6 +260,7 @@ class HMIController:
         self.sp_points = {}
         for ioa in sp_ioas:
             pt = station.add_point(io_address=ioa, type=c104.Type.M_SP_NA_1)
+            pt.on_receive(callable=self.on_point_receive)
             self.sp_points[ioa] = pt
 
         # Register analogue measurement points
@@ -97,6 +271,7 @@ class HMIController:
         self.analog_points = {}
         for ioa in ana_ioas:
             pt = station.add_point(io_address=ioa, type=c104.Type.M_ME_NC_1)
+            pt.on_receive(callable=self.on_point_receive)
             self.analog_points[ioa] = pt
 
         # Register single command points
@@ -110,44 +285,78 @@ class HMIController:
             pt = station.add_point(io_address=ioa, type=c104.Type.C_SC_NA_1)
             self.command_points[ioa] = pt
 
-        # Start the client connection and wait for open state
-        self.client.start()
-        while self.conn.state != c104.ConnectionState.OPEN:
-            time.sleep(0.01)
+        # Setpoint command points (type=C_SE_NC_1) are added on their first use
+        self.station = station
+        self.setpoint_points = {}
 
-        # Store state of read values
-        self.data = {}
+        # Interrogations run on one persistent thread
+        self.acquisition = AcquisitionWorker(self.conn, self.common_address)
 
-        # Keep track of if there is an active interrogation or not
-        self.interrogating = False
+        # The client connects and reconnects in the background, the window opens without waiting for the server
+        self.connection_manager = ConnectionManager(self.client, self.conn, self.timeout, self.on_connected)
 
-        # Initialize the Graph
-        self.graph = GraphView(self.view)
-        self.graph.canvas_widget.grid(row=0, column=0, columnspan=2, pady=20, padx=20)
-        
-        # Initialization for periodic readings
-        self._after_id = self.view.after(READ_INTERVAL_MS, self.read_data_periodically)
-
-        self.dynamic_bar = DynamicBar(self.view)
-        self.dynamic_bar.canvas_widget.grid(row=DYNAMIC_BAR_ROW, 
-                                            column=DYNAMIC_BAR_COLUMN, 
-                                            columnspan=DYNAMIC_BAR_COLUMN_SPAN, 
-                                            rowspan=DYNAMIC_BAR_ROW_SPAN, 
-                                            pady=DYNAMIC_BAR_PAD_Y, 
-                                            padx=DYNAMIC_BAR_PAD_X)
-
-        self.indicator = Indicator(self.view)
-
-        self.button_view = ButtonView(self.view, self, self.os)
-        self.button_view.canvas_widget.grid(row=BUTTON_VIEW_ROW, 
-                                            column=BUTTON_VIEW_COLUMN, 
-                                            columnspan=BUTTON_VIEW_COLUMN_SPAN, 
-                                            rowspan=BUTTON_VIEW_ROW_SPAN, 
-                                            pady=BUTTON_VIEW_PAD_Y, 
-                                            padx=BUTTON_VIEW_PAD_X)
 
-        # Bind the window's close event
-        self.view.master.protocol("WM_DELETE_WINDOW", self.on_closing)
+    def on_connected(self):
+        # Called on the connection manager thread, one interrogation resyncs all values after each (re)connect
+        self.acquisition.request()
+
+
+    def _setup_replay_keys(self):
+        """Space pauses the replay, the arrow keys seek and the 1, 2 and 3 keys set the speed."""
+        master = self.view.master
+        master.bind("<space>", lambda event: self.replay.toggle_pause())
+        master.bind("<Left>", lambda event: self.replay.seek(self.replay.now() - REPLAY_SEEK_S))
+        master.bind("<Right>", lambda event: self.replay.seek(self.replay.now() + REPLAY_SEEK_S))
+        master.bind("<Shift-Left>", lambda event: self.replay.seek(self.replay.now() - REPLAY_LONG_SEEK_S))
+        master.bind("<Shift-Right>", lambda event: self.replay.seek(self.replay.now() + REPLAY_LONG_SEEK_S))
+        for key, speed in enumerate(REPLAY_SPEEDS, start=1):
+            master.bind(str(key), lambda event, speed=speed: self.set_replay_speed(speed))
+
+        self.set_replay_speed(self.replay.speed)
+
+        # Samples are taken on the wall clock, so a slow redraw spaces them further apart in recorded
+        # time at any speed. Only pauses in the recording itself are gaps, no samples are taken in them.
+        self.graph.max_sample_gap = MAX_FRAME_GAP_S
+
+
+    def set_replay_speed(self, speed):
+        self.replay.set_speed(speed)
+
+
+    def trend_interval_ms(self):
+        """Interval to the next trend sample, replays sample every 2 recorded seconds up to the update rate."""
+        if self.replay is None:
+            return self.scheduler.delay_ms()
+        return max(round(READ_INTERVAL_MS / self.replay.speed), UPDATE_INTERVAL_MS)
+
+
+    def show_connection_status(self):
+        """Show in the window title while the station or gateway is not connected."""
+        if self.gateway is not None:
+            status = None if self.gateway.is_connected() else \
+                f"Connecting to gateway {self.gateway.host}:{self.gateway.port}"
+        else:
+            manager = self.connection_manager
+            if manager.state == CONNECTED:
+                status = None
+            elif manager.state == WAITING:
+                status = f"No connection to {self.host}:{self.port}, retrying in {math.ceil(manager.retry_in() or 0)}s"
+            else:
+                attempt = f" (attempt {manager.attempts + 1})" if manager.attempts else ""
+                status = f"Connecting to {self.host}:{self.port}{attempt}"
+
+        title = self.title if status is None else f"{self.title} - {status}"
+        if self.view.master.title() != title:
+            self.view.master.title(title)
+
+
+    def show_replay_status(self):
+        """Show the recorded time, speed and state of the replay in the window title."""
+        state = " (end)" if self.replay.finished else " (paused)" if self.replay.paused else ""
+        replay_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.replay.now()))
+        title = f"{self.title} - Replay {replay_time} {self.replay.speed}x{state}"
+        if self.view.master.title() != title:
+            self.view.master.title(title)
 
     
     def on_unexpected(
@@ -159,44 +368,78 @@ class HMIController:
         print(f"Unexpected message from server: {cause}")
 
 
-    def write_bool(self, addr, value):
-        """ Send a single-point (bool) command """
-        pt = self.command_points[addr]
-        pt.value = bool(value)
-        return pt.transmit(cause=c104.Cot.ACTIVATION)
-
-
-    def read_values(self):
+    def write_bool(self, addr, value, on_update=None):
         """
-        Do a general interrogation and return a dict of the latest point values.
+        Queue a single-point (bool) command and return it as a commands.Command, or None
+        during a replay. on_update(command) is called on the Tk thread as its state changes.
         """
-        self.interrogating = True
-
-        ok = self.conn.interrogation(
-            common_address=CASDU,
-            cause=c104.Cot.ACTIVATION,
-            qualifier=c104.Qoi.STATION,
-            wait_for_response=False
-        )
+        if self.replay is not None:
+            print("Commands are not sent during a replay")
+            return None
+        return self.commands.submit(addr, bool(value), on_update=on_update)
 
-        self.interrogating = False
 
-        if not ok:
-            print("Interrogation failed")
+    def write_float(self, addr, value, on_update=None):
+        """Queue a setpoint command (C_SE_NC_1) with a float value, like write_bool."""
+        if self.replay is not None:
+            print("Commands are not sent during a replay")
             return None
+        return self.commands.submit(addr, float(value), setpoint=True, on_update=on_update)
 
-        # build and return a snapshot of all point values
-        snapshot = {}
 
-        # update all single-point (bool) measurements
-        for ioa, pt in self.sp_points.items():
-            snapshot[ioa] = pt.value
+    def toggle_bool(self, addr, on_update=None):
+        """
+        Queue the command that toggles a single point. The current value is the one of
+        a command still pending for it, else the latest received, even if not displayed yet.
+        """
+        current = self.commands.pending_value(addr) if self.commands is not None else None
+        if current is None:
+            measurement = addr - SET_POINT_OFFSET if 15000 < addr < 16000 else addr
+            current = self.updates.latest(measurement, self.data.get(measurement))
+        if current is None:
+            print(f"No value received for IOA {addr} yet, it cannot be toggled")
+            return None
+        return self.write_bool(addr, not current, on_update)
+
+
+    def _transmit(self, command):
+        """Send a command on the command service thread, blocking until it is confirmed or times out."""
+        if self.gateway is not None:
+            if command.setpoint:
+                print("Setpoint commands are not forwarded by the gateway")
+                return False
+            return self.gateway.write_bool(command.ioa, command.value)
+
+        if not self.conn.is_connected:
+            print(f"Command for IOA {command.ioa} not sent, the station is not connected")
+            return False
+
+        if command.setpoint:
+            pt = self.setpoint_points.get(command.ioa)
+            if pt is None:
+                pt = self.station.add_point(io_address=command.ioa, type=c104.Type.C_SE_NC_1)
+                self.setpoint_points[command.ioa] = pt
+        else:
+            pt = self.command_points[command.ioa]
+        pt.value = command.value
+        return pt.transmit(cause=c104.Cot.ACTIVATION)
 
-        # update all analog (float) measurements
-        for ioa, pt in self.analog_points.items():
-            snapshot[ioa] = pt.value
 
-        return snapshot
+    def on_point_receive(
+        self,
+        point:         c104.Point,
+        previous_info: c104.Information,
+        message:       c104.IncomingMessage
+    ) -> c104.ResponseState:
+        # Called on the c104 thread for spontaneous and interrogated values, the Tk thread applies them
+        if self.latency is None:
+            self.updates.put(point.io_address, point.value)
+        else:
+            # Values time-tagged by the outstation are aged from their tag, others from their receipt
+            recorded_at = point.recorded_at
+            source_time = recorded_at.timestamp() if recorded_at is not None else time.time()
+            self.updates.put(point.io_address, point.value, source_time)
+        return c104.ResponseState.SUCCESS
 
 
     def get_current_value(self, addr):
@@ -207,66 +450,198 @@ class HMIController:
         return self.data[addr]
 
 
-    def fetch_data_threaded(self, callback):
-        def run():
-            try:
-                if self.interrogating is False:
-                    data = self.read_values()  # Fetch data in the background thread
-                    self.view.after(0, callback, data)  # Schedule the callback on the main thread
-            except Exception as e:
-                print(f"Error fetching data in background thread: {e}")
-        
-        # Start the background thread
-        threading.Thread(target=run, daemon=True).start()
+    def integrity_check_periodically(self):
+        # A periodic interrogation corrects the display if a spontaneous update was lost,
+        # skipped by the worker while the previous one is still pending
+        if self.connection_manager.is_connected():
+            self.acquisition.request()
+        self._integrity_after_id = self.view.after(INTEGRITY_INTERVAL_MS, self.integrity_check_periodically)
 
 
-    def process_fetched_data(self, data):
-        if data:
-            self.data = data  # Update the data attribute on the main thread
-        else:
-            print("No data received or data fetch failed.")
+    def apply_updates_periodically(self):
+        if self.latency is not None:
+            self.latency.add(LOOP_LAG, max(0.0, time.monotonic() - self._update_due))
 
+        # Take the latest value of every IOA received since the last call
+        received = self.updates.take(self.data_times if self.latency is not None else None)
+        self.data.update(received)
 
-    def read_data_periodically(self):
-        # First, we cancel any previous scheduling to ensure that we don't have multiple calls scheduled
-        if hasattr(self, '_after_id'):
-            self.view.after_cancel(self._after_id)
+        try:
+            if self.recorder is not None:
+                self.recorder.record(time.time(), received, self.data)
+            if self.replay is not None:
+                self.show_replay_status()
+            else:
+                self.commands.dispatch()
+                self.show_connection_status()
+            if self.scheduler is not None and (received.get(SP_START_PROCESS) or received.get(SP_SHUTDOWN_PROCESS)):
+                self.sample_trend_soon()
+            if received:
+                changed = self.update_widgets()
+                if self.latency is not None and changed:
+                    # The values are on screen once Tk is idle again, after the pending redraws
+                    shown = [self.data_times[ioa] for ioa in changed if ioa in self.data_times]
+                    self.view.after_idle(self._on_displayed, shown)
+        except Exception as e:
+            print(f"Error during data processing: {e}")
 
-        # Start the data fetching process in a separate thread
-        self.fetch_data_threaded(self.process_fetched_data)
+        self._update_due = time.monotonic() + UPDATE_INTERVAL_MS / 1000
+        self._update_after_id = self.view.after(UPDATE_INTERVAL_MS, self.apply_updates_periodically)
 
-        try:
+
+    def sample_trend_soon(self):
+        """Take the next trend sample within the fast interval, when a sequence starts during a slow one."""
+        if self.scheduler.interval_ms > FAST_INTERVAL_MS:
+            self.scheduler.interval_ms = FAST_INTERVAL_MS
+            self.view.after_cancel(self._trend_after_id)
+            self._trend_after_id = self.view.after(FAST_INTERVAL_MS, self.sample_trend_periodically)
+
+
+    def _on_unmap(self, event):
+        # Events of the child widgets reach the window binding too
+        if event.widget is self.view.master:
+            self.hidden = True
+            self.graph.set_paused(True)
+
+
+    def _on_map(self, event):
+        if event.widget is self.view.master and self.hidden:
+            self.hidden = False
+            self.graph.set_paused(False)
+            # Redraw every panel with the values received while iconified
+            self.displayed = {}
             if self.data:
-                generator_voltage = round(self.data.get(ANA_GENERATOR_VOLTAGE, 0), 1)
-                grid_power = round(self.data.get(ANA_GRID_POWER, 0), 1)
-                bearing_temperature = round(self.data.get(ANA_BEARING_TEMP, 0), 1)
-                turbine_speed = self.data.get(ANA_TURBINE_SPEED, 0)
-
-                self.graph.update_graph(generator_voltage, grid_power)
-                self.dynamic_bar.update_bars(bearing_temperature, turbine_speed, generator_voltage, grid_power)
-
-                water_in = self.data.get(SP_WATER_INLET, 0)
-                exc_sw = self.data.get(SP_EXCITE_SWITCH, 0)
-                cool_sw = self.data.get(SP_COOLING_SWITCH, 0)
-                tr_sw = self.data.get(SP_TRANSFORMER_SWITCH, 0)
-                start = self.data.get(SP_START_PROCESS, 0)
-                grid_sw = self.data.get(SP_GRID_SWITCH, 0)
-                shutdown = self.data.get(SP_SHUTDOWN_PROCESS, 0)
-
-                self.indicator.update_status(water_in, exc_sw, cool_sw, tr_sw, start, grid_sw, shutdown)
-                self.button_view.update_labels(water_in, exc_sw, tr_sw, grid_sw, turbine_speed, 
-                                            bearing_temperature, generator_voltage, grid_power)
+                self.update_widgets()
+
+
+    def _on_displayed(self, source_times):
+        now = time.time()
+        for source_time in source_times:
+            self.latency.add(DATA_AGE, now - source_time)
+
+
+    def _render(self, widget, update, *args):
+        """Call a widget update, and with latency measurement time it until Tk has drawn it."""
+        if self.latency is None:
+            update(*args)
+            return
+        start = time.perf_counter()
+        update(*args)
+        self.view.after_idle(lambda: self.latency.add_render(widget, time.perf_counter() - start))
+
+
+    def refresh_overlay_periodically(self):
+        if not self.hidden:
+            self.overlay.refresh()
+        self._overlay_after_id = self.view.after(OVERLAY_INTERVAL_MS, self.refresh_overlay_periodically)
+
+
+    def displayed_values(self):
+        """Return the current values rounded as displayed."""
+        displayed = {ioa: self.data.get(ioa, 0) for ioa in INDICATOR_INPUTS}
+        displayed[ANA_GENERATOR_VOLTAGE] = round(self.data.get(ANA_GENERATOR_VOLTAGE, 0), 1)
+        displayed[ANA_GRID_POWER] = round(self.data.get(ANA_GRID_POWER, 0), 1)
+        displayed[ANA_BEARING_TEMP] = round(self.data.get(ANA_BEARING_TEMP, 0), 1)
+        displayed[ANA_TURBINE_SPEED] = self.data.get(ANA_TURBINE_SPEED, 0)
+        return displayed
+
+
+    def update_widgets(self):
+        """Update the widgets whose displayed values changed, returning the changed IOAs."""
+        # Values rounded as displayed, so changes too small to be seen are not redrawn
+        displayed = self.displayed_values()
+        changed = {ioa for ioa, value in displayed.items() if self.displayed.get(ioa) != value}
+        self.displayed = displayed
+
+        generator_voltage = displayed[ANA_GENERATOR_VOLTAGE]
+        grid_power = displayed[ANA_GRID_POWER]
+        bearing_temperature = displayed[ANA_BEARING_TEMP]
+        turbine_speed = displayed[ANA_TURBINE_SPEED]
+
+        water_in = displayed[SP_WATER_INLET]
+        exc_sw = displayed[SP_EXCITE_SWITCH]
+        cool_sw = displayed[SP_COOLING_SWITCH]
+        tr_sw = displayed[SP_TRANSFORMER_SWITCH]
+        start = displayed[SP_START_PROCESS]
+        grid_sw = displayed[SP_GRID_SWITCH]
+        shutdown = displayed[SP_SHUTDOWN_PROCESS]
+
+        # The schematic popup is a window of its own and may be open while the HMI window is iconified,
+        # it skips the update itself while it is not viewable
+        if changed & POPUP_INPUTS:
+            self._render('labels', self.button_view.update_labels, water_in, exc_sw, tr_sw, grid_sw,
+                         turbine_speed, bearing_temperature, generator_voltage, grid_power)
+        if self.hidden:
+            return changed
+
+        if changed & DYNAMIC_BAR_INPUTS:
+            self._render('bars', self.dynamic_bar.update_bars,
+                         bearing_temperature, turbine_speed, generator_voltage, grid_power)
+
+        if changed & INDICATOR_INPUTS:
+            self._render('indicator', self.indicator.update_status,
+                         water_in, exc_sw, cool_sw, tr_sw, start, grid_sw, shutdown)
+        return changed
+
+
+    def sample_trend_periodically(self):
+        if self.scheduler is not None:
+            self.scheduler.start()
+        try:
+            if self.gateway is not None:
+                now, connected = time.time(), self.gateway.is_connected()
+            elif self.replay is None:
+                now, connected = time.time(), self.conn.is_connected
+            else:
+                now, connected = self.replay.now(), self.replay.is_connected()
+                # Seeking back starts the trend over, a paused replay adds no samples
+                if self.graph.live_end is not None and now < self.graph.live_end:
+                    self.graph.reset_trend()
+                connected = connected and now != self.graph.live_end
+
+            # No sample is taken while the station is unreachable, the trend shows a gap
+            # instead of repeating the last received values
+            if self.data and connected:
+                # The trend advances on every sample and skips the redraw itself when nothing visible changed
+                displayed = self.displayed_values()
+                self._render('graph', self.graph.update_graph,
+                             displayed[ANA_GENERATOR_VOLTAGE], displayed[ANA_GRID_POWER], now)
+
+                if self.trend_store is not None:
+                    self.trend_store.append(now, displayed[ANA_GENERATOR_VOLTAGE], displayed[ANA_GRID_POWER])
+
+                if self.scheduler is not None:
+                    sequence_running = displayed[SP_START_PROCESS] or displayed[SP_SHUTDOWN_PROCESS]
+                    self.scheduler.update(sequence_running, displayed[ANA_GRID_POWER], now, displayed != self.sampled)
+                    self.sampled = displayed
         except Exception as e:
             print(f"Error during data processing: {e}")
 
-
-        # Save the after_id to cancel it later upon closing
-        self._after_id = self.view.after(READ_INTERVAL_MS, self.read_data_periodically)
+        self._trend_after_id = self.view.after(self.trend_interval_ms(), self.sample_trend_periodically)
 
 
     def on_closing(self):
         """Called when the Tkinter window is closing."""
-        if hasattr(self, '_after_id'):
-            self.view.after_cancel(self._after_id)
-        self.view.master.quit()
+        for after_id in (self._update_after_id, self._trend_after_id, self._integrity_after_id,
+                         self._overlay_after_id):
+            if after_id is not None:
+                self.view.after_cancel(after_id)
+        if self.commands is not None:
+            self.commands.stop()
+        if self.replay is not None:
+            self.replay.stop()
+        elif self.gateway is not None:
+            self.gateway.stop()
+        else:
+            self.acquisition.stop()
+            self.connection_manager.stop()
+        if self.trend_store is not None:
+            self.trend_store.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.latency is not None:
+            print(f"Latency:\n{self.latency.text()}")
+        # A plant window opened from the fleet view closes alone, the HMI window ends the application
+        if not isinstance(self.view.master, tk.Toplevel):
+            self.view.master.quit()
         self.view.master.destroy()
\ No newline at end of file
@@ -1,41 +1,41 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.patches import Rectangle
 from colors import HPHMI
+from blit_manager import BlitManager
+from layout import INDICATOR_SIZE, INDICATOR_RECT as RECT
 
-RECT = {
-    'control_status': [0.022, 0.885, 0.954, 0.07],
-    'water_inlet_desc': [0.022, 0.815, 0.32, 0.07],
-    'water_inlet_dynamic': [0.022, 0.745, 0.32, 0.07],
-    'excite_switch_desc': [0.505, 0.815, 0.32, 0.07],
-    'excite_switch_dynamic': [0.505, 0.745, 0.32, 0.07],
-    'filler_box_right': [0.825, 0.465, 0.151, 0.42],
-    'filler_box_left': [0.342, 0.325, 0.163, 0.56],
-    'cooling_switch_desc': [0.022, 0.675, 0.32, 0.07],
-    'cooling_switch_dynamic': [0.022, 0.605, 0.32, 0.07],
-    'transformer_sw_desc': [0.505, 0.675, 0.32, 0.07],
-    'transformer_sw_dynamic': [0.505, 0.605, 0.32, 0.07],
-    'start_seq_desc': [0.022, 0.535, 0.32, 0.07],
-    'start_seq_dynamic': [0.022, 0.465, 0.32, 0.07],
-    'grid_switch_desc': [0.505, 0.535, 0.32, 0.07],
-    'grid_switch_dynamic': [0.505, 0.465, 0.32, 0.07],
-    'shutdown_seq_desc': [0.022, 0.395, 0.32, 0.07],
-    'shutdown_seq_dynamic': [0.022, 0.325, 0.32, 0.07]
-}
 
 class Indicator:
     def __init__(self, master):
         """Initialize the Matplotlib figure and axis."""
-        self.fig, self.ax = plt.subplots(figsize=(5, 3.2))
+        self.fig = Figure(figsize=INDICATOR_SIZE)
+        self.ax = self.fig.add_subplot()
         self.master = master
         
         # Setup the initial view
         self.setup_view()
         
-        # Embed the Matplotlib figure into the Tkinter window
-        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
-        self.canvas_widget = self.canvas.get_tk_widget()
-        self.canvas_widget.grid(row=9, columnspan=4, rowspan=8, column=0, pady=20, padx=20)
+        # Embed the Matplotlib figure into the Tkinter window, or draw off-screen with Agg without a master
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.fig)
+            self.canvas_widget = None
+        else:
+            self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+            self.canvas_widget = self.canvas.get_tk_widget()
+            self.canvas_widget.grid(row=9, columnspan=4, rowspan=8, column=0, pady=20, padx=20)
+
+        # Only the status boxes and their texts change between updates
+        self.blit_manager = BlitManager(self.canvas, [
+            self.water_inlet_box, self.water_inlet_text,
+            self.excite_switch_box, self.excite_switch_text,
+            self.cooling_switch_box, self.cooling_switch_text,
+            self.transformer_sw_box, self.transformer_sw_text,
+            self.start_seq_box, self.start_seq_text,
+            self.grid_switch_box, self.grid_switch_text,
+            self.shutdown_seq_box, self.shutdown_seq_text
+        ])
 
 
     def setup_view(self):
@@ -360,4 +360,5 @@ class Indicator:
             self.shutdown_seq_text.set_text("OFF")
             self.shutdown_seq_text.set_color(HPHMI.dark_blue)
 
-        self.canvas.draw()
+        # Redraw only the status boxes over the cached background
+        self.blit_manager.update()
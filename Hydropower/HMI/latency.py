@@ -0,0 +1,86 @@
+import collections
+import tkinter as tk
+
+import numpy as np
+
+from colors import HPHMI
+
+# Samples kept per measurement, percentiles are over the latest ones
+LATENCY_HISTORY = 1000
+
+# Interval for refreshing the overlay
+OVERLAY_INTERVAL_MS = 1000
+
+# Measurements in the order shown, widget render times follow the data age
+DATA_AGE = 'Data age'
+POLL_ROUND_TRIP = 'Poll RTT'
+LOOP_LAG = 'UI loop lag'
+
+
+def percentiles(samples):
+    """Return the median and 95th percentile of the samples in milliseconds, or None without samples."""
+    # Copied in one step, samples may be appended from another thread
+    samples = list(samples)
+    if not samples:
+        return None
+    p50, p95 = np.percentile(samples, (50, 95))
+    return p50 * 1000, p95 * 1000
+
+
+class LatencyMonitor:
+    """
+    Latency samples of the HMI in seconds, each kept in a bounded deque.
+
+    Data age runs from the source time of a value to the Tk idle callback after the
+    widgets showing it were updated, when all pending drawing has been done. Render
+    times are per widget, from the update call until its drawing finished, and UI loop
+    lag is how late the periodic update ran. Deque appends are thread-safe, so the
+    poll round trips can come from the acquisition thread.
+    """
+
+    def __init__(self, round_trips=None):
+        self.samples = {DATA_AGE: collections.deque(maxlen=LATENCY_HISTORY),
+                        POLL_ROUND_TRIP: round_trips if round_trips is not None else (),
+                        LOOP_LAG: collections.deque(maxlen=LATENCY_HISTORY)}
+        self.render = {}
+
+
+    def add(self, name, seconds):
+        self.samples[name].append(seconds)
+
+
+    def add_render(self, widget, seconds):
+        if widget not in self.render:
+            self.render[widget] = collections.deque(maxlen=LATENCY_HISTORY)
+        self.render[widget].append(seconds)
+
+
+    def text(self):
+        """Return p50/p95 of every measurement, one line each."""
+        lines = []
+        measurements = [(name, self.samples[name]) for name in (DATA_AGE, POLL_ROUND_TRIP)]
+        measurements += [(f"Render {widget}", samples) for widget, samples in self.render.items()]
+        measurements.append((LOOP_LAG, self.samples[LOOP_LAG]))
+        for name, samples in measurements:
+            result = percentiles(samples)
+            if result is None:
+                lines.append(f"{name}: -")
+            else:
+                lines.append(f"{name}: p50 {result[0]:.1f} ms, p95 {result[1]:.1f} ms")
+        return '\n'.join(lines)
+
+
+class LatencyOverlay:
+    """Small label in the bottom left corner of the window, showing the LatencyMonitor."""
+
+    def __init__(self, master, monitor):
+        self.monitor = monitor
+        self.label = tk.Label(master, justify=tk.LEFT, anchor='w', bg=HPHMI.light_gray, fg=HPHMI.darker_gray,
+                              font=('Courier', 9), padx=6, pady=4)
+        self.label.place(relx=0, rely=1, x=4, y=-4, anchor='sw')
+
+
+    def refresh(self):
+        text = self.monitor.text()
+        if self.label['text'] != text:
+            self.label['text'] = text
@@ -0,0 +1,211 @@
+# Panel geometry shared by the matplotlib and Tk canvas renderers.
+# Positions are fractions of the panel size with the origin in the lower left corner,
+# like matplotlib figure coordinates.
+
+# Panel sizes in inches at 100 pixels per inch
+GRAPH_SIZE = (5, 3.2)
+DYNAMIC_BAR_SIZE = (7, 3.2)
+INDICATOR_SIZE = (5, 3.2)
+BUTTON_VIEW_SIZE = (7, 3.2)
+DPI = 100
+
+# Trend graph
+BAR_OUTLINES = {
+    'gen_voltage': {
+        'x': 0.9439,
+        'y': 0.121,
+        'width': 0.015,
+        'height': 0.832
+    },
+    'grid_power': {
+        'x': 0.96,
+        'y': 0.121,
+        'width': 0.015,
+        'height': 0.832
+    }
+}
+
+# Constants for dynamic bars
+BASE_Y = 0.121
+BAR_SCALE = 0.832
+UPPER_BOUNDARY = 0.953
+NUMBER_OF_READINGS = 300
+
+Y_MAX = 6000
+Y_MIN = 0
+
+Y_LABEL_OFFSET = -8
+Y_LABEL_MIN = 50
+Y_LABEL_MAX = 5850
+
+# Position of the grid power value box
+GRID_POWER_LABEL_X = -29
+GRID_POWER_LABEL_Y = 1200
+
+X_TICKS = [0, 60, 120, 180, 240, 300]
+X_TICK_LABELS = ['-10', '-8', '-6', '-4', '-2', '10m']
+
+# Time covered by the trend, the readings are sampled every 0.5 to 4 seconds
+TREND_WINDOW_S = 600
+
+# A longer pause between trend samples is drawn as a gap, above the slowest sample interval
+MAX_SAMPLE_GAP_S = 5
+
+# Most samples the live trend keeps, enough for sampling every half second
+MAX_TREND_SAMPLES = 4 * NUMBER_OF_READINGS
+
+# Dynamic bars, used for all bars
+Y_AXIS_OFFSET = 0.121
+BAR_HEIGHT = 0.60
+BAR_WIDTH = 0.024
+Y_AXIS_CENTER = 0.398
+SQUARE_SIZE = 0.017
+
+# Individual per bar
+BAR1_X_AXIS_OFFSET = 0.08
+BAR2_X_AXIS_OFFSET = 0.29
+BAR3_X_AXIS_OFFSET = 0.48
+BAR4_X_AXIS_OFFSET = 0.68
+
+# Total bar start and end, min and max for dynamic inner bar
+BAR1_START = 0
+BAR1_END = 80
+BAR1_MIN = 15
+BAR1_MAX = 70
+
+BAR2_START = 0
+BAR2_END = 275
+BAR2_MIN = 0
+BAR2_MAX = 250
+
+BAR3_START = 2500
+BAR3_END = 3800
+BAR3_MIN = 3150
+BAR3_MAX = 3450
+
+BAR4_START = 500
+BAR4_END = 2250
+BAR4_MIN = 700
+BAR4_MAX = 2000
+
+# Indicator status boxes
+INDICATOR_RECT = {
+    'control_status': [0.022, 0.885, 0.954, 0.07],
+    'water_inlet_desc': [0.022, 0.815, 0.32, 0.07],
+    'water_inlet_dynamic': [0.022, 0.745, 0.32, 0.07],
+    'excite_switch_desc': [0.505, 0.815, 0.32, 0.07],
+    'excite_switch_dynamic': [0.505, 0.745, 0.32, 0.07],
+    'filler_box_right': [0.825, 0.465, 0.151, 0.42],
+    'filler_box_left': [0.342, 0.325, 0.163, 0.56],
+    'cooling_switch_desc': [0.022, 0.675, 0.32, 0.07],
+    'cooling_switch_dynamic': [0.022, 0.605, 0.32, 0.07],
+    'transformer_sw_desc': [0.505, 0.675, 0.32, 0.07],
+    'transformer_sw_dynamic': [0.505, 0.605, 0.32, 0.07],
+    'start_seq_desc': [0.022, 0.535, 0.32, 0.07],
+    'start_seq_dynamic': [0.022, 0.465, 0.32, 0.07],
+    'grid_switch_desc': [0.505, 0.535, 0.32, 0.07],
+    'grid_switch_dynamic': [0.505, 0.465, 0.32, 0.07],
+    'shutdown_seq_desc': [0.022, 0.395, 0.32, 0.07],
+    'shutdown_seq_dynamic': [0.022, 0.325, 0.32, 0.07]
+}
+
+# Button, text and rectangle positions of the button view
+BTN_POS = {
+    'water_btn': [0.075, 0.74, 0.314, 0.12],
+    'cooling_btn': [0.075, 0.575, 0.314, 0.12],
+    'excite_btn': [0.075, 0.41, 0.314, 0.12],
+    'tr_sw_btn': [0.075, 0.245, 0.314, 0.12],
+    'grid_btn': [0.075, 0.08, 0.314, 0.12],
+    'start_btn': [0.495, 0.295, 0.25, 0.07],
+    'shutdown_btn': [0.495, 0.1875, 0.25, 0.07],
+    'show_drawing_btn': [0.495, 0.08, 0.25, 0.07],
+}
+
+BUTTON_RECT = {
+    'faceplate_zone': [0.465, 0.52, 0.51, 0.433],
+    'misc_operations': [0.465, 0.045, 0.31, 0.40],
+    'manual_actions': [0.028, 0.045, 0.41, 0.907],
+    'info_zone': [0.8, 0.045, 0.175, 0.40]
+}
+
+BTN_RECT_BORDER = {
+    'start': (0.033, 0.03),
+    'size': (0.94, 0.94),
+    'line_width': 1.5
+}
+
+TEXT_PLACEMENT = {
+    'misc_operations': (0, 0.405),
+    'manual_actions': (0, 0.91),
+    'info_zone': (0, -0.02)  # Relative to the center_y
+}
+
+
+def range_bar_bounds(low, high):
+    """Return the (y, height) of a trend range bar spanning low to high."""
+    y_range = Y_MAX - Y_MIN
+
+    # Clamp normalized values between 0 and 1
+    normalized_min = min(max((low - Y_MIN) / y_range, 0), 1)
+    normalized_max = min(max((high - Y_MIN) / y_range, 0), 1)
+
+    # Use the normalized values to set the height and starting point of the colored rectangle
+    rect_height = normalized_max - normalized_min
+    rect_y = BASE_Y + normalized_min * BAR_SCALE
+
+    # Check bar is not below the lower boundary
+    rect_y = max(BASE_Y, rect_y)
+
+    # If the top of the dynamic bar exceeds the upper boundary, adjust the height and base
+    if rect_y + rect_height * BAR_SCALE > UPPER_BOUNDARY:
+        overflow = (rect_y + rect_height * BAR_SCALE) - UPPER_BOUNDARY
+        rect_height -= overflow / BAR_SCALE
+        rect_y += overflow
+
+    return rect_y, rect_height * BAR_SCALE
+
+
+def gen_voltage_text(value):
+    """Text of the generator voltage label next to the trend."""
+    return f"{round(value, 1)}\nGen\nVoltage\n(V)"
+
+
+def grid_power_text(value):
+    """Text of the grid power label next to the trend."""
+    return f"{round(value, 1)}\n Power \nProd\n(kW)"
+
+
+def dynamic_bar_geometry(min_set_point, max_set_point, set_point, start, end):
+    """
+    Return (bar_y, bar_height, square_y) of a dynamic bar: the inner bar spans the
+    allowed min to max and the square marks the current value.
+    """
+    # Calculate the start and end of the bar based on the set points
+    bar_range = end - start
+
+    # Normalize values based on the dynamic starting point and range
+    normalized_min = (min_set_point - start) / bar_range
+    normalized_max = (max_set_point - start) / bar_range
+    normalized_set_point = (set_point - start) / bar_range
+
+    # Calculate the position and height of the dynamic bar
+    dynamic_bar_start = Y_AXIS_OFFSET + normalized_min * BAR_HEIGHT
+    dynamic_bar_height = (normalized_max - normalized_min) * BAR_HEIGHT
+
+    # Update the y position of the square indicator
+    square_y_position = Y_AXIS_OFFSET + normalized_set_point * BAR_HEIGHT - (SQUARE_SIZE / 2) - 0.007
+
+    # Make sure the indicator is not set outside area of bar
+    square_y_position = max(0.11, min(0.705, square_y_position))
+
+    return dynamic_bar_start, dynamic_bar_height, square_y_position
+
+
+def is_out_of_bounds(min_set_point, max_set_point, set_point):
+    """Return True if set_point is outside min to max, None when it is too small to warn about."""
+    if set_point < min_set_point or set_point > max_set_point:
+        # Value needs to be different from 0 to show warning
+        if set_point > 1.0:
+            return True
+        return None
+    return False
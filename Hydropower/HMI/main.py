@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 
+import startup
 import argparse  
 import tkinter as tk
 import re
 from hmi_view import HMIView
-from hmi_controller import HMIController
+from hmi_controller import HMIController, RENDERERS, DEFAULT_RENDERER
+from downsample import METHODS, DEFAULT_METHOD
+from replay import REPLAY_SPEEDS
+from gateway_source import DEFAULT_GATEWAY_PORT
+
+startup.mark('imports')
 
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
@@ -56,22 +62,55 @@ def check_timeout(value):
     raise argparse.ArgumentTypeError("timeout must be a positive integer less than 120 seconds")
 
 
+def check_gateway(value):
+    """Parse host[:port] of a gateway into (host, port)."""
+    host, separator, port = value.rpartition(':')
+    if not separator:
+        host, port = value, str(DEFAULT_GATEWAY_PORT)
+    return check_ipv4_or_hostname(host), check_port_number(port)
+
+
 def main():
     # Argument parsing
     parser = argparse.ArgumentParser(description="HMI - IEC104 Hydropower Plant")
     
-    parser.add_argument('--host', type=check_ipv4_or_hostname, 
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--host', type=check_ipv4_or_hostname, 
                         default=DEFAULT_HOST_IP, help=f'Host IP address or hostname (default: {DEFAULT_HOST_IP})')
+    source.add_argument('--replay', metavar='file',
+                        help='replay a file written with --record instead of connecting to a server')
+    source.add_argument('--gateway', metavar='host[:port]', type=check_gateway,
+                        help=f'take the values from a data gateway instead of connecting to the server '
+                             f'(default port: {DEFAULT_GATEWAY_PORT})')
     parser.add_argument('-p', '--port', metavar='port_number', type=check_port_number, 
                         default=DEFAULT_PORT, help=f'set TCP port (default: {DEFAULT_PORT})')
     parser.add_argument('-t', '--timeout', metavar='timeout', type=check_timeout, 
                         default=DEFAULT_TIMEOUT, help=f'set timeout in seconds (default: {DEFAULT_TIMEOUT}s)')
     parser.add_argument('--os', default='', help='Specify the operating system (e.g., "PIOS" for Raspberry Pi OS)')
+    parser.add_argument('--renderer', choices=RENDERERS, default=DEFAULT_RENDERER,
+                        help=f'draw the panels with matplotlib or native Tk canvas items (default: {DEFAULT_RENDERER})')
+    parser.add_argument('--history', metavar='file',
+                        help='keep the trend history in this SQLite file, scroll over the trend to page through it')
+    parser.add_argument('--downsample', choices=METHODS, default=DEFAULT_METHOD,
+                        help=f'reduce long history windows by min/max per pixel or with LTTB (default: {DEFAULT_METHOD})')
+    parser.add_argument('--record', metavar='file',
+                        help='record the received point values to this file, for --replay')
+    parser.add_argument('--speed', type=int, choices=REPLAY_SPEEDS, default=REPLAY_SPEEDS[0],
+                        help=f'initial replay speed (default: {REPLAY_SPEEDS[0]})')
+    parser.add_argument('--latency', action='store_true',
+                        help='measure data age, poll round trip, render times and UI loop lag, shown in an overlay')
+    parser.add_argument('--startup-timing', action='store_true',
+                        help='print how long each startup step took until the window was first painted')
 
     args = parser.parse_args()
 
+    # A replay shows recorded values, it is not written to the history or another recording
+    if args.replay and (args.history or args.record):
+        parser.error("--replay cannot be combined with --history or --record")
+
     # Instantiate a Tkinter root window
     root = tk.Tk()
+    startup.mark('tk root')
 
     # Set window title
     root.title(WINDOW_TITLE)
@@ -83,7 +122,26 @@ def main():
     view = HMIView(master=root)
     
     # Pass the parsed arguments to HMIController
-    controller = HMIController(view=view, host=args.host, port=args.port, timeout=args.timeout, os=args.os)
+    controller = HMIController(view=view, host=args.host, port=args.port, timeout=args.timeout, os=args.os,
+                                renderer=args.renderer, history=args.history,
+                                downsample=args.downsample, record=args.record,
+                                replay=args.replay, speed=args.speed, gateway=args.gateway,
+                                latency=args.latency)
+
+    if args.startup_timing:
+        # The window is painted once Tk is idle after mapping it, the controller also binds <Map>
+        def on_first_paint():
+            startup.mark('first paint')
+            print(startup.report())
+
+        def on_map(event):
+            nonlocal mapped
+            if event.widget is root and not mapped:
+                mapped = True
+                root.after_idle(on_first_paint)
+
+        mapped = False
+        root.bind('<Map>', on_map, add='+')
 
     # Start the GUI event loop
     root.mainloop()
@@ -0,0 +1,74 @@
+import time
+
+# Trend sample intervals during a transient, while values change and once the plant is steady
+FAST_INTERVAL_MS = 500
+NORMAL_INTERVAL_MS = 2000
+SLOW_INTERVAL_MS = 4000
+
+# Samples in a row without a visible change before the sampling slows down
+STEADY_SAMPLES = 5
+
+# Grid power changing faster than this, in kW per second, counts as a transient
+GRID_POWER_RATE_KW_S = 10
+
+# Idle time always left between two samples, even when a sample overran its interval
+MIN_IDLE_MS = 50
+
+
+class PollScheduler:
+    """
+    Chooses the interval to the next trend sample from how the plant behaves.
+
+    Samples are taken every FAST_INTERVAL_MS while a start or shutdown sequence runs
+    or the grid power changes quickly, every NORMAL_INTERVAL_MS while the displayed
+    values change, and every SLOW_INTERVAL_MS once STEADY_SAMPLES samples in a row
+    looked the same. The delay to the next sample is counted from the start of the
+    sample, so the cadence holds when drawing is slow, but a sample that overran its
+    interval is followed by MIN_IDLE_MS of idle time instead of running back to back.
+    """
+
+    def __init__(self):
+        self.interval_ms = NORMAL_INTERVAL_MS
+        self.steady = 0
+
+        # Grid power and time of the previous sample, for the rate of change
+        self._last_power = None
+        self._last_time = None
+
+        self._started = None
+
+
+    def start(self):
+        """Mark the start of a sample, before any of its work."""
+        self._started = time.monotonic()
+
+
+    def is_transient(self, sequence_running, grid_power, t):
+        """Return True during a start or shutdown sequence or a fast grid power change at time t."""
+        fast_change = (self._last_time is not None and t > self._last_time and
+                       abs(grid_power - self._last_power) / (t - self._last_time) > GRID_POWER_RATE_KW_S)
+        return sequence_running or fast_change
+
+
+    def update(self, sequence_running, grid_power, t, changed):
+        """Adapt the interval after a sample of grid_power at time t, changed if it looked different."""
+        if self.is_transient(sequence_running, grid_power, t):
+            self.interval_ms = FAST_INTERVAL_MS
+            self.steady = 0
+        elif changed:
+            self.interval_ms = NORMAL_INTERVAL_MS
+            self.steady = 0
+        else:
+            self.steady += 1
+            if self.steady >= STEADY_SAMPLES:
+                self.interval_ms = SLOW_INTERVAL_MS
+        self._last_power = grid_power
+        self._last_time = t
+
+
+    def delay_ms(self):
+        """Delay to the next sample, the interval less the time the current sample took."""
+        if self._started is None:
+            return self.interval_ms
+        elapsed_ms = (time.monotonic() - self._started) * 1000
+        return max(round(self.interval_ms - elapsed_ms), MIN_IDLE_MS)
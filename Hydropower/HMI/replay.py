@@ -0,0 +1,223 @@
+import bisect
+import json
+import threading
+import time
+
+# A frame with all point values is recorded this often, seeking starts from the nearest one
+KEYFRAME_INTERVAL_S = 60
+
+# Longest pause between recorded frames while the recorder was connected, a keyframe follows at the latest
+# after KEYFRAME_INTERVAL_S, so a longer pause in the recording is a gap in the data
+MAX_FRAME_GAP_S = 2 * KEYFRAME_INTERVAL_S
+
+# Replay speeds, selected with the 1, 2 and 3 keys
+REPLAY_SPEEDS = (1, 10, 100)
+
+# Longest wait of the replay thread, so pause, seek and stop are handled promptly
+MAX_WAIT_S = 0.1
+
+
+class Recorder:
+    """
+    Records received point values to a JSON lines file, one line per batch of updates:
+    {"t": UNIX timestamp, "points": {IOA: value}}. Every KEYFRAME_INTERVAL_S the line
+    holds all point values and "keyframe": true, so a replay can start from there.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.last_keyframe = None
+
+
+    def record(self, t, received, data):
+        """Record the values received at time t, or all values in data when a keyframe is due."""
+        if self.last_keyframe is None or t - self.last_keyframe >= KEYFRAME_INTERVAL_S:
+            # Nothing to record before the first values arrive
+            if data:
+                self._write({'t': t, 'keyframe': True, 'points': data})
+                self.last_keyframe = t
+        elif received:
+            self._write({'t': t, 'points': received})
+
+
+    def _write(self, frame):
+        self.file.write(json.dumps(frame) + '\n')
+
+
+    def close(self):
+        self.file.close()
+
+
+class ReplaySource:
+    """
+    Feeds the point values of a recording into an UpdateQueue from a background thread,
+    at the recorded pace times the replay speed.
+
+    The file is streamed line by line, only the time and byte offset of each keyframe
+    passed is kept, so recordings of any length replay in constant memory. The queue
+    keeps only the latest value per IOA, so when the display cannot keep up at high
+    speed intermediate values are skipped instead of queued. Seeking back restarts
+    from the nearest keyframe before the target, and seeking reads up to the target
+    without waiting, handing over only the resulting values.
+    """
+
+    def __init__(self, path, updates, speed=REPLAY_SPEEDS[0]):
+        self.updates = updates
+        self.file = open(path, 'rb')
+
+        # Time and offset of the keyframes read so far, in file order
+        self.keyframe_times = []
+        self.keyframe_offsets = []
+
+        first = self._read_frame()
+        if first is None:
+            raise ValueError(f"no recorded values in {path}")
+        self.start_time = first['t']
+        self._next_frame = first
+
+        # The replay clock runs from _clock_t at _clock_wall, scaled by the speed
+        self._lock = threading.Lock()
+        self.speed = speed
+        self.paused = False
+        self.finished = False
+        self._clock_t = self.start_time
+        self._clock_wall = time.monotonic()
+
+        # Recorded time of the last values handed over
+        self.last_frame_t = None
+        self._seek_to = None
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="HMI-Replay")
+        self.thread.start()
+
+
+    def now(self):
+        """Return the current recorded time of the replay."""
+        with self._lock:
+            return self._now()
+
+
+    def _now(self):
+        if self.paused or self.finished:
+            return self._clock_t
+        return self._clock_t + (time.monotonic() - self._clock_wall) * self.speed
+
+
+    def _set_clock(self, t):
+        self._clock_t = t
+        self._clock_wall = time.monotonic()
+
+
+    def is_connected(self):
+        """Return True while the recording has values for the current time, like a live connection."""
+        return self.last_frame_t is not None and self.now() - self.last_frame_t <= MAX_FRAME_GAP_S
+
+
+    def set_speed(self, speed):
+        with self._lock:
+            self._set_clock(self._now())
+            self.speed = speed
+        self._wake.set()
+
+
+    def toggle_pause(self):
+        with self._lock:
+            self._set_clock(self._now())
+            self.paused = not self.paused
+        self._wake.set()
+
+
+    def seek(self, t):
+        """Continue the replay from recorded time t."""
+        with self._lock:
+            self._seek_to = max(t, self.start_time)
+        self._wake.set()
+
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+    def _read_frame(self):
+        """Return the next frame in the file with integer IOAs, or None at the end."""
+        while True:
+            offset = self.file.tell()
+            line = self.file.readline()
+            if not line:
+                return None
+            try:
+                frame = json.loads(line)
+            except ValueError:
+                # A recording still being written may end in a partial line
+                print(f"Skipping unreadable recording line at byte {offset}")
+                continue
+
+            if frame.get('keyframe') and (not self.keyframe_offsets or offset > self.keyframe_offsets[-1]):
+                self.keyframe_times.append(frame['t'])
+                self.keyframe_offsets.append(offset)
+
+            frame['points'] = {int(ioa): value for ioa, value in frame['points'].items()}
+            return frame
+
+
+    def _seek(self, target):
+        if target < self.now():
+            # Go back to the last known keyframe at or before the target, it has all values
+            i = bisect.bisect_right(self.keyframe_times, target) - 1
+            self.file.seek(self.keyframe_offsets[i] if i >= 0 else 0)
+            self._next_frame = self._read_frame()
+
+        # Read up to the target without waiting, keeping the latest value per IOA
+        values = {}
+        while self._next_frame is not None and self._next_frame['t'] <= target:
+            values.update(self._next_frame['points'])
+            self.last_frame_t = self._next_frame['t']
+            self._next_frame = self._read_frame()
+
+        for ioa, value in values.items():
+            self.updates.put(ioa, value)
+
+        with self._lock:
+            self._set_clock(target)
+            self.finished = False
+
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    target, self._seek_to = self._seek_to, None
+                if target is not None:
+                    self._seek(target)
+                    continue
+
+                frame = self._next_frame
+                if frame is None:
+                    # The clock stops at the end of the recording until a seek back
+                    with self._lock:
+                        if not self.finished:
+                            self._set_clock(self._now())
+                            self.finished = True
+                    self._wait(MAX_WAIT_S)
+                    continue
+
+                with self._lock:
+                    delay = None if self.paused else (frame['t'] - self._now()) / self.speed
+                if delay is None or delay > 0:
+                    self._wait(MAX_WAIT_S if delay is None else min(delay, MAX_WAIT_S))
+                    continue
+
+                for ioa, value in frame['points'].items():
+                    self.updates.put(ioa, value)
+                self.last_frame_t = frame['t']
+                self._next_frame = self._read_frame()
+        finally:
+            self.file.close()
+
+
+    def _wait(self, timeout):
+        self._wake.wait(timeout)
+        self._wake.clear()
@@ -0,0 +1,120 @@
+from collections import deque
+
+import numpy as np
+
+
+class TimedRingBuffer:
+    """
+    Timestamped float samples covering a time window, with O(1) append, min and max
+    and amortized O(1) eviction by time.
+
+    Samples and their timestamps are written twice, at i and i + capacity, into
+    storage of twice the capacity. The buffered samples are therefore always one
+    contiguous slice, and times() and view() return them oldest first without
+    copying. evict_before() drops old samples by moving the start of that slice,
+    so each sample is evicted once. The capacity only bounds the memory, samples
+    are normally evicted by time before it is reached.
+    Running min/max use monotonic deques of (sample number, value), so each
+    sample is pushed and popped at most once.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self._times = np.zeros(2 * capacity)
+        self._data = np.zeros(2 * capacity)
+        # Sample numbers of the oldest buffered sample and of the next one to append
+        self._start = 0
+        self._count = 0
+
+        # Candidates for min and max, values increasing and decreasing from the front
+        self._min = deque()
+        self._max = deque()
+
+
+    def __len__(self):
+        return self._count - self._start
+
+
+    def append(self, t, value):
+        """Add a sample taken at time t, dropping the oldest one when full."""
+        n = self._count
+        slot = n % self.capacity
+        self._times[slot] = self._times[slot + self.capacity] = t
+        self._data[slot] = self._data[slot + self.capacity] = value
+        self._count = n + 1
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((n, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((n, value))
+
+        if len(self) > self.capacity:
+            self._start += 1
+            self._forget()
+
+
+    def evict_before(self, t):
+        """Drop the samples taken before time t."""
+        while self._start < self._count and self._times[self._start % self.capacity] < t:
+            self._start += 1
+        self._forget()
+
+
+    def _forget(self):
+        # Forget candidates that left the window
+        while self._min and self._min[0][0] < self._start:
+            self._min.popleft()
+        while self._max and self._max[0][0] < self._start:
+            self._max.popleft()
+
+
+    def _slice(self, storage):
+        start = self._start % self.capacity
+        view = storage[start:start + len(self)]
+        view.flags.writeable = False
+        return view
+
+
+    def view(self):
+        """Return the samples oldest first as a read-only view into the buffer."""
+        return self._slice(self._data)
+
+
+    def times(self):
+        """Return the timestamps matching view() as a read-only view."""
+        return self._slice(self._times)
+
+
+    def first_time(self):
+        """Return the timestamp of the oldest sample, or None when empty."""
+        if not len(self):
+            return None
+        return self._times[self._start % self.capacity].item()
+
+
+    def last(self):
+        """Return the newest sample, or None when empty."""
+        if not len(self):
+            return None
+        return self._data[(self._count - 1) % self.capacity].item()
+
+
+    def min(self):
+        """Return the smallest sample in the buffer, or None when empty."""
+        return self._min[0][1] if self._min else None
+
+
+    def max(self):
+        """Return the largest sample in the buffer, or None when empty."""
+        return self._max[0][1] if self._max else None
+
+
+    def clear(self):
+        self._start = self._count = 0
+        self._min.clear()
+        self._max.clear()
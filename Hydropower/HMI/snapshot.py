@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Headless HMI snapshots.
+
+Runs the HMI controller with the matplotlib panels drawn off-screen on Agg and
+writes the full panel to a PNG or SVG file every few seconds, from a live
+connection or a recording. Needs no display.
+
+    python3 snapshot.py --host 192.168.1.100 -o plant1.png --scale 0.25
+    python3 snapshot.py --replay plant.jsonl --speed 100 --count 1 --interval 10 -o ci.png
+"""
+
+import argparse
+import heapq
+import io
+import os
+import re
+import statistics
+import sys
+import time
+
+import matplotlib
+# Before any panel imports pyplot, so no figure ever asks for a display
+matplotlib.use('Agg')
+
+import numpy as np
+from PIL import Image
+
+from colors import HPHMI
+from hmi_controller import HMIController, HEADLESS_RENDERER
+from layout import GRAPH_SIZE, DYNAMIC_BAR_SIZE, INDICATOR_SIZE, BUTTON_VIEW_SIZE, DPI
+from main import (WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, DEFAULT_HOST_IP, DEFAULT_PORT, DEFAULT_TIMEOUT,
+                  check_ipv4_or_hostname, check_port_number, check_timeout, check_gateway)
+from replay import REPLAY_SPEEDS
+
+DEFAULT_INTERVAL_S = 5
+
+# Padding around every panel, as in the Tk grid of the HMI window
+PANEL_PAD = 20
+
+# Fast PNG compression, snapshots are rewritten every few seconds
+PNG_COMPRESS_LEVEL = 1
+
+
+def panel_position(row, column):
+    """Pixel position of a panel in the window, panels are laid out in two rows and two columns."""
+    x = PANEL_PAD if column == 0 else round(GRAPH_SIZE[0] * DPI) + 3 * PANEL_PAD
+    y = PANEL_PAD if row == 0 else round(GRAPH_SIZE[1] * DPI) + 3 * PANEL_PAD
+    return x, y
+
+
+class HeadlessView:
+    """
+    Stands in for the HMI window without a display. The after() callbacks of the
+    controller run from a plain scheduling loop, window methods do nothing.
+    """
+
+    def __init__(self):
+        self.master = self
+        self._title = WINDOW_TITLE
+        self._jobs = []
+        self._cancelled = set()
+        self._next_id = 0
+        self._running = False
+
+
+    def after(self, ms, callback, *args):
+        self._next_id += 1
+        heapq.heappush(self._jobs, (time.monotonic() + ms / 1000, self._next_id, callback, args))
+        return self._next_id
+
+
+    def after_cancel(self, job_id):
+        self._cancelled.add(job_id)
+
+
+    def title(self, title=None):
+        if title is None:
+            return self._title
+        self._title = title
+
+
+    def protocol(self, name, callback):
+        pass
+
+
+    def bind(self, sequence, callback):
+        pass
+
+
+    def quit(self):
+        self._running = False
+
+
+    def destroy(self):
+        pass
+
+
+    def mainloop(self):
+        """Run the scheduled callbacks in order until quit() is called."""
+        self._running = True
+        while self._running and self._jobs:
+            due, job_id, callback, args = self._jobs[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            heapq.heappop(self._jobs)
+            if job_id in self._cancelled:
+                self._cancelled.discard(job_id)
+            else:
+                callback(*args)
+
+
+class PanelSnapshot:
+    """
+    Composites the panels of a headless HMIController into one window-sized image.
+
+    The background and the button panel never change, so they are drawn once into
+    the frame. The dynamic bars and the indicator keep their static layers cached
+    by their BlitManagers, and updates only redraw the changed artists into their
+    Agg buffers. A frame therefore redraws the graph if it went stale and copies
+    three panel buffers, and unchanged frames are not written again.
+    """
+
+    def __init__(self, controller):
+        self.graph = controller.graph
+        self.static_panels = [(controller.button_view, panel_position(1, 1), BUTTON_VIEW_SIZE)]
+        self.panels = [(controller.graph, panel_position(0, 0), GRAPH_SIZE),
+                       (controller.dynamic_bar, panel_position(0, 1), DYNAMIC_BAR_SIZE),
+                       (controller.indicator, panel_position(1, 0), INDICATOR_SIZE)]
+
+        # Static layers: the window background and the button panel
+        self.frame = np.empty((WINDOW_HEIGHT, WINDOW_WIDTH, 4), dtype=np.uint8)
+        self.frame[:] = [int(HPHMI.gray[i:i + 2], 16) for i in (1, 3, 5)] + [255]
+        for panel, position, size in self.static_panels + self.panels:
+            panel.canvas.draw()
+        for panel, position, size in self.static_panels:
+            self._paste(panel, position)
+
+        # Static SVG of the button panel, made on the first SVG snapshot
+        self._static_svg = None
+        self._last_written = None
+
+
+    def _paste(self, panel, position):
+        x, y = position
+        buffer = np.asarray(panel.canvas.buffer_rgba())
+        self.frame[y:y + buffer.shape[0], x:x + buffer.shape[1]] = buffer
+
+
+    def render(self):
+        """Return the current panel as an RGBA array, redrawing only what changed."""
+        if self.graph.fig.stale:
+            self.graph.canvas.draw()
+        for panel, position, size in self.panels:
+            self._paste(panel, position)
+        return self.frame
+
+
+    def save(self, path, scale=1):
+        """
+        Write the panel to a PNG file, or an SVG file if the path ends in .svg. The file
+        is replaced at once, so readers never see a partial one. Returns False if the
+        PNG was unchanged and not written.
+        """
+        if path.endswith('.svg'):
+            data = self.svg().encode('utf-8')
+        else:
+            frame = self.render()
+            if self._last_written is not None and np.array_equal(frame, self._last_written):
+                return False
+            self._last_written = frame.copy()
+
+            image = Image.fromarray(frame, 'RGBA').convert('RGB')
+            if scale != 1:
+                image = image.resize((round(WINDOW_WIDTH * scale), round(WINDOW_HEIGHT * scale)),
+                                     Image.BILINEAR, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+            data = buffer.getvalue()
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+        return True
+
+
+    def svg(self):
+        """Return the panel as one SVG document with a nested SVG per panel."""
+        if self._static_svg is None:
+            self._static_svg = ''.join(self._panel_svg(*panel) for panel in self.static_panels)
+
+        parts = [self._static_svg]
+        for panel, position, size in self.panels:
+            # Blitted artists are left out of full draws unless included for the save
+            blit_manager = getattr(panel, 'blit_manager', None)
+            if blit_manager is None:
+                parts.append(self._panel_svg(panel, position, size))
+            else:
+                with blit_manager.including_artists():
+                    parts.append(self._panel_svg(panel, position, size))
+
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                f'width="{WINDOW_WIDTH}" height="{WINDOW_HEIGHT}" viewBox="0 0 {WINDOW_WIDTH} {WINDOW_HEIGHT}">\n'
+                f'<rect width="100%" height="100%" fill="{HPHMI.gray}"/>\n{"".join(parts)}</svg>\n')
+
+
+    @staticmethod
+    def _panel_svg(panel, position, size):
+        buffer = io.StringIO()
+        panel.fig.savefig(buffer, format='svg')
+        svg = buffer.getvalue()
+
+        # Drop the XML prolog and place the figure at its panel position, sized in pixels
+        svg = svg[svg.index('<svg'):]
+        x, y = position
+        return re.sub(r'width="[\d.]+pt" height="[\d.]+pt"',
+                      f'x="{x}" y="{y}" width="{round(size[0] * DPI)}" height="{round(size[1] * DPI)}"', svg, count=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless snapshots of the HMI - IEC104 Hydropower Plant")
+
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--host', type=check_ipv4_or_hostname, default=DEFAULT_HOST_IP,
+                        help=f'Host IP address or hostname (default: {DEFAULT_HOST_IP})')
+    source.add_argument('--replay', metavar='file',
+                        help='render a recording written with main.py --record instead of connecting to a server')
+    source.add_argument('--gateway', metavar='host[:port]', type=check_gateway,
+                        help='take the values from a data gateway instead of connecting to the server')
+    parser.add_argument('-p', '--port', metavar='port_number', type=check_port_number, default=DEFAULT_PORT,
+                        help=f'set TCP port (default: {DEFAULT_PORT})')
+    parser.add_argument('-t', '--timeout', metavar='timeout', type=check_timeout, default=DEFAULT_TIMEOUT,
+                        help=f'set timeout in seconds (default: {DEFAULT_TIMEOUT}s)')
+    parser.add_argument('--speed', type=int, choices=REPLAY_SPEEDS, default=REPLAY_SPEEDS[0],
+                        help=f'replay speed (default: {REPLAY_SPEEDS[0]})')
+    parser.add_argument('-o', '--output', metavar='file', required=True,
+                        help='PNG or SVG file to write, {n} in the name is replaced by the snapshot number')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL_S,
+                        help=f'seconds between snapshots (default: {DEFAULT_INTERVAL_S})')
+    parser.add_argument('--count', type=int, default=0,
+                        help='stop after this many snapshots (default: run until interrupted)')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='scale PNG snapshots by this factor, e.g. 0.25 for thumbnails (default: 1)')
+    args = parser.parse_args()
+
+    if args.interval <= 0 or args.count < 0 or not 0 < args.scale <= 1:
+        parser.error("need a positive interval, a count of 0 or more and a scale between 0 and 1")
+
+    view = HeadlessView()
+    controller = HMIController(view=view, host=args.host, port=args.port, timeout=args.timeout, os='',
+                               renderer=HEADLESS_RENDERER, replay=args.replay, speed=args.speed,
+                               gateway=args.gateway)
+    snapshot = PanelSnapshot(controller)
+    frame_times = []
+
+    def write_periodically(n=1):
+        start = time.perf_counter()
+        written = snapshot.save(args.output.format(n=n), args.scale)
+        if written:
+            frame_times.append(time.perf_counter() - start)
+
+        if args.count and n >= args.count:
+            controller.on_closing()
+        else:
+            view.after(round(args.interval * 1000), write_periodically, n + 1)
+
+    view.after(round(args.interval * 1000), write_periodically)
+
+    try:
+        view.mainloop()
+    except KeyboardInterrupt:
+        controller.on_closing()
+
+    if frame_times:
+        print(f"{len(frame_times)} snapshots written, median {statistics.median(frame_times) * 1000:.1f} ms "
+              f"per snapshot")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
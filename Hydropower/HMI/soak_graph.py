@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Long-run soak benchmark for GraphView.
+
+Drives update_graph off-screen with a synthetic signal and checks that traced
+memory, the number of figure artists and the per-frame draw time stay flat.
+Exits with status 1 if any of them grow past the allowed limits.
+
+    python3 soak_graph.py --updates 100000
+"""
+
+import argparse
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+
+from graph import GraphView
+from layout import NUMBER_OF_READINGS
+
+DEFAULT_UPDATES = 100000
+DEFAULT_DRAW_EVERY = 100
+
+# Synthetic time between updates, the HMI samples the trend every 2 seconds
+SAMPLE_INTERVAL_S = 2
+
+# The synthetic signal repeats after this many updates. Matplotlib caches the layout of
+# every distinct label text it draws, so a repeating signal keeps those bounded caches
+# from being counted as growth.
+SIGNAL_PERIOD = 600
+
+# Allowed growth between the first and last measurement windows
+MAX_MEMORY_GROWTH_KB = 512
+MAX_DRAW_TIME_RATIO = 1.5
+
+
+def reading(i):
+    """Return the synthetic (generator voltage, grid power) reading for update i."""
+    phase = 2 * math.pi * (i % SIGNAL_PERIOD) / SIGNAL_PERIOD
+    return 3000 + 1500 * math.sin(phase), 1000 + 500 * math.cos(3 * phase)
+
+
+def draw_time(graph):
+    """Time one full draw of the figure in seconds."""
+    start = time.perf_counter()
+    graph.canvas.draw()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak benchmark for the HMI trend graph")
+    parser.add_argument('-n', '--updates', type=int, default=DEFAULT_UPDATES,
+                        help=f'number of update_graph calls (default: {DEFAULT_UPDATES})')
+    parser.add_argument('--draw-every', type=int, default=DEFAULT_DRAW_EVERY,
+                        help=f'updates between timed draws (default: {DEFAULT_DRAW_EVERY})')
+    args = parser.parse_args()
+
+    if args.updates < 2 * NUMBER_OF_READINGS or args.draw_every < 1:
+        parser.error(f"need at least {2 * NUMBER_OF_READINGS} updates and a draw interval of 1 or more")
+
+    graph = GraphView()
+
+    # Fill the trend buffer first so the measured part runs at steady state
+    for i in range(NUMBER_OF_READINGS):
+        graph.update_graph(*reading(i), i * SAMPLE_INTERVAL_S)
+    graph.canvas.draw()
+
+    patches = len(graph.fig.patches)
+    artists = len(graph.ax.get_children())
+
+    tracemalloc.start()
+    draw_times = []
+    memory = []
+
+    for i in range(NUMBER_OF_READINGS, args.updates):
+        graph.update_graph(*reading(i), i * SAMPLE_INTERVAL_S)
+        if i % args.draw_every == 0:
+            draw_times.append(draw_time(graph))
+            memory.append(tracemalloc.get_traced_memory()[0])
+
+    tracemalloc.stop()
+
+    # Compare the first and last tenth of the run
+    window = max(len(draw_times) // 10, 1)
+    first_draw = statistics.median(draw_times[:window])
+    last_draw = statistics.median(draw_times[-window:])
+    memory_growth = (max(memory[-window:]) - max(memory[:window])) / 1024
+
+    print(f"{args.updates} updates, {len(draw_times)} timed draws")
+    print(f"draw time: {first_draw * 1000:.1f} ms -> {last_draw * 1000:.1f} ms")
+    print(f"traced memory growth: {memory_growth:.1f} kB")
+    print(f"figure patches: {patches} -> {len(graph.fig.patches)}, "
+          f"axes artists: {artists} -> {len(graph.ax.get_children())}")
+
+    failures = []
+    if len(graph.fig.patches) != patches or len(graph.ax.get_children()) != artists:
+        failures.append("number of artists changed")
+    if memory_growth > MAX_MEMORY_GROWTH_KB:
+        failures.append(f"memory grew by more than {MAX_MEMORY_GROWTH_KB} kB")
+    if last_draw > first_draw * MAX_DRAW_TIME_RATIO:
+        failures.append(f"draw time grew by more than {MAX_DRAW_TIME_RATIO}x")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
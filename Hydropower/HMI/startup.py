@@ -0,0 +1,24 @@
+import time
+
+# Time from starting the HMI until its window is first painted, aimed for on the Raspberry Pi panels
+FIRST_PAINT_BUDGET_S = 2.0
+
+# Marks of the startup steps, as (step, time), starting when this module is imported
+_marks = [('start', time.perf_counter())]
+
+
+def mark(step):
+    """Record that a startup step finished now, cheap enough to be left in the startup path."""
+    _marks.append((step, time.perf_counter()))
+
+
+def report():
+    """Return the time taken by each startup step and the total, with a warning above the budget."""
+    lines = []
+    for (_, previous), (step, t) in zip(_marks, _marks[1:]):
+        lines.append(f"{step:<20} {(t - previous) * 1000:8.1f} ms")
+    total = _marks[-1][1] - _marks[0][1]
+    lines.append(f"{'total':<20} {total * 1000:8.1f} ms")
+    if total > FIRST_PAINT_BUDGET_S:
+        lines.append(f"Startup took longer than the budget of {FIRST_PAINT_BUDGET_S * 1000:.0f} ms")
+    return '\n'.join(lines)
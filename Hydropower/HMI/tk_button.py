@@ -0,0 +1,97 @@
+from functools import partial
+
+from colors import HPHMI
+from dialogs import ControlDialogs
+from tk_panel import TkPanel
+from layout import BUTTON_VIEW_SIZE, BTN_POS, BUTTON_RECT as RECT, BTN_RECT_BORDER, TEXT_PLACEMENT
+
+
+class TkButtonView(ControlDialogs):
+    """Control buttons drawn with native Tk canvas items, same layout and dialogs as ButtonView."""
+
+    def __init__(self, master, controller, os):
+        self.controller = controller
+        self.os = os
+        self._setup_dialogs(os)
+
+        self.panel = TkPanel(master, BUTTON_VIEW_SIZE)
+        self.canvas_widget = self.panel.canvas
+
+        self._setup_view()
+
+
+    def _add_button(self, name, label, callback):
+        """
+        Add a button like matplotlib's Button with the inner rectangle on top. All items share
+        the button name as tag, so hovering and clicking any of them acts on the button.
+        """
+        panel = self.panel
+        x, y, width, height = BTN_POS[name]
+
+        background = panel.rectangle(x, y, width, height, fill=HPHMI.dark_gray, outline=HPHMI.black,
+                                     linewidth=0.8, tags=name)
+
+        border_x, border_y = BTN_RECT_BORDER['start']
+        border_width, border_height = BTN_RECT_BORDER['size']
+        panel.rectangle(x + border_x * width, y + border_y * height, border_width * width, border_height * height,
+                        fill=HPHMI.gray, outline=HPHMI.dark_gray, linewidth=BTN_RECT_BORDER['line_width'], tags=name)
+
+        panel.text(x + width / 2, y + height / 2, label, size=10, tags=name)
+
+        self.canvas_widget.tag_bind(name, "<Enter>",
+                                    lambda event: self.canvas_widget.itemconfigure(background, fill=HPHMI.dark_green))
+        self.canvas_widget.tag_bind(name, "<Leave>",
+                                    lambda event: self.canvas_widget.itemconfigure(background, fill=HPHMI.dark_gray))
+        self.canvas_widget.tag_bind(name, "<ButtonRelease-1>", partial(self._on_release, background, callback))
+
+
+    def _on_release(self, background, callback, event):
+        # Like matplotlib, a click only counts if the button is released over the button
+        x0, y0, x1, y1 = self.canvas_widget.coords(background)
+        if x0 <= event.x <= x1 and y0 <= event.y <= y1:
+            callback(event)
+
+
+    def _add_zone(self, rect):
+        self.panel.rectangle(*rect, fill=HPHMI.gray, outline=HPHMI.dark_gray, linewidth=1)
+
+
+    def _add_zone_text(self, x, y, text):
+        self.panel.text(x, y, text, size=10, bold=True, color=HPHMI.darker_gray)
+
+
+    def _setup_view(self):
+        # Zones first, so the buttons are drawn on top of them
+        for zone in ('faceplate_zone', 'misc_operations', 'manual_actions', 'info_zone'):
+            self._add_zone(RECT[zone])
+
+        rect = RECT['faceplate_zone']
+        self._add_zone_text(rect[0] + rect[2] / 2, rect[1] + rect[3] / 2 - 0.02, "Reserved Faceplate Zone\n")
+
+        rect = RECT['misc_operations']
+        self._add_zone_text(rect[0] + rect[2] / 2, TEXT_PLACEMENT['misc_operations'][1], "MISC OPERATIONS")
+
+        rect = RECT['manual_actions']
+        self._add_zone_text(rect[0] + rect[2] / 2, TEXT_PLACEMENT['manual_actions'][1], "MANUAL ACTIONS")
+
+        rect = RECT['info_zone']
+        self._add_zone_text(rect[0] + rect[2] / 2, rect[1] + rect[3] / 2 + TEXT_PLACEMENT['info_zone'][1],
+                            "Static\nInfo\nZone")
+
+        self._add_button('water_btn', 'TOGGLE\nWATER INLET',
+                         partial(self._on_toggle_button_click, title="Change Water Inlet", prompt="Toggle water inlet valve positions.", addr=15100))
+        self._add_button('cooling_btn', 'TOGGLE\nCOOLING SYSTEM STATUS',
+                         partial(self._on_toggle_button_click, title="Change Cooling System", prompt="Toggle cooling system status.", addr=15104))
+        self._add_button('excite_btn', 'TOGGLE\nEXCITER BREAKER',
+                         partial(self._on_toggle_button_click, title="Change Exciter Breaker", prompt="Toggle exciter breaker position.", addr=15101))
+        self._add_button('tr_sw_btn', 'TOGGLE\nTRANSFORMER BREAKERS',
+                         partial(self._on_toggle_button_click, title="Change Transformer Breaker", prompt="Toggle transformer breaker positions.", addr=15102))
+        self._add_button('grid_btn', 'TOGGLE\nGRID BREAKER',
+                         partial(self._on_toggle_button_click, title="Change Grid Breaker", prompt="Toggle grid breaker position.", addr=15103))
+        self._add_button('start_btn', 'AUTO STARTUP',
+                         partial(self._on_toggle_button_click, title="Activate Auto Startup", prompt="Activate auto startup.", addr=15105))
+        self._add_button('shutdown_btn', 'SHUTDOWN',
+                         partial(self._on_toggle_button_click, title="Shutdown process", prompt="Activate shutdown sequence.", addr=15106))
+        self._add_button('show_drawing_btn', 'SHOW SYSTEM', self.show_image_popup)
+
+        self.panel.outline()
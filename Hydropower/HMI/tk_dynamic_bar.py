@@ -0,0 +1,106 @@
+import math
+import tkinter as tk
+
+from colors import HPHMI
+from tk_panel import TkPanel
+from layout import (DYNAMIC_BAR_SIZE, Y_AXIS_OFFSET, BAR_WIDTH, BAR_HEIGHT, Y_AXIS_CENTER, SQUARE_SIZE,
+                    BAR1_X_AXIS_OFFSET, BAR2_X_AXIS_OFFSET, BAR3_X_AXIS_OFFSET, BAR4_X_AXIS_OFFSET,
+                    BAR1_START, BAR1_END, BAR1_MIN, BAR1_MAX, BAR2_START, BAR2_END, BAR2_MIN, BAR2_MAX,
+                    BAR3_START, BAR3_END, BAR3_MIN, BAR3_MAX, BAR4_START, BAR4_END, BAR4_MIN, BAR4_MAX,
+                    dynamic_bar_geometry, is_out_of_bounds)
+
+# Default matplotlib axes box the bar titles are placed in, as (x, y, width, height)
+AXES_BOX = (0.125, 0.11, 0.775, 0.77)
+
+TRIANGLE_BASE_SIZE = 0.055
+TRIANGLE_HEIGHT = 0.09
+
+
+def axes_to_figure(x, y):
+    """Convert axes coordinates of the matplotlib DynamicBar to figure coordinates."""
+    return AXES_BOX[0] + x * AXES_BOX[2], AXES_BOX[1] + y * AXES_BOX[3]
+
+
+class TkDynamicBar:
+    """Dynamic bars drawn with native Tk canvas items, same layout as DynamicBar."""
+
+    def __init__(self, master):
+        self.panel = TkPanel(master, DYNAMIC_BAR_SIZE)
+        self.canvas_widget = self.panel.canvas
+
+        self._setup_view()
+
+
+    def _setup_view(self):
+        panel = self.panel
+
+        # Title and bar texts
+        panel.text(*axes_to_figure(-0.13, 1.11), "Hydropower Generation Control", size=11, bold=True,
+                   color='#4A4A4A', anchor=tk.NW, justify=tk.LEFT)
+        for x, label in ((-0.13, "Bearing temp"), (0.13, "Turbine speed"), (0.39, "Gen voltage"), (0.65, "Grid power")):
+            panel.text(*axes_to_figure(x, 1.02), label, size=11, color=HPHMI.darker_gray, anchor=tk.NW, justify=tk.LEFT)
+
+        # Outline bars, dynamic inner bars, square indicators and numbers per bar
+        self.bars = []
+        for offset in (BAR1_X_AXIS_OFFSET, BAR2_X_AXIS_OFFSET, BAR3_X_AXIS_OFFSET, BAR4_X_AXIS_OFFSET):
+            panel.rectangle(offset, Y_AXIS_OFFSET, BAR_WIDTH, BAR_HEIGHT, fill=HPHMI.dark_gray,
+                            outline=HPHMI.darker_gray, linewidth=1)
+
+            bar = panel.rectangle(offset + 0.0021, Y_AXIS_OFFSET, BAR_WIDTH - 0.0025, 0, fill=HPHMI.light_blue,
+                                  outline=HPHMI.darker_gray, linewidth=0.3)
+            square = panel.polygon(self._square_vertices(offset + 0.0136, Y_AXIS_CENTER), fill=HPHMI.darker_gray)
+            number = panel.text(offset + BAR_WIDTH / 2, Y_AXIS_OFFSET - 0.0275, '0', size=10, bold=True,
+                                color=HPHMI.dark_blue, anchor=tk.N)
+
+            self.bars.append((offset, bar, square, number))
+
+        # Warning triangles above bar 1 and 3, hidden until a value is out of bounds
+        self.warning_triangle_bar1 = self._triangle(BAR1_X_AXIS_OFFSET, HPHMI.red)
+        self.warning_triangle_bar3 = self._triangle(BAR3_X_AXIS_OFFSET, HPHMI.yellow)
+
+        panel.outline()
+
+
+    @staticmethod
+    def _square_vertices(x, y):
+        """Corners of the square indicator, rotated 45 degrees about (x, y) like the matplotlib Rectangle."""
+        side = SQUARE_SIZE * math.cos(math.pi / 4)
+        return [(x, y), (x + side, y + side), (x, y + 2 * side), (x - side, y + side)]
+
+
+    def _triangle(self, offset, color):
+        triangle_x = offset + 0.013
+        triangle_y = Y_AXIS_CENTER + 0.34
+
+        triangle_vertices = [(triangle_x, triangle_y),
+                             (triangle_x - TRIANGLE_BASE_SIZE / 2, triangle_y + TRIANGLE_HEIGHT),
+                             (triangle_x + TRIANGLE_BASE_SIZE / 2, triangle_y + TRIANGLE_HEIGHT)]
+
+        return self.panel.polygon(triangle_vertices, fill=color, outline=HPHMI.black, linewidth=1.5, state=tk.HIDDEN)
+
+
+    def update_bars(self, bearing_temp, turbine_speed, gen_voltage, grid_power):
+        self._set_value(BAR1_MIN, BAR1_MAX, bearing_temp, self.bars[0], BAR1_START, BAR1_END)
+        self._set_value(BAR2_MIN, BAR2_MAX, turbine_speed, self.bars[1], BAR2_START, BAR2_END)
+        self._set_value(BAR3_MIN, BAR3_MAX, gen_voltage, self.bars[2], BAR3_START, BAR3_END)
+        self._set_value(BAR4_MIN, BAR4_MAX, grid_power, self.bars[3], BAR4_START, BAR4_END)
+
+        self._display_warning(BAR1_MIN, BAR1_MAX, bearing_temp, self.warning_triangle_bar1)
+        self._display_warning(BAR3_MIN, BAR3_MAX, gen_voltage, self.warning_triangle_bar3)
+
+
+    def _set_value(self, min_set_point, max_set_point, set_point, bar_items, start, end):
+        offset, bar, square, number = bar_items
+        bar_y, bar_height, square_y = dynamic_bar_geometry(min_set_point, max_set_point, set_point, start, end)
+
+        # Move the items in place
+        self.panel.move_rectangle(bar, offset + 0.0021, bar_y, BAR_WIDTH - 0.0025, bar_height)
+        self.canvas_widget.coords(square, self.panel.polygon_coords(self._square_vertices(offset + 0.0136, square_y)))
+        self.canvas_widget.itemconfigure(number, text=str(set_point))
+
+
+    def _display_warning(self, min_set_point, max_set_point, set_point, triangle):
+        # Check if set_point is out of bounds and display warning triangle
+        warning = is_out_of_bounds(min_set_point, max_set_point, set_point)
+        if warning is not None:
+            self.canvas_widget.itemconfigure(triangle, state=tk.NORMAL if warning else tk.HIDDEN)
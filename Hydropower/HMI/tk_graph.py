@@ -0,0 +1,270 @@
+import time
+import tkinter as tk
+
+import numpy as np
+
+from colors import HPHMI
+from ring_buffer import TimedRingBuffer
+from tk_panel import TkPanel, points
+from downsample import DEFAULT_METHOD
+from trend_paging import TrendPaging, find_gaps, history_tick_labels, time_to_position
+from layout import (GRAPH_SIZE, BAR_OUTLINES, BASE_Y, MAX_TREND_SAMPLES, NUMBER_OF_READINGS, Y_MAX, Y_MIN,
+                    X_TICKS, X_TICK_LABELS, range_bar_bounds, gen_voltage_text, grid_power_text)
+
+# Axes box of the matplotlib GraphView after tight_layout, as (x, y, width, height)
+AXES_BOX = (0.1589, 0.1207, 0.7761, 0.8300)
+
+# Centers of the value label boxes and positions of the y and x tick labels, measured
+# from the matplotlib layout
+GEN_VOLTAGE_LABEL_POS = (0.0839, 0.5357)
+GRID_POWER_LABEL_POS = (0.0839, 0.2867)
+Y_LABEL_RIGHT = 0.1383
+Y_LABEL_MIN_POS = 0.1275
+Y_LABEL_MAX_POS = 0.9300
+X_TICK_LABEL_TOP = 0.0903
+
+Y_GRID = range(Y_MIN, Y_MAX + 1, 1000)
+
+# Padding of the label boxes, matplotlib's square boxstyle pads by 0.3 of the font size
+LABEL_BOX_PAD = points(0.3 * 10)
+TICK_LENGTH = points(3.5)
+
+
+class TkRangeBar:
+    """Outline and fill rectangles next to the trend showing the min to max range of a series."""
+    def __init__(self, panel, outline, color):
+        self.panel = panel
+        self.x = outline['x']
+        self.width = outline['width']
+
+        panel.rectangle(outline['x'], outline['y'], outline['width'], outline['height'],
+                        fill=HPHMI.gray, outline=HPHMI.dark_gray, linewidth=1)
+
+        # Empty until the first update
+        self.bar = panel.rectangle(self.x, BASE_Y, self.width, 0, fill=color)
+
+
+    def update(self, low, high):
+        """Move the fill to span low to high."""
+        rect_y, rect_height = range_bar_bounds(low, high)
+        self.panel.move_rectangle(self.bar, self.x, rect_y, self.width, rect_height)
+
+
+class TkGraphView(TrendPaging):
+    """Trend graph drawn with native Tk canvas items, same layout as GraphView."""
+
+    def __init__(self, master, trend_store=None, downsample=DEFAULT_METHOD):
+        self.master = master
+        self.view_type = 'default'
+        self.panel = TkPanel(master, GRAPH_SIZE)
+        self.canvas_widget = self.panel.canvas
+
+        self.grid_power = TimedRingBuffer(MAX_TREND_SAMPLES)
+        self.gen_voltage = TimedRingBuffer(MAX_TREND_SAMPLES)
+
+        self.setup_view()
+        self.canvas_widget.grid(row=0, column=0, columnspan=4, rowspan=8, pady=20, padx=20)
+        self._setup_paging(trend_store, downsample)
+
+
+    def _data_to_figure(self, x, y):
+        """Convert a reading number and value to figure coordinates."""
+        return (AXES_BOX[0] + x / NUMBER_OF_READINGS * AXES_BOX[2],
+                AXES_BOX[1] + (y - Y_MIN) / (Y_MAX - Y_MIN) * AXES_BOX[3])
+
+
+    def setup_view(self):
+        panel = self.panel
+        ax_x, ax_y, ax_width, ax_height = AXES_BOX
+
+        # Faint dashed grid lines, gap markers are lowered below the first one
+        self.grid_lines = []
+        for value in Y_GRID:
+            _, y = self._data_to_figure(0, value)
+            self.grid_lines.append(panel.line([(ax_x, y), (ax_x + ax_width, y)], color=HPHMI.dark_gray,
+                                              linewidth=0.5, dash=(4, 2)))
+            # Outward tick mark
+            px, py = panel.px(ax_x, y)
+            panel.canvas.create_line(px - TICK_LENGTH, py, px, py, fill=HPHMI.black, width=points(0.8))
+
+        self.x_tick_labels = []
+        for tick, label in zip(X_TICKS, X_TICK_LABELS):
+            x, _ = self._data_to_figure(tick, 0)
+            panel.line([(x, ax_y), (x, ax_y + ax_height)], color=HPHMI.dark_gray, linewidth=0.5, dash=(4, 2))
+            px, py = panel.px(x, ax_y)
+            panel.canvas.create_line(px, py, px, py + TICK_LENGTH, fill=HPHMI.black, width=points(0.8))
+
+            # The last tick is now
+            now = tick == X_TICKS[-1]
+            self.x_tick_labels.append(panel.text(x, X_TICK_LABEL_TOP, label, size=10, bold=now,
+                                                 color=HPHMI.dark_green if now else HPHMI.black, anchor=tk.N))
+
+        # Axes frame
+        panel.rectangle(*AXES_BOX, outline=HPHMI.dark_gray, linewidth=0.8)
+
+        # Trend lines, one item per segment between gaps, empty until the first reading
+        self.gen_voltage_lines = [self._add_line(HPHMI.dark_blue)]
+        self.grid_power_lines = [self._add_line(HPHMI.brown)]
+        self.gap_markers = []
+
+        # Manually add the y-labels
+        for value, y in ((Y_MIN, Y_LABEL_MIN_POS), (Y_MAX, Y_LABEL_MAX_POS)):
+            panel.text(Y_LABEL_RIGHT, y, str(value), size=10, bold=True, color=HPHMI.dark_green, anchor=tk.E)
+
+        # Value labels with a box around them, the box is resized with the text
+        self.gen_voltage_label = panel.text(*GEN_VOLTAGE_LABEL_POS, "0\nGen\nVoltage\n(V)", size=10)
+        self.gen_voltage_box = panel.canvas.create_rectangle(0, 0, 0, 0, outline=HPHMI.dark_blue, width=points(2))
+        self.grid_power_label = panel.text(*GRID_POWER_LABEL_POS, "0\n Power \nProd\n(kW)", size=10)
+        self.grid_power_box = panel.canvas.create_rectangle(0, 0, 0, 0, outline=HPHMI.brown, width=points(2))
+        self._fit_box(self.gen_voltage_box, self.gen_voltage_label)
+        self._fit_box(self.grid_power_box, self.grid_power_label)
+
+        # Bars showing the min to max range of each trend
+        self.voltage_gen_bar = TkRangeBar(panel, BAR_OUTLINES['gen_voltage'], HPHMI.dark_blue)
+        self.grid_power_bar = TkRangeBar(panel, BAR_OUTLINES['grid_power'], HPHMI.brown)
+
+        panel.outline()
+
+
+    def _fit_box(self, box, label):
+        x0, y0, x1, y1 = self.canvas_widget.bbox(label)
+        self.canvas_widget.coords(box, x0 - LABEL_BOX_PAD, y0 - LABEL_BOX_PAD, x1 + LABEL_BOX_PAD, y1 + LABEL_BOX_PAD)
+
+
+    def _set_label(self, box, label, text):
+        if self.canvas_widget.itemcget(label, 'text') != text:
+            self.canvas_widget.itemconfigure(label, text=text)
+            self._fit_box(box, label)
+
+
+    def plot_columns(self):
+        """Return the width of the plot area in pixels."""
+        return round(AXES_BOX[2] * self.panel.width)
+
+
+    def _set_x_tick_labels(self, labels, live):
+        for item, label in zip(self.x_tick_labels, labels):
+            self.canvas_widget.itemconfigure(item, text=label)
+        # The last tick is now in the live trend, or the end time of a history window
+        self.canvas_widget.itemconfigure(self.x_tick_labels[-1], fill=HPHMI.dark_green if live else HPHMI.darker_gray)
+
+
+    def _add_line(self, color):
+        return self.panel.line([(0, 0), (0, 0)], color=color, linewidth=1.5, state=tk.HIDDEN)
+
+
+    def _set_line(self, line, positions, values):
+        """
+        Set the polyline points from reading positions and values, kept inside the axes like
+        the clipped matplotlib lines.
+        """
+        if len(values) < 2:
+            self.canvas_widget.itemconfigure(line, state=tk.HIDDEN)
+            return
+
+        left, top = self.panel.px(AXES_BOX[0], AXES_BOX[1] + AXES_BOX[3])
+        right, bottom = self.panel.px(AXES_BOX[0] + AXES_BOX[2], AXES_BOX[1])
+        values = np.clip(values, Y_MIN, Y_MAX)
+
+        coords = np.empty(2 * len(values))
+        coords[0::2] = left + np.asarray(positions) * ((right - left) / NUMBER_OF_READINGS)
+        coords[1::2] = bottom + (values - Y_MIN) / (Y_MAX - Y_MIN) * (top - bottom)
+
+        self.canvas_widget.coords(line, coords.tolist())
+        self.canvas_widget.itemconfigure(line, state=tk.NORMAL)
+
+
+    def _set_segments(self, lines, color, positions, values, gaps):
+        """Draw the segments between gaps as separate polylines, adding items as needed."""
+        bounds = [0, *(gaps + 1), len(values)]
+        while len(lines) < len(bounds) - 1:
+            lines.append(self._add_line(color))
+
+        for i, line in enumerate(lines):
+            if i < len(bounds) - 1:
+                self._set_line(line, positions[bounds[i]:bounds[i + 1]], values[bounds[i]:bounds[i + 1]])
+            else:
+                self.canvas_widget.itemconfigure(line, state=tk.HIDDEN)
+
+
+    def _set_gap_markers(self, starts, ends):
+        """Shade the axes from each start to end position behind the grid, adding items as needed."""
+        while len(self.gap_markers) < len(starts):
+            marker = self.panel.rectangle(0, 0, 0, 0, fill=HPHMI.light_gray, state=tk.HIDDEN)
+            self.canvas_widget.tag_lower(marker, self.grid_lines[0])
+            self.gap_markers.append(marker)
+
+        for i, marker in enumerate(self.gap_markers):
+            if i < len(starts):
+                x0, _ = self._data_to_figure(max(starts[i], 0), Y_MIN)
+                x1, _ = self._data_to_figure(min(ends[i], NUMBER_OF_READINGS), Y_MIN)
+                self.panel.move_rectangle(marker, x0, AXES_BOX[1], x1 - x0, AXES_BOX[3])
+                self.canvas_widget.itemconfigure(marker, state=tk.NORMAL)
+            else:
+                self.canvas_widget.itemconfigure(marker, state=tk.HIDDEN)
+
+
+    def update_graph(self, gen_voltage_data, grid_power_data, t=None):
+        """Updates the graph with the readings taken at time t, now by default."""
+
+        # The buffers keep the readings of the last TREND_WINDOW_S seconds
+        trend_changed = self._append_readings(gen_voltage_data, grid_power_data, time.time() if t is None else t)
+
+        # Readings are collected while history is shown or drawing is paused, and drawn when returning
+        if not self.is_live() or self.paused:
+            return
+
+        # Update the value labels
+        self._set_label(self.gen_voltage_box, self.gen_voltage_label, gen_voltage_text(gen_voltage_data))
+        self._set_label(self.grid_power_box, self.grid_power_label, grid_power_text(grid_power_data))
+
+        if trend_changed:
+            self._draw_trend()
+
+
+    def _draw_trend(self):
+        self._draw_live_lines()
+
+        # Update the bars showing the min to max range of each trend
+        if len(self.gen_voltage):
+            self.voltage_gen_bar.update(self.gen_voltage.min(), self.gen_voltage.max())
+            self.grid_power_bar.update(self.grid_power.min(), self.grid_power.max())
+
+
+    def _draw_live(self):
+        """Draw the trend from the ring buffers."""
+        self._set_label(self.gen_voltage_box, self.gen_voltage_label, gen_voltage_text(self.gen_voltage.last() or 0))
+        self._set_label(self.grid_power_box, self.grid_power_label, grid_power_text(self.grid_power.last() or 0))
+        self._draw_trend()
+        self._set_x_tick_labels(X_TICK_LABELS, live=True)
+
+
+    def _draw_lines(self, start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap):
+        """Draw trend lines between start and end, broken and marked where readings are missing."""
+        gen_voltage_positions = time_to_position(gen_voltage_times, start, end)
+        gaps = find_gaps(gen_voltage_times, max_gap)
+        self._set_segments(self.gen_voltage_lines, HPHMI.dark_blue, gen_voltage_positions, gen_voltage, gaps)
+        self._set_segments(self.grid_power_lines, HPHMI.brown, time_to_position(grid_power_times, start, end),
+                           grid_power, find_gaps(grid_power_times, max_gap))
+
+        # Both signals are sampled together, the markers follow the generator voltage
+        self._set_gap_markers(gen_voltage_positions[gaps], gen_voltage_positions[gaps + 1])
+
+
+    def _draw_history(self, start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap):
+        """Draw stored trend lines between start and end."""
+        self._draw_lines(start, end, gen_voltage_times, gen_voltage, grid_power_times, grid_power, max_gap)
+
+        # Labels and bars show the last value and the range of the window, empty without samples
+        if len(gen_voltage):
+            self._set_label(self.gen_voltage_box, self.gen_voltage_label, gen_voltage_text(gen_voltage[-1]))
+            self._set_label(self.grid_power_box, self.grid_power_label, grid_power_text(grid_power[-1]))
+            self.voltage_gen_bar.update(gen_voltage.min(), gen_voltage.max())
+            self.grid_power_bar.update(grid_power.min(), grid_power.max())
+        else:
+            self._set_label(self.gen_voltage_box, self.gen_voltage_label, gen_voltage_text(0))
+            self._set_label(self.grid_power_box, self.grid_power_label, grid_power_text(0))
+            self.voltage_gen_bar.update(Y_MIN, Y_MIN)
+            self.grid_power_bar.update(Y_MIN, Y_MIN)
+
+        self._set_x_tick_labels(history_tick_labels(start, end), live=False)
@@ -0,0 +1,80 @@
+from colors import HPHMI
+from tk_panel import TkPanel
+from layout import INDICATOR_SIZE, INDICATOR_RECT as RECT
+
+# Description label and texts shown when on and off, by status box
+STATUS_BOXES = {
+    'water_inlet': ("WATER INLET", "OPEN", "CLOSED"),
+    'excite_switch': ("EXCITER BREAKER", "CLOSED", "OPEN"),
+    'cooling_switch': ("COOLING SYSTEM", "ON", "OFF"),
+    'transformer_sw': ("TRA BREAKERS", "CLOSED", "OPEN"),
+    'start_seq': ("STARTUP", "ACTIVE", "OFF"),
+    'grid_switch': ("GRID BREAKER", "CLOSED", "OPEN"),
+    'shutdown_seq': ("SHUTDOWN", "ACTIVE", "OFF"),
+}
+
+
+class TkIndicator:
+    """Control status panel drawn with native Tk canvas items, same layout as Indicator."""
+
+    def __init__(self, master):
+        self.master = master
+        self.panel = TkPanel(master, INDICATOR_SIZE)
+        self.canvas_widget = self.panel.canvas
+
+        # Status box and text items by box name
+        self.boxes = {}
+        self.texts = {}
+
+        # Last status shown per box, None until the first update
+        self.status = dict.fromkeys(STATUS_BOXES)
+
+        self.setup_view()
+        self.canvas_widget.grid(row=9, columnspan=4, rowspan=8, column=0, pady=20, padx=20)
+
+
+    def _box(self, rect, text=None):
+        """Add a status box with optional centered text, returning the box and text items."""
+        box = self.panel.rectangle(*rect, fill=HPHMI.gray, outline=HPHMI.darker_gray, linewidth=0.5)
+        label = None
+        if text is not None:
+            label = self.panel.text(rect[0] + rect[2] / 2, rect[1] + rect[3] / 2, text, size=10, bold=True,
+                                    color=HPHMI.darker_gray)
+        return box, label
+
+
+    def setup_view(self):
+        self._box(RECT['control_status'], "Control Status")
+        self._box(RECT['filler_box_right'])
+        self._box(RECT['filler_box_left'])
+
+        for name, (description, _, _) in STATUS_BOXES.items():
+            self._box(RECT[f'{name}_desc'], description)
+            self.boxes[name], self.texts[name] = self._box(RECT[f'{name}_dynamic'], "Loading...")
+
+        self.panel.outline()
+
+
+    def update_status(self, water_in, exc_sw, cool_sw, tr_sw, start, grid_sw, shutdown):
+        """Update the status of boxes based on the read statuses."""
+        statuses = {
+            'water_inlet': water_in,
+            'excite_switch': exc_sw,
+            'cooling_switch': cool_sw,
+            'transformer_sw': tr_sw,
+            'start_seq': start,
+            'grid_switch': grid_sw,
+            'shutdown_seq': shutdown,
+        }
+
+        for name, status in statuses.items():
+            status = bool(status)
+            # Only reconfigure boxes whose state changed
+            if self.status[name] == status:
+                continue
+            self.status[name] = status
+
+            _, on_text, off_text = STATUS_BOXES[name]
+            self.canvas_widget.itemconfigure(self.boxes[name], fill=HPHMI.white if status else HPHMI.dark_gray)
+            self.canvas_widget.itemconfigure(self.texts[name], text=on_text if status else off_text,
+                                             fill=HPHMI.dark_blue)
@@ -0,0 +1,80 @@
+import tkinter as tk
+
+from colors import HPHMI
+from layout import DPI
+
+# Font used for all panel texts, the matplotlib default
+FONT_FAMILY = "DejaVu Sans"
+POINTS_PER_INCH = 72
+
+
+def points(size):
+    """Convert a size in points to pixels at the panel DPI."""
+    return size * DPI / POINTS_PER_INCH
+
+
+class TkPanel:
+    """
+    tk.Canvas drawing in the figure coordinates of layout.py: fractions of the panel
+    size with the origin in the lower left corner. Items are created once and moved
+    with coords and itemconfigure afterwards.
+    """
+
+    def __init__(self, master, size):
+        self.width = round(size[0] * DPI)
+        self.height = round(size[1] * DPI)
+
+        self.canvas = tk.Canvas(master, width=self.width, height=self.height, bg=HPHMI.gray,
+                                highlightthickness=0, borderwidth=0)
+
+
+    def px(self, x, y):
+        """Convert figure coordinates to canvas pixels."""
+        return x * self.width, (1 - y) * self.height
+
+
+    def font(self, size, bold=False):
+        # Negative sizes are pixels in Tk, so text is scaled like the matplotlib figures
+        return (FONT_FAMILY, -round(points(size)), "bold" if bold else "normal")
+
+
+    def rect_coords(self, x, y, width, height):
+        """Return canvas coords of the rectangle with lower left corner (x, y)."""
+        x0, y0 = self.px(x, y + height)
+        x1, y1 = self.px(x + width, y)
+        return x0, y0, x1, y1
+
+
+    def rectangle(self, x, y, width, height, fill="", outline="", linewidth=1, **kwargs):
+        return self.canvas.create_rectangle(*self.rect_coords(x, y, width, height), fill=fill,
+                                            outline=outline, width=points(linewidth) if outline else 0, **kwargs)
+
+
+    def move_rectangle(self, item, x, y, width, height):
+        self.canvas.coords(item, *self.rect_coords(x, y, width, height))
+
+
+    def text(self, x, y, text, size=10, bold=False, color=HPHMI.black, anchor=tk.CENTER, justify=tk.CENTER, **kwargs):
+        return self.canvas.create_text(*self.px(x, y), text=text, font=self.font(size, bold),
+                                       fill=color, anchor=anchor, justify=justify, **kwargs)
+
+
+    def polygon_coords(self, vertices):
+        return [c for x, y in vertices for c in self.px(x, y)]
+
+
+    def polygon(self, vertices, fill="", outline="", linewidth=1, **kwargs):
+        return self.canvas.create_polygon(self.polygon_coords(vertices), fill=fill, outline=outline,
+                                          width=points(linewidth) if outline else 0, **kwargs)
+
+
+    def line(self, vertices, color=HPHMI.black, linewidth=1, **kwargs):
+        return self.canvas.create_line(self.polygon_coords(vertices), fill=color, width=points(linewidth), **kwargs)
+
+
+    def outline(self):
+        """Draw the dark gray box around the panel that all figures have."""
+        # Only the inner half of the 2 pt matplotlib edge falls inside the figure
+        width = points(1)
+        return self.canvas.create_rectangle(width / 2, width / 2, self.width - width / 2, self.height - width / 2,
+                                            outline=HPHMI.dark_gray, width=width)
@@ -0,0 +1,180 @@
+import time
+
+import numpy as np
+
+from downsample import DEFAULT_METHOD
+from layout import MAX_SAMPLE_GAP_S, NUMBER_OF_READINGS, TREND_WINDOW_S, X_TICKS
+
+# Window lengths to zoom between, the first is the live trend
+TREND_WINDOWS_S = (TREND_WINDOW_S, 3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600)
+
+# Windows longer than this are labelled in hours instead of minutes
+MAX_MINUTES_WINDOW_S = 2 * 3600
+
+
+def end_label(end):
+    """Label of the last tick while showing history, with the date unless it is today."""
+    end_time = time.localtime(end)
+    if time.strftime('%Y%m%d', end_time) == time.strftime('%Y%m%d'):
+        return time.strftime('%H:%M', end_time)
+    return time.strftime('%d.%m %H:%M', end_time)
+
+
+def history_tick_labels(start, end):
+    """
+    Labels of X_TICKS for a history window: time before the end in minutes, or hours
+    for long windows, and the end time on the last tick.
+    """
+    unit, suffix = (60, '') if end - start <= MAX_MINUTES_WINDOW_S else (3600, 'h')
+    labels = [f"-{(end - start) * (1 - tick / NUMBER_OF_READINGS) / unit:.3g}{suffix}" for tick in X_TICKS[:-1]]
+    return labels + [end_label(end)]
+
+
+def time_to_position(times, start, end):
+    """Map timestamps in start to end onto the reading positions 0 to NUMBER_OF_READINGS of the x-axis."""
+    return (times - start) * (NUMBER_OF_READINGS / (end - start))
+
+
+def find_gaps(times, max_gap):
+    """Return the indices i where the pause from times[i] to times[i + 1] is longer than max_gap."""
+    return np.flatnonzero(np.diff(times) > max_gap)
+
+
+class TrendPaging:
+    """
+    Live trend buffers and paging and zooming through the stored history, shared by
+    GraphView and TkGraphView.
+
+    Readings are kept with their timestamps and drawn on a time axis ending at the
+    newest reading, so a missed sample shows as a gap instead of compressing the trend.
+    The mouse wheel over the graph pages one window back or forward, and paging past
+    the present returns to the live trend. Control and the mouse wheel zoom out to
+    windows of up to 7 days and back in. While history is shown new readings are still
+    collected, but not drawn. Graphs keep gen_voltage and grid_power TimedRingBuffers
+    and implement _draw_lines, _draw_live and plot_columns.
+    """
+
+    def _setup_paging(self, trend_store, downsample=DEFAULT_METHOD):
+        self.trend_store = trend_store
+        self.downsample = downsample
+
+        # Time of the newest reading, the live trend ends there
+        self.live_end = None
+        # Longest pause between readings drawn as a continuous line
+        self.max_sample_gap = MAX_SAMPLE_GAP_S
+
+        # End time of the history window shown, None while live
+        self.history_end = None
+        self.window = TREND_WINDOW_S
+
+        # While paused, readings are collected but not drawn, as when the window is iconified
+        self.paused = False
+
+        if trend_store is not None and self.canvas_widget is not None:
+            # Wheel up goes back in time or zooms out, X11 reports the wheel as buttons 4 and 5
+            self.canvas_widget.bind("<Button-4>", lambda event: self.page(-1))
+            self.canvas_widget.bind("<Button-5>", lambda event: self.page(1))
+            self.canvas_widget.bind("<MouseWheel>", lambda event: self.page(-1 if event.delta > 0 else 1))
+            self.canvas_widget.bind("<Control-Button-4>", lambda event: self.zoom(1))
+            self.canvas_widget.bind("<Control-Button-5>", lambda event: self.zoom(-1))
+            self.canvas_widget.bind("<Control-MouseWheel>", lambda event: self.zoom(1 if event.delta > 0 else -1))
+
+
+    def _append_readings(self, gen_voltage_data, grid_power_data, t):
+        """
+        Add the readings taken at time t to the live trend and evict those that left the
+        window. Returns False if the trend looks the same after the append.
+        """
+        # A gapless window of readings equal to the new ones looks the same after the append
+        changed = not (self._is_flat_at(self.gen_voltage, gen_voltage_data, t) and
+                       self._is_flat_at(self.grid_power, grid_power_data, t))
+
+        for readings, value in ((self.gen_voltage, gen_voltage_data), (self.grid_power, grid_power_data)):
+            readings.append(t, value)
+            readings.evict_before(t - TREND_WINDOW_S)
+
+        self.live_end = t
+        return changed
+
+
+    def _is_flat_at(self, readings, value, t):
+        """Return True if readings cover the window up to t without gaps and all equal value."""
+        if not len(readings) or not readings.min() == value == readings.max():
+            return False
+        times = readings.times()
+        return (times[0] <= t - TREND_WINDOW_S + self.max_sample_gap and t - times[-1] <= self.max_sample_gap
+                and not len(find_gaps(times, self.max_sample_gap)))
+
+
+    def reset_trend(self):
+        """Drop the live trend readings, when the time of new readings jumps back."""
+        self.gen_voltage.clear()
+        self.grid_power.clear()
+        self.live_end = None
+        if self.is_live():
+            self._draw_live()
+
+
+    def _draw_live_lines(self):
+        """Draw the live trend lines on the window ending at the newest reading."""
+        end = self.live_end or time.time()
+        self._draw_lines(end - TREND_WINDOW_S, end, self.gen_voltage.times(), self.gen_voltage.view(),
+                         self.grid_power.times(), self.grid_power.view(), self.max_sample_gap)
+
+
+    def is_live(self):
+        return self.history_end is None
+
+
+    def set_paused(self, paused):
+        """Stop or resume drawing the live trend, drawing the readings collected meanwhile on resume."""
+        resumed = self.paused and not paused
+        self.paused = paused
+        if resumed and self.is_live():
+            self._draw_live()
+
+
+    def page(self, pages):
+        """Move the window by a number of window lengths, negative is back in time."""
+        if self.trend_store is None:
+            return
+        self._show_window_ending((self.history_end or time.time()) + pages * self.window)
+
+
+    def zoom(self, steps):
+        """Switch to a longer window for positive steps, keeping the end time."""
+        if self.trend_store is None:
+            return
+        index = TREND_WINDOWS_S.index(self.window) + steps
+        self.window = TREND_WINDOWS_S[min(max(index, 0), len(TREND_WINDOWS_S) - 1)]
+        self._show_window_ending(self.history_end or time.time())
+
+
+    def _show_window_ending(self, end):
+        # Only the shortest window is live, longer ones show the stored history up to now
+        now = time.time()
+        if end >= now and self.window == TREND_WINDOW_S:
+            self.show_live()
+        else:
+            end = min(end, now)
+            self.show_range(end - self.window, end)
+
+
+    def show_range(self, start, end):
+        """Load the stored trend between start and end and show it instead of the live trend."""
+        columns = self.plot_columns()
+        lines = self.trend_store.query_lines(start, end, columns, self.downsample)
+
+        # Aggregates and reduced lines have a point per bucket or pixel column, so only
+        # pauses longer than those are gaps
+        max_gap = max(self.max_sample_gap, 2 * self.trend_store.resolution(start, end, columns),
+                      2 * (end - start) / columns)
+
+        self.history_end = end
+        self._draw_history(start, end, *lines, max_gap)
+
+
+    def show_live(self):
+        self.history_end = None
+        self.window = TREND_WINDOW_S
+        self._draw_live()
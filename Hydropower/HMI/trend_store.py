@@ -0,0 +1,237 @@
+import queue
+import sqlite3
+import threading
+
+import numpy as np
+
+from downsample import DEFAULT_METHOD, minmax_envelope, lttb
+
+# Queued samples are written in batched transactions this often
+FLUSH_INTERVAL_S = 10
+MAX_BATCH_SIZE = 500
+
+# Bucket lengths in seconds of the aggregate levels, finest first
+AGGREGATE_LEVELS = (60, 600, 3600)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    t REAL PRIMARY KEY,
+    gen_voltage REAL NOT NULL,
+    grid_power REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    level INTEGER NOT NULL,
+    bucket REAL NOT NULL,
+    n INTEGER NOT NULL,
+    gen_voltage_sum REAL NOT NULL,
+    gen_voltage_min REAL NOT NULL,
+    gen_voltage_max REAL NOT NULL,
+    grid_power_sum REAL NOT NULL,
+    grid_power_min REAL NOT NULL,
+    grid_power_max REAL NOT NULL,
+    PRIMARY KEY (level, bucket)
+) WITHOUT ROWID;
+"""
+
+# Adds a batch of per-bucket aggregates to the stored ones
+UPSERT_AGGREGATE = """
+INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (level, bucket) DO UPDATE SET
+    n = n + excluded.n,
+    gen_voltage_sum = gen_voltage_sum + excluded.gen_voltage_sum,
+    gen_voltage_min = min(gen_voltage_min, excluded.gen_voltage_min),
+    gen_voltage_max = max(gen_voltage_max, excluded.gen_voltage_max),
+    grid_power_sum = grid_power_sum + excluded.grid_power_sum,
+    grid_power_min = min(grid_power_min, excluded.grid_power_min),
+    grid_power_max = max(grid_power_max, excluded.grid_power_max)
+"""
+
+# Builds the aggregates of one level from the stored samples, for files written without them
+REBUILD_AGGREGATES = """
+INSERT INTO aggregates
+SELECT ?1, CAST(t / ?1 AS INTEGER) * ?1 AS bucket, count(*),
+       sum(gen_voltage), min(gen_voltage), max(gen_voltage),
+       sum(grid_power), min(grid_power), max(grid_power)
+FROM samples GROUP BY bucket
+"""
+
+
+def aggregate_batch(batch, level):
+    """Return the aggregate rows of one level for a batch of (t, gen_voltage, grid_power) samples."""
+    buckets = {}
+    for t, gen_voltage, grid_power in batch:
+        bucket = int(t // level) * level
+        row = buckets.get(bucket)
+        if row is None:
+            buckets[bucket] = [level, bucket, 1, gen_voltage, gen_voltage, gen_voltage,
+                               grid_power, grid_power, grid_power]
+        else:
+            row[2] += 1
+            row[3] += gen_voltage
+            row[4] = min(row[4], gen_voltage)
+            row[5] = max(row[5], gen_voltage)
+            row[6] += grid_power
+            row[7] = min(row[7], grid_power)
+            row[8] = max(row[8], grid_power)
+    return list(buckets.values())
+
+
+class TrendStore:
+    """
+    Trend history in a local SQLite database.
+
+    Samples are keyed and clustered by their UNIX timestamp, so a time range is read
+    with one index range scan. append() only queues the sample, a writer thread
+    inserts queued samples in batched transactions. The database runs in WAL mode
+    so queries from the UI thread do not wait for the writer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+
+        # Files written before aggregates were kept get them built once
+        if (connection.execute("SELECT 1 FROM samples LIMIT 1").fetchone() and
+                not connection.execute("SELECT 1 FROM aggregates LIMIT 1").fetchone()):
+            with connection:
+                for level in AGGREGATE_LEVELS:
+                    connection.execute(REBUILD_AGGREGATES, (level,))
+        connection.close()
+
+        # The writer opens its own connection, readers get one per thread
+        self._local = threading.local()
+
+        self._samples = queue.Queue()
+        self._closed = threading.Event()
+        self.writer_thread = threading.Thread(target=self._write_samples, daemon=True, name="HMI-TrendStore")
+        self.writer_thread.start()
+
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        # WAL stays consistent with NORMAL, a crash may only lose the last batches
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+
+    def append(self, t, gen_voltage, grid_power):
+        """Queue a sample for writing, without blocking the caller."""
+        self._samples.put((t, gen_voltage, grid_power))
+
+
+    def _write_samples(self):
+        connection = self._connect()
+        try:
+            while True:
+                closing = self._closed.wait(FLUSH_INTERVAL_S)
+
+                # Write everything queued since the last flush in transactions of up to MAX_BATCH_SIZE
+                batch = []
+                while True:
+                    try:
+                        batch.append(self._samples.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for i in range(0, len(batch), MAX_BATCH_SIZE):
+                    samples = batch[i:i + MAX_BATCH_SIZE]
+                    try:
+                        # Samples and the aggregates they add to are written in the same transaction
+                        with connection:
+                            # A sample with a timestamp already stored is ignored, and not counted in the aggregates
+                            inserted = [sample for sample in samples if connection.execute(
+                                "INSERT OR IGNORE INTO samples VALUES (?, ?, ?)", sample).rowcount == 1]
+                            for level in AGGREGATE_LEVELS:
+                                connection.executemany(UPSERT_AGGREGATE, aggregate_batch(inserted, level))
+                    except sqlite3.Error as e:
+                        print(f"Error writing trend history: {e}")
+
+                if closing:
+                    break
+        finally:
+            connection.close()
+
+
+    def _reader(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+
+    def query(self, start, end):
+        """
+        Return the samples with start <= t <= end as three NumPy arrays: timestamps,
+        generator voltage and grid power, in time order.
+        """
+        rows = self._reader().execute("SELECT t, gen_voltage, grid_power FROM samples WHERE t BETWEEN ? AND ? ORDER BY t",
+                                      (start, end)).fetchall()
+        if not rows:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        samples = np.array(rows, dtype=float)
+        return samples[:, 0], samples[:, 1], samples[:, 2]
+
+
+    def query_aggregates(self, level, start, end):
+        """
+        Return the buckets of an aggregate level overlapping start to end as a NumPy array
+        with one row per bucket: start time, then mean, min and max of generator voltage
+        and of grid power.
+        """
+        rows = self._reader().execute(
+            "SELECT bucket, gen_voltage_sum / n, gen_voltage_min, gen_voltage_max, "
+            "grid_power_sum / n, grid_power_min, grid_power_max "
+            "FROM aggregates WHERE level = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+            (level, start - level, end)).fetchall()
+        return np.array(rows, dtype=float).reshape(-1, 7)
+
+
+    def resolution(self, start, end, columns):
+        """
+        Return the bucket length of the coarsest aggregate level with a bucket per pixel
+        column between start and end, or 0 if the raw samples are read.
+        """
+        levels = [level for level in AGGREGATE_LEVELS if level <= (end - start) / columns]
+        return levels[-1] if levels else 0
+
+
+    def query_lines(self, start, end, columns, method=DEFAULT_METHOD):
+        """
+        Return the trend lines between start and end reduced to the plot width in pixel
+        columns, as (gen_voltage_times, gen_voltage, grid_power_times, grid_power).
+
+        Reads the raw samples if there are at most two per column, else the coarsest
+        aggregate level that still has a bucket per column. 'minmax' draws the lowest and
+        highest value of every column, so no excursion is lost. 'lttb' draws a smooth
+        line through the bucket means.
+        """
+        level = self.resolution(start, end, columns)
+
+        if not level:
+            times, gen_voltage, grid_power = self.query(start, end)
+            gen_low = gen_high = gen_voltage
+            power_low = power_high = grid_power
+        else:
+            buckets = self.query_aggregates(level, start, end)
+            # Plot each bucket at its center, leaving out those centered outside the window
+            times = buckets[:, 0] + level / 2
+            inside = (times >= start) & (times <= end)
+            buckets, times = buckets[inside], times[inside]
+            gen_voltage, gen_low, gen_high = buckets[:, 1], buckets[:, 2], buckets[:, 3]
+            grid_power, power_low, power_high = buckets[:, 4], buckets[:, 5], buckets[:, 6]
+
+        if method == 'lttb':
+            return lttb(times, gen_voltage, columns) + lttb(times, grid_power, columns)
+        return (minmax_envelope(times, gen_low, gen_high, start, end, columns) +
+                minmax_envelope(times, power_low, power_high, start, end, columns))
+
+
+    def close(self):
+        """Write the queued samples and stop the writer thread."""
+        self._closed.set()
+        self.writer_thread.join()
@@ -36,6 +36,22 @@ ANA_GENERATOR_VOLTAGE = 10011  # IOA 10011 - Voltage produced by generator
 ANA_GRID_POWER        = 10012  # IOA 10012 - Estimated kW produced
 ANA_BEARING_TEMP      = 10013  # IOA 10013 - Bearing temperature
 
+# Interrogation groups (QOI 21-36), each answers with only its own points
+GROUP_SWITCHES = 1  # Group 1 - all single-point measurements
+GROUP_ANALOG   = 2  # Group 2 - all analog measurements
+
+INTERROGATION_GROUPS = {
+    GROUP_SWITCHES: (
+        SP_WATER_INLET, SP_EXCITE_SWITCH, SP_TRANSFORMER_SWITCH,
+        SP_GRID_SWITCH, SP_COOLING_SWITCH, SP_START_PROCESS, SP_SHUTDOWN_PROCESS
+    ),
+    GROUP_ANALOG: (ANA_TURBINE_SPEED, ANA_GENERATOR_VOLTAGE, ANA_GRID_POWER, ANA_BEARING_TEMP),
+}
+
+TYPE_ID_INTERROGATION = 100  # C_IC_NA_1 type identification in an I-frame
+TYPE_ID_POSITION = 6         # Type identification follows the 6 byte APCI
+QOI_STATION = 20             # Group n is requested with QOI 20 + n
+
 MAX_WATER_SPEED = 5 # m3/s
 MAX_TURBINE_SPEED = 250 # RPM
 PROD_VOLTAGE_MIDPOINT = 3300 # Volts
@@ -95,6 +111,14 @@ class IEC104Server:
             pt = self.station.add_point(io_address=ioa, type=c104.Type.M_ME_NC_1)
             self.ana_pts[ioa] = pt
 
+        # Map interrogation group number to its points
+        self.interrogation_groups = {}
+        for group, ioas in INTERROGATION_GROUPS.items():
+            self.interrogation_groups[group] = [self.station.get_point(ioa) for ioa in ioas]
+
+        # c104 only answers station interrogations, group requests are handled here
+        self.server.on_receive_raw(callable=self.on_receive_raw)
+
         # Initialize IOA array with default values (0)
         self.ioa_register = [0] * IOA_SIZE
 
@@ -120,6 +144,9 @@ class IEC104Server:
         for ioa, pt in self.ana_pts.items():
             pt.value = float(self.ioa_register[ioa])
 
+        # Values last set on the points, only changes are reported spontaneously
+        self.reported = {}
+
         self.water_speed = 0.0
         self.grid_voltage = GRID_POWER_MIDPOINT
         self.grid_power_target = GRID_POWER_MIDPOINT
@@ -163,13 +190,56 @@ class IEC104Server:
         return c104.ResponseState.SUCCESS
 
 
+    def on_receive_raw(self, server: c104.Server, data: bytes) -> None:
+        # Only look closer at interrogation commands
+        if len(data) <= TYPE_ID_POSITION or data[TYPE_ID_POSITION] != TYPE_ID_INTERROGATION:
+            return
+
+        message = c104.explain_bytes_dict(apdu=data)
+        if message.get('cot') != c104.Cot.ACTIVATION or message.get('commonAddress') != CASDU:
+            return
+
+        # The qualifier of interrogation is the last element byte
+        qoi = int(message['elements'].split()[-1], 16)
+        group = qoi - QOI_STATION
+        points = self.interrogation_groups.get(group)
+        if not points:
+            return
+
+        if self.debug:
+            print(f"[INTERROGATION] group {group} -> {len(points)} points")
+
+        # A batch must hold points of the same type
+        cause = getattr(c104.Cot, f"INTERROGATED_BY_GROUP_{group}")
+        points_by_type = {}
+        for pt in points:
+            points_by_type.setdefault(pt.type, []).append(pt)
+        for same_type_points in points_by_type.values():
+            server.transmit_batch(c104.Batch(cause=cause, points=same_type_points))
+
+
     def push_all_points(self):
         # Update IEC-104 point values based on IOA register (simulated values)
+        changed = []
         for ioa, pt in self.sp_pts.items():
-            pt.value = bool(self.ioa_register[ioa])
+            value = bool(self.ioa_register[ioa])
+            if self.reported.get(ioa) != value:
+                pt.value = value
+                changed.append(pt)
+            self.reported[ioa] = value
         # Analog measurement values
+        changed_analog = []
         for ioa, pt in self.ana_pts.items():
-            pt.value = float(self.ioa_register[ioa])
+            value = float(self.ioa_register[ioa])
+            if self.reported.get(ioa) != value:
+                pt.value = value
+                changed_analog.append(pt)
+            self.reported[ioa] = value
+
+        # Report changes to connected clients as they happen, a batch must hold points of the same type
+        for points in (changed, changed_analog):
+            if points:
+                self.server.transmit_batch(c104.Batch(cause=c104.Cot.SPONTANEOUS, points=points))
 
 
     def simulate_data(self):
@@ -399,12 +469,19 @@ if __name__ == '__main__':
     parser.add_argument('--host', type=str, default='127.0.0.1', help='Host IP address')
     parser.add_argument('-p', '--port', type=int, default=IEC104_PORT, help='Port number')
     parser.add_argument('-d', '--debug', action='store_true', help='Enable debug mode')
+    parser.add_argument('-n', '--count', type=int, default=1,
+                        help='Number of plants to simulate, on consecutive ports from --port')
 
     args = parser.parse_args()
 
     print(f"Starting IEC 104 server at {args.host}:{args.port} with debug mode {'enabled' if args.debug else 'disabled'}")
 
-    server = IEC104Server(args.host, args.port, args.debug)
-    print("IEC-104 server is now listening on port", args.port)
+    # Every plant is a server of its own, as a fleet of separate outstations
+    servers = [IEC104Server(args.host, args.port + n, args.debug) for n in range(args.count)]
+    if args.count == 1:
+        print("IEC-104 server is now listening on port", args.port)
+    else:
+        print(f"{args.count} IEC-104 servers are now listening on ports {args.port} to {args.port + args.count - 1}")
     input("Press Enter to terminate the server\n")
-    server.server.stop()
+    for server in servers:
+        server.server.stop()